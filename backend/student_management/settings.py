@@ -2,10 +2,12 @@
 Django settings for student_management project.
 """
 
+import os
 from pathlib import Path
 from datetime import timedelta
 
 from decouple import config
+from corsheaders.defaults import default_headers
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -39,7 +41,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'students.middleware.PerformanceMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'students.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -49,6 +53,21 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# API-only deployment: no admin site, and none of the session, CSRF, auth and
+# messages middleware it needs (the API authenticates with JWT only)
+API_ONLY = config('API_ONLY', default=False, cast=bool)
+if API_ONLY:
+    INSTALLED_APPS.remove('django.contrib.admin')
+    MIDDLEWARE = [
+        name for name in MIDDLEWARE
+        if name not in (
+            'django.contrib.sessions.middleware.SessionMiddleware',
+            'django.middleware.csrf.CsrfViewMiddleware',
+            'django.contrib.auth.middleware.AuthenticationMiddleware',
+            'django.contrib.messages.middleware.MessageMiddleware',
+        )
+    ]
+
 ROOT_URLCONF = 'student_management.urls'
 
 TEMPLATES = [
@@ -73,11 +92,66 @@ WSGI_APPLICATION = 'student_management.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.0/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# DB_ENGINE=sqlite (default, single node) or postgresql (production)
+DB_ENGINE = config('DB_ENGINE', default='sqlite')
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': config('DB_NAME', default='student_management'),
+            'USER': config('DB_USER', default='postgres'),
+            'PASSWORD': config('DB_PASSWORD', default=''),
+            'HOST': config('DB_HOST', default='localhost'),
+            'PORT': config('DB_PORT', default='5432'),
+            # Persistent connections, checked before reuse
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'CONN_HEALTH_CHECKS': True,
+            # Behind PgBouncer in transaction mode server-side cursors must be off
+            'DISABLE_SERVER_SIDE_CURSORS': config('DB_DISABLE_SERVER_SIDE_CURSORS', default=False, cast=bool),
+            'OPTIONS': {
+                'connect_timeout': config('DB_CONNECT_TIMEOUT', default=5, cast=int),
+                'options': '-c statement_timeout={}'.format(config('DB_STATEMENT_TIMEOUT_MS', default=10000, cast=int)),
+            },
+        }
     }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': config('DB_NAME', default=str(BASE_DIR / 'db.sqlite3')),
+            'CONN_MAX_AGE': config('DB_CONN_MAX_AGE', default=60, cast=int),
+            'OPTIONS': {
+                # Seconds a writer waits for the lock before "database is locked"
+                'timeout': config('SQLITE_BUSY_TIMEOUT', default=20, cast=int),
+            },
+            # A file, not :memory:, so threaded tests get real locking
+            'TEST': {'NAME': str(BASE_DIR / 'test_db.sqlite3')},
+        }
+    }
+
+# Optional read replica: a second SQLite file or PostgreSQL server with the same data.
+# students.routers sends safe StudentViewSet requests there; writes stay on default.
+DB_REPLICA_NAME = config('DB_REPLICA_NAME', default='')
+DB_REPLICA_HOST = config('DB_REPLICA_HOST', default='')
+if DB_REPLICA_NAME or DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'NAME': DB_REPLICA_NAME or DATABASES['default']['NAME'],
+        'HOST': DB_REPLICA_HOST or DATABASES['default'].get('HOST', ''),
+        'TEST': {'MIRROR': 'default'},
+    }
+DATABASE_ROUTERS = ['students.routers.PrimaryReplicaRouter']
+# Seconds a user keeps reading from the primary after a write (the tolerated replica lag)
+STUDENT_REPLICA_STICKY_SECONDS = config('STUDENT_REPLICA_STICKY_SECONDS', default=5, cast=int)
+
+# Applied to every new SQLite connection by students.db.configure_sqlite
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',
+    'synchronous': 'NORMAL',
+    'mmap_size': config('SQLITE_MMAP_SIZE', default=256 * 1024 * 1024, cast=int),
+    'cache_size': -config('SQLITE_CACHE_KB', default=20000, cast=int),
+    'temp_store': 'MEMORY',
 }
 
 
@@ -125,22 +199,99 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
-        'rest_framework.authentication.SessionAuthentication',
+        'students.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_RENDERER_CLASSES': (
+        'students.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        'students.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10,
 }
 
+# JSON library behind FastJSONRenderer/FastJSONParser: 'auto' (orjson when
+# installed), 'orjson' or 'json' (stdlib); the output bytes are the same
+API_JSON_LIBRARY = config('API_JSON_LIBRARY', default='auto')
+
+# Responses smaller than this are sent uncompressed (gzip, or br with brotli installed)
+API_COMPRESSION_MIN_BYTES = config('API_COMPRESSION_MIN_BYTES', default=1024, cast=int)
+
+# Request instrumentation (students.middleware.PerformanceMiddleware): a
+# Server-Timing header on every response, a warning in the
+# students.performance log for queries slower than PERF_SLOW_QUERY_MS and for
+# SELECTs repeated PERF_N_PLUS_ONE_THRESHOLD times in one request, and
+# Prometheus metrics at /api/metrics (Bearer METRICS_TOKEN, or a staff user;
+# with no token set only staff can read them)
+PERF_INSTRUMENTATION = config('PERF_INSTRUMENTATION', default=True, cast=bool)
+PERF_SERVER_TIMING = config('PERF_SERVER_TIMING', default=True, cast=bool)
+PERF_SLOW_QUERY_MS = config('PERF_SLOW_QUERY_MS', default=100, cast=float)
+PERF_N_PLUS_ONE_THRESHOLD = config('PERF_N_PLUS_ONE_THRESHOLD', default=10, cast=int)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# Student search: 'auto' (FTS5 on SQLite, pg_trgm on PostgreSQL), 'icontains',
+# 'sqlite_fts' or 'postgres_trgm'
+STUDENT_SEARCH_BACKEND = config('STUDENT_SEARCH_BACKEND', default='auto')
+
+# Cached student list/detail/stats responses, invalidated on every Student write.
+# LocMemCache is per process: use Redis (django.core.cache.backends.redis.RedisCache,
+# needs the redis package) or FileBasedCache when running several workers.
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default='student-management'),
+    },
+    # Per-student representations keyed by (id, updated_at). LocMemCache evicts
+    # least recently used entries past MAX_ENTRIES (~1 KB each).
+    'student_rows': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'student-rows',
+        'TIMEOUT': None,
+        'OPTIONS': {'MAX_ENTRIES': config('STUDENT_ROW_CACHE_MAX_ENTRIES', default=20000, cast=int)},
+    },
+}
+STUDENT_CACHE_TIMEOUT = config('STUDENT_CACHE_TIMEOUT', default=300, cast=int)
+
+# Server-sent change feed (/students/events/): how often an open stream checks
+# for new StudentChange rows, and how long one response stays open before the
+# browser reconnects with Last-Event-ID (a sync worker is held meanwhile)
+STUDENT_CHANGE_FEED_POLL_SECONDS = config('STUDENT_CHANGE_FEED_POLL_SECONDS', default=1.0, cast=float)
+STUDENT_CHANGE_FEED_MAX_SECONDS = config('STUDENT_CHANGE_FEED_MAX_SECONDS', default=30, cast=int)
+# Days of StudentChange history kept by prune_student_changes; clients whose
+# sync token or last event id is older get the full roster again
+STUDENT_CHANGE_RETENTION_DAYS = config('STUDENT_CHANGE_RETENTION_DAYS', default=30, cast=int)
+
 # JWT Settings
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(hours=24),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
+    # Tokens carry a hash of the password and stop working when it changes
+    'CHECK_REVOKE_TOKEN': True,
 }
+# How long CachedJWTAuthentication reuses a resolved user
+AUTH_USER_CACHE_SECONDS = config('AUTH_USER_CACHE_SECONDS', default=60, cast=int)
+
+# Login throttling (students.throttling): after this many failures an IP or a
+# username is locked out for LOGIN_BACKOFF_BASE_SECONDS, doubling with every
+# further failure up to LOGIN_BACKOFF_MAX_SECONDS. LOGIN_MAX_HASHES_PER_SECOND
+# caps password hashing for all logins together (per process with LocMemCache),
+# a backstop against spread-out attacks; the default of a few hashes per core
+# leaves room for everyone signing in at once. 0 turns the cap off.
+LOGIN_THROTTLE_ENABLED = config('LOGIN_THROTTLE_ENABLED', default=True, cast=bool)
+LOGIN_THROTTLE_CACHE = config('LOGIN_THROTTLE_CACHE', default='default')
+LOGIN_IP_FAILURES_BEFORE_BACKOFF = config('LOGIN_IP_FAILURES_BEFORE_BACKOFF', default=10, cast=int)
+LOGIN_USERNAME_FAILURES_BEFORE_BACKOFF = config('LOGIN_USERNAME_FAILURES_BEFORE_BACKOFF', default=5, cast=int)
+LOGIN_BACKOFF_BASE_SECONDS = config('LOGIN_BACKOFF_BASE_SECONDS', default=1, cast=int)
+LOGIN_BACKOFF_MAX_SECONDS = config('LOGIN_BACKOFF_MAX_SECONDS', default=900, cast=int)
+LOGIN_MAX_HASHES_PER_SECOND = config('LOGIN_MAX_HASHES_PER_SECOND', default=4 * (os.cpu_count() or 1), cast=int)
 
 # CORS Settings
 CORS_ALLOWED_ORIGINS = [
@@ -155,3 +306,6 @@ CORS_ALLOWED_ORIGINS = [
 # Allow CORS from all origins in development
 CORS_ALLOW_ALL_ORIGINS = True
 CORS_ALLOW_CREDENTIALS = True
+# Optimistic locking on student edits: ETag out, If-Match back in
+CORS_EXPOSE_HEADERS = ['ETag']
+CORS_ALLOW_HEADERS = [*default_headers, 'if-match', 'last-event-id']
@@ -1,10 +1,13 @@
 """
 URL configuration for student_management project.
 """
-from django.contrib import admin
+from django.conf import settings
 from django.urls import path, include
 
 urlpatterns = [
-    path('admin/', admin.site.urls),
     path('api/', include('students.urls')),
 ]
+
+if not settings.API_ONLY:
+    from django.contrib import admin
+    urlpatterns.insert(0, path('admin/', admin.site.urls))
@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save, pre_save
 
 
 class StudentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'students'
+
+    def ready(self):
+        from django.contrib.auth import get_user_model
+        from .authentication import forget_saved_user, remember_saved_password
+        from .changes import record_deleted, record_saved
+        from .db import configure_sqlite
+        from .models import Student
+        connection_created.connect(configure_sqlite, dispatch_uid='students_configure_sqlite')
+        post_save.connect(record_saved, sender=Student, dispatch_uid='students_record_saved')
+        post_delete.connect(record_deleted, sender=Student, dispatch_uid='students_record_deleted')
+        # Cached JWT users (students.authentication) go stale when the user row changes
+        pre_save.connect(remember_saved_password, sender=get_user_model(), dispatch_uid='students_remember_saved_password')
+        post_save.connect(forget_saved_user, sender=get_user_model(), dispatch_uid='students_forget_saved_user')
+        post_delete.connect(forget_saved_user, sender=get_user_model(), dispatch_uid='students_forget_deleted_user')
@@ -0,0 +1,118 @@
+import functools
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from django.views.decorators.http import require_GET
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from .authentication import CachedJWTAuthentication, QueryTokenJWTAuthentication
+from .changes import astream_changes, event_stream_response, resume_point
+from .jsonlib import dumps
+from .metrics import timed
+from .models import Student, StudentStats
+from .pagination import StudentPagination
+from .routers import apinned_to_primary, reset_replica, use_replica
+from .search import get_search_backend
+from .serializers import STUDENT_ROW_FIELDS, represent_student_rows
+from .stats import rebuild_stats, represent_stats
+
+
+# Async versions of the read-only student endpoints for ASGI deployments: async
+# ORM plus the values_list fast path, no DRF view machinery.
+
+
+@timed('render')
+def json_response(data, status=200):
+    # Same bytes as the DRF views' FastJSONRenderer
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
+
+
+def async_api_view(view=None, authentication_class=CachedJWTAuthentication):
+    """JWT-authenticate the request, route its reads like StudentViewSet and render errors as JSON"""
+    if view is None:
+        return functools.partial(async_api_view, authentication_class=authentication_class)
+    authenticator = authentication_class()
+
+    @require_GET
+    @functools.wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            result = await sync_to_async(authenticator.authenticate)(request)
+        except (AuthenticationFailed, InvalidToken) as e:
+            return json_response(e.detail if isinstance(e.detail, dict) else {'detail': e.detail}, 401)
+        if result is None:
+            return json_response({'detail': 'Authentication credentials were not provided.'}, 401)
+        request.user = result[0]
+
+        token = use_replica(not await apinned_to_primary(request.user))
+        try:
+            return await view(request, *args, **kwargs)
+        except Http404:
+            return json_response({'detail': 'Not found.'}, 404)
+        finally:
+            reset_replica(token)
+
+    return wrapper
+
+
+@async_api_view
+async def student_list(request):
+    """Page-number list with ?search=, ?fields=, ?page= and ?page_size="""
+    queryset = Student.objects.all()
+    search = request.GET.get('search')
+    if search:
+        # 'auto' resolution introspects the database: not from the event loop
+        backend = await sync_to_async(get_search_backend)()
+        queryset = backend.search(queryset, search)
+
+    try:
+        page_size = min(int(request.GET.get('page_size', settings.REST_FRAMEWORK['PAGE_SIZE'])), StudentPagination.max_page_size)
+        page = int(request.GET.get('page', 1))
+    except ValueError:
+        raise Http404
+    if page < 1 or page_size < 1:
+        raise Http404
+
+    count = await queryset.acount()
+    offset = (page - 1) * page_size
+    if offset and offset >= count:
+        raise Http404
+    rows = [row async for row in queryset.values_list(*STUDENT_ROW_FIELDS)[offset:offset + page_size]]
+
+    url = request.build_absolute_uri()
+    previous_url = None
+    if page > 1:
+        previous_url = remove_query_param(url, 'page') if page == 2 else replace_query_param(url, 'page', page - 1)
+    return json_response({
+        'count': count,
+        'next': replace_query_param(url, 'page', page + 1) if offset + page_size < count else None,
+        'previous': previous_url,
+        'results': represent_student_rows(rows, request.GET.get('fields')),
+    })
+
+
+@async_api_view
+async def student_detail(request, pk):
+    row = await Student.objects.filter(pk=pk).values_list(*STUDENT_ROW_FIELDS).afirst()
+    if row is None:
+        raise Http404
+    return json_response(represent_student_rows([row], request.GET.get('fields'))[0])
+
+
+@async_api_view
+async def student_stats(request):
+    today = timezone.now().date()
+    stats = await StudentStats.objects.filter(day=today).afirst()
+    if stats is None:
+        stats = await sync_to_async(rebuild_stats)(today)
+    return json_response(represent_stats(stats.as_dict()))
+
+
+@async_api_view(authentication_class=QueryTokenJWTAuthentication)
+async def student_events(request):
+    """Change feed for ASGI servers; same events as /students/events/"""
+    return event_stream_response(astream_changes(resume_point(request)))
@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def user_cache_key(user_id, token_version):
+    return f'auth:user:{user_id}:{token_version}'
+
+
+def forget_user(user):
+    """Drop the cached user for tokens issued against its current password"""
+    cache.delete(user_cache_key(user.pk, get_md5_hash_password(user.password)))
+
+
+def remember_saved_password(sender, instance, raw=False, using=None, update_fields=None, **kwargs):
+    """pre_save receiver for the user model: keep the stored password for forget_saved_user"""
+    if raw or instance._state.adding or (update_fields is not None and 'password' not in update_fields):
+        return
+    instance._saved_password = (
+        sender._default_manager.using(using).filter(pk=instance.pk).values_list('password', flat=True).first()
+    )
+
+
+def forget_saved_user(sender, instance, **kwargs):
+    """
+    post_save/post_delete receiver for the user model. After a password
+    change, tokens carry the old hash, so its entry is dropped as well.
+    """
+    forget_user(instance)
+    saved_password = instance.__dict__.pop('_saved_password', None)
+    if saved_password and saved_password != instance.password:
+        cache.delete(user_cache_key(instance.pk, get_md5_hash_password(saved_password)))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that keeps the resolved user in the cache for
+    AUTH_USER_CACHE_SECONDS, keyed by user id and the token's password-hash
+    claim (SIMPLE_JWT CHECK_REVOKE_TOKEN), so reads spend no query on auth.
+    """
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('Tokenda foydalanuvchi identifikatori yoʻq')
+        key = user_cache_key(user_id, validated_token.get(api_settings.REVOKE_TOKEN_CLAIM))
+        user = cache.get(key)
+        if user is None:
+            # Also rejects inactive users and tokens from before a password change
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_SECONDS)
+        return user
+
+
+class QueryTokenJWTAuthentication(CachedJWTAuthentication):
+    """
+    JWT from the Authorization header or, for EventSource, which cannot set
+    headers, from ?token=. Only used on the change feed.
+    """
+    def authenticate(self, request):
+        result = super().authenticate(request)
+        if result is not None:
+            return result
+        raw_token = request.GET.get('token')
+        if not raw_token:
+            return None
+        validated_token = self.get_validated_token(raw_token.encode())
+        return self.get_user(validated_token), validated_token
@@ -0,0 +1,92 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework.response import Response
+
+from .routers import REPLICA_ALIAS, reads_from_replica
+
+
+VERSION_KEY = 'students:version'
+MODIFIED_KEY = 'students:modified'
+ROW_CACHE_ALIAS = 'student_rows'
+
+
+def get_version():
+    """Current data version; every cached response is keyed by it"""
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        # Seed from the clock so an evicted counter never reuses an old value
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+        cache.add(MODIFIED_KEY, int(time.time()), timeout=None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def _bump():
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+    cache.set(MODIFIED_KEY, int(time.time()), timeout=None)
+
+
+def bump_version():
+    """Invalidate every cached student response once the current transaction commits"""
+    transaction.on_commit(_bump)
+
+
+def cached_response(request, build):
+    """
+    Serve a GET from the response cache, or with 304 when the client's
+    If-None-Match / If-Modified-Since still holds. build() is only called on
+    a miss; an ETag or Last-Modified header it sets is reused for the entry.
+    """
+    version = get_version()
+    replica = reads_from_replica()
+    # Absolute URI: paginated bodies embed next/previous links with the host.
+    # The alias keeps a lagging replica's body from reaching users pinned to the primary.
+    alias = REPLICA_ALIAS if replica else 'default'
+    variant = f'{request.build_absolute_uri()}|{request.accepted_renderer.format}|{alias}'
+    key = f'students:response:{version}:{hashlib.md5(variant.encode()).hexdigest()}'
+    entry = cache.get(key)
+    if entry is None:
+        response = build()
+        if response.status_code != 200:
+            return response
+        entry = {
+            'data': response.data,
+            'etag': response.get('ETag') or f'"{version:x}-{key[-12:]}"',
+            'last_modified': response.get('Last-Modified') or http_date(cache.get(MODIFIED_KEY) or time.time()),
+        }
+        # Replica reads may lag the version bump; keep them only for the lag window
+        timeout = settings.STUDENT_REPLICA_STICKY_SECONDS if replica else settings.STUDENT_CACHE_TIMEOUT
+        cache.set(key, entry, timeout)
+
+    headers = {
+        'ETag': entry['etag'],
+        'Last-Modified': entry['last_modified'],
+        'Cache-Control': 'private, no-cache',
+    }
+    not_modified = get_conditional_response(
+        request, etag=entry['etag'], last_modified=parse_http_date_safe(entry['last_modified'])
+    )
+    if not_modified is not None:
+        for name, value in headers.items():
+            not_modified[name] = value
+        return not_modified
+    return Response(entry['data'], headers=headers)
+
+
+def row_cache():
+    """LRU cache of single-student representations (settings.CACHES['student_rows'])"""
+    return caches[ROW_CACHE_ALIAS]
+
+
+def row_cache_key(student_id, updated_at):
+    # updated_at changes on every write, so stale entries are never read again
+    return f'students:row:{student_id}:{int(updated_at.timestamp() * 1_000_000):x}'
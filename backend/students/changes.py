@@ -0,0 +1,220 @@
+import asyncio
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import StreamingHttpResponse
+
+from .cache import bump_version
+from .jsonlib import dumps
+from .models import Student, StudentChange
+from .serializers import NESTED_UPDATE_FIELDS, UPDATABLE_FIELDS, represent_cached_students
+from .stats import get_stats, represent_stats
+
+
+# Readers of the StudentChange log: the server-sent change feed (created/updated/
+# deleted events after the client's last event id, then the refreshed stats)
+# and delta sync (students written since a sync token, plus tombstones).
+
+FEED_BATCH_SIZE = 200
+KEEPALIVE_SECONDS = 15
+RETRY_MILLISECONDS = 3000
+
+
+def _camel_case(name):
+    first, *rest = name.split('_')
+    return first + ''.join(word.title() for word in rest)
+
+
+# Model field -> top-level key of the student representation it appears under
+REPRESENTATION_KEYS = {
+    **{field: _camel_case(field) for field in UPDATABLE_FIELDS},
+    **{field: block for block, fields in NESTED_UPDATE_FIELDS.items() for field in fields.values()},
+}
+
+
+def record_saved(sender, instance, created, update_fields=None, **kwargs):
+    """post_save receiver for Student"""
+    if created:
+        StudentChange.record(StudentChange.CREATED, [instance.pk])
+    else:
+        StudentChange.record(StudentChange.UPDATED, [instance.pk], update_fields)
+
+
+def record_deleted(sender, instance, **kwargs):
+    """post_delete receiver for Student; QuerySet.delete() sends it per row too"""
+    StudentChange.record(StudentChange.DELETED, [instance.pk])
+
+
+def latest_change_id():
+    return StudentChange.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def changes_pruned_since(since):
+    """True when changes after event id `since` may have been pruned from the log"""
+    first_id = StudentChange.objects.order_by('id').values_list('id', flat=True).first()
+    return first_id is not None and since < first_id - 1
+
+
+def prune_changes(before):
+    """Delete changes older than `before`, always keeping the newest so ids stay comparable"""
+    latest_id = latest_change_id()
+    deleted = StudentChange.objects.filter(created_at__lt=before, id__lt=latest_id).delete()[0]
+    if deleted:
+        # Cached delta responses for tokens behind the cutoff are no longer valid
+        bump_version()
+    return deleted
+
+
+def resume_point(request):
+    """Event id to stream after: Last-Event-ID, then ?after=, else None for the latest change"""
+    value = request.headers.get('Last-Event-ID') or request.GET.get('after')
+    try:
+        return max(int(value), 0)
+    except (TypeError, ValueError):
+        return None
+
+
+def parse_sync_token(value):
+    try:
+        return int(value) if value else None
+    except ValueError:
+        return None
+
+
+def student_delta(since=None, batch_size=500):
+    """
+    Delta sync against sync token `since` (a change id): the current
+    representation of every student written after it, the ids deleted after
+    it and the token to send next time. Without a usable token the whole
+    roster comes back with reset=True and the client replaces its copy.
+    """
+    token = latest_change_id()
+    if since is None or since > token or changes_pruned_since(since):
+        rows = Student.objects.values_list('id', 'updated_at', 'created_at', named=True)
+        return {'token': str(token), 'reset': True, 'students': represent_cached_students(list(rows)), 'deleted': []}
+
+    changed_ids = list(
+        StudentChange.objects.filter(id__gt=since, id__lte=token)
+        .order_by().values_list('student_id', flat=True).distinct()
+    )
+    rows = []
+    for start in range(0, len(changed_ids), batch_size):
+        batch = Student.objects.filter(id__in=changed_ids[start:start + batch_size])
+        rows.extend(batch.values_list('id', 'updated_at', 'created_at', named=True))
+    # Roster order, newest first, so clients can prepend what they have not seen
+    rows.sort(key=lambda row: (row.created_at, row.id), reverse=True)
+    existing = {row.id for row in rows}
+    return {
+        'token': str(token),
+        'reset': False,
+        'students': represent_cached_students(rows),
+        'deleted': sorted(student_id for student_id in changed_ids if student_id not in existing),
+    }
+
+
+def format_event(event, data, event_id=None):
+    lines = [f'id: {event_id}'] if event_id is not None else []
+    lines.append(f'event: {event}')
+    lines.append('data: ' + dumps(data).decode())
+    return '\n'.join(lines) + '\n\n'
+
+
+def read_changes(after, limit=FEED_BATCH_SIZE):
+    """
+    (last id, SSE text) for up to limit changes after event id `after`.
+    Created events carry the student's current representation, updated ones
+    only the top-level keys the write touched, deleted ones just the id.
+    """
+    changes = list(
+        StudentChange.objects.filter(id__gt=after).values_list('id', 'student_id', 'action', 'fields')[:limit]
+    )
+    if not changes:
+        return after, ''
+
+    live_ids = {student_id for _, student_id, action, _ in changes if action != StudentChange.DELETED}
+    rows = Student.objects.filter(id__in=live_ids).values_list('id', 'updated_at', 'created_at', named=True)
+    current = {item['id']: item for item in represent_cached_students(list(rows))}
+
+    events = []
+    for event_id, student_id, action, fields in changes:
+        if action == StudentChange.DELETED:
+            events.append(format_event(action, {'id': student_id}, event_id))
+            continue
+        item = current.get(student_id)
+        if item is None:
+            # Deleted since; its own deleted event comes later
+            continue
+        if action == StudentChange.UPDATED and fields is not None:
+            keys = {REPRESENTATION_KEYS[field] for field in fields if field in REPRESENTATION_KEYS}
+            if not keys:
+                continue
+            item = {'id': student_id, **{key: item[key] for key in sorted(keys)}}
+        events.append(format_event(action, item, event_id))
+
+    last_id = changes[-1][0]
+    # Carries the batch's last id, so a reconnect never replays skipped events
+    events.append(format_event('stats', represent_stats(get_stats()), last_id))
+    return last_id, ''.join(events)
+
+
+def start_point(after):
+    """(event id to stream after, preamble) for a client resuming after `after`"""
+    preamble = f'retry: {RETRY_MILLISECONDS}\n\n'
+    if after is None:
+        return latest_change_id(), preamble
+    if changes_pruned_since(after):
+        # Too far behind to patch; the client reloads and continues from here
+        latest_id = latest_change_id()
+        return latest_id, preamble + format_event('reset', {}, latest_id)
+    return after, preamble
+
+
+def stream_changes(after):
+    """Sync event stream; ends after STUDENT_CHANGE_FEED_MAX_SECONDS and the browser reconnects"""
+    after, preamble = start_point(after)
+    yield preamble
+    started = quiet_since = time.monotonic()
+    while True:
+        after, chunk = read_changes(after)
+        now = time.monotonic()
+        if chunk:
+            yield chunk
+            quiet_since = now
+        elif now - quiet_since >= KEEPALIVE_SECONDS:
+            # Comment line, keeps proxies from closing an idle connection
+            yield ': keepalive\n\n'
+            quiet_since = now
+        if now - started >= settings.STUDENT_CHANGE_FEED_MAX_SECONDS:
+            return
+        if not chunk:
+            time.sleep(settings.STUDENT_CHANGE_FEED_POLL_SECONDS)
+
+
+async def astream_changes(after):
+    """stream_changes() for ASGI: the wait does not hold a thread"""
+    read = sync_to_async(read_changes)
+    after, preamble = await sync_to_async(start_point)(after)
+    yield preamble
+    started = quiet_since = time.monotonic()
+    while True:
+        after, chunk = await read(after)
+        now = time.monotonic()
+        if chunk:
+            yield chunk
+            quiet_since = now
+        elif now - quiet_since >= KEEPALIVE_SECONDS:
+            yield ': keepalive\n\n'
+            quiet_since = now
+        if now - started >= settings.STUDENT_CHANGE_FEED_MAX_SECONDS:
+            return
+        if not chunk:
+            await asyncio.sleep(settings.STUDENT_CHANGE_FEED_POLL_SECONDS)
+
+
+def event_stream_response(stream):
+    response = StreamingHttpResponse(stream, content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the stream
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,10 @@
+from django.conf import settings
+
+
+def configure_sqlite(sender, connection, **kwargs):
+    """connection_created handler applying settings.SQLITE_PRAGMAS"""
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        for name, value in getattr(settings, 'SQLITE_PRAGMAS', {}).items():
+            cursor.execute(f'PRAGMA {name} = {value}')
@@ -0,0 +1,174 @@
+import csv
+import zipfile
+from itertools import islice
+from xml.sax.saxutils import escape
+
+from .jsonlib import dumps
+from .serializers import STUDENT_ROW_FIELDS, represent_student_rows
+
+
+# StudentSerializer layout flattened to one column per leaf
+EXPORT_COLUMNS = [
+    'id', 'fullName', 'dateOfBirth', 'passportNumber', 'jshir', 'citizenship',
+    'phone', 'email', 'emergencyContactName', 'emergencyContactPhone',
+    'academic.group', 'academic.courseYear', 'academic.major', 'academic.language',
+    'visa.visaType', 'visa.visaStartDate', 'visa.visaEndDate',
+    'visa.registrationStartDate', 'visa.registrationEndDate',
+    'visa.registrationAddressType', 'visa.registrationAddressDetails',
+    'tuition.total', 'tuition.paid', 'registrationFee.total', 'registrationFee.paid',
+    'dormitory.status', 'dormitory.checkInDate', 'dormitory.plannedCheckoutDate',
+    'dormitory.actualCheckoutDate', 'dormitory.monthlyRate', 'dormitory.paidAmount',
+]
+
+
+def iter_representation_chunks(queryset, chunk_size=500):
+    """Serialized students in lists of chunk_size, so memory stays flat"""
+    rows = queryset.values_list(*STUDENT_ROW_FIELDS).iterator(chunk_size=chunk_size)
+    while chunk := list(islice(rows, chunk_size)):
+        yield represent_student_rows(chunk)
+
+
+def flatten(item):
+    """One value per EXPORT_COLUMNS entry; missing dormitory keys become None"""
+    academic, visa, dormitory = item['academic'], item['visa'], item['dormitory']
+    return [
+        item['id'], item['fullName'], item['dateOfBirth'], item['passportNumber'], item['jshir'],
+        item['citizenship'], item['phone'], item['email'], item['emergencyContactName'],
+        item['emergencyContactPhone'],
+        academic['group'], academic['courseYear'], academic['major'], academic['language'],
+        visa['visaType'], visa['visaStartDate'], visa['visaEndDate'],
+        visa['registrationStartDate'], visa['registrationEndDate'],
+        visa['registrationAddressType'], visa['registrationAddressDetails'],
+        item['tuition']['total'], item['tuition']['paid'],
+        item['registrationFee']['total'], item['registrationFee']['paid'],
+        dormitory['status'], dormitory.get('checkInDate'), dormitory.get('plannedCheckoutDate'),
+        dormitory.get('actualCheckoutDate'), dormitory.get('monthlyRate'), dormitory.get('paidAmount'),
+    ]
+
+
+class _Echo:
+    """File-like object whose write() returns the data, for csv.writer"""
+    def write(self, value):
+        return value
+
+
+def stream_csv(queryset, chunk_size=500):
+    writer = csv.writer(_Echo())
+    # BOM so Excel opens the UTF-8 names correctly
+    yield '\ufeff' + writer.writerow(EXPORT_COLUMNS)
+    for chunk in iter_representation_chunks(queryset, chunk_size):
+        yield ''.join(
+            writer.writerow(['' if value is None else value for value in flatten(item)])
+            for item in chunk
+        )
+
+
+def stream_ndjson(queryset, chunk_size=500):
+    for chunk in iter_representation_chunks(queryset, chunk_size):
+        yield b''.join(dumps(item) + b'\n' for item in chunk)
+
+
+class _ChunkBuffer:
+    """Write-only, non-seekable sink for ZipFile, drained by the generator"""
+    def __init__(self):
+        self.chunks = []
+        self.pending = 0
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.pending += len(data)
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        self.pending = 0
+        return data
+
+
+XLSX_STATIC_PARTS = {
+    '[Content_Types].xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '</Types>'
+    ),
+    '_rels/.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    'xl/workbook.xml': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Talabalar" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    'xl/_rels/workbook.xml.rels': (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        '</Relationships>'
+    ),
+}
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if value is None or value == '':
+            cells.append('<c/>')
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            cells.append(f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>')
+    return f'<row>{"".join(cells)}</row>'
+
+
+def stream_xlsx(queryset, chunk_size=500):
+    """Minimal single-sheet workbook with inline strings, zipped as it is written"""
+    buffer = _ChunkBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, content in XLSX_STATIC_PARTS.items():
+            archive.writestr(name, content)
+        yield buffer.drain()
+
+        with archive.open('xl/worksheets/sheet1.xml', 'w', force_zip64=True) as sheet:
+            sheet.write(
+                b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+            )
+            sheet.write(_xlsx_row(EXPORT_COLUMNS).encode())
+            for chunk in iter_representation_chunks(queryset, chunk_size):
+                sheet.write(''.join(_xlsx_row(flatten(item)) for item in chunk).encode())
+                if buffer.pending >= 64 * 1024:
+                    yield buffer.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    # Closing the archive writes the central directory
+    yield buffer.drain()
+
+
+EXPORT_FORMATS = {
+    'csv': (stream_csv, 'text/csv; charset=utf-8'),
+    'ndjson': (stream_ndjson, 'application/x-ndjson; charset=utf-8'),
+    'xlsx': (stream_xlsx, 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
@@ -0,0 +1,72 @@
+import re
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, IntegerField, Max
+from django.db.models.functions import Cast, Substr
+
+from .models import IdSequence, Student
+
+
+STUDENT_ID_PREFIX = 'STU-'
+STUDENT_ID_RE = re.compile(rf'{STUDENT_ID_PREFIX}([0-9]+)')
+
+
+def format_student_id(number):
+    return f'{STUDENT_ID_PREFIX}{number:03d}'
+
+
+def largest_student_number():
+    """Numerically largest STU-NNN suffix in the table (a string sort puts STU-999 after STU-1000)"""
+    return Student.objects.filter(id__regex=rf'^{STUDENT_ID_PREFIX}[0-9]+$').aggregate(
+        last=Max(Cast(Substr('id', len(STUDENT_ID_PREFIX) + 1), IntegerField()))
+    )['last'] or 0
+
+
+def reserve_numbers(name, count, initial=lambda: 0):
+    """
+    Reserve count consecutive numbers from the named sequence. The UPDATE
+    runs first so it takes the row lock (the write lock on SQLite) before
+    anything is read; concurrent callers queue behind it and never see the
+    same value.
+    """
+    if count < 1:
+        return range(0)
+    with transaction.atomic():
+        sequences = IdSequence.objects.filter(name=name)
+        if not sequences.update(last_value=F('last_value') + count):
+            try:
+                with transaction.atomic():
+                    IdSequence.objects.create(name=name, last_value=initial() + count)
+            except IntegrityError:
+                # Another caller created the row first
+                sequences.update(last_value=F('last_value') + count)
+        last = sequences.values_list('last_value', flat=True).get()
+    return range(last - count + 1, last + 1)
+
+
+def allocate_student_ids(count=1):
+    """Reserve count consecutive STU-NNN ids"""
+    numbers = reserve_numbers(STUDENT_ID_PREFIX, count, initial=largest_student_number)
+    return [format_student_id(number) for number in numbers]
+
+
+def advance_student_ids(student_ids):
+    """
+    Move the STU- sequence up to the largest explicitly written STU-NNN id
+    so the allocator never hands it out again. Call in the writer's
+    transaction, before the insert.
+    """
+    numbers = [int(match.group(1)) for match in map(STUDENT_ID_RE.fullmatch, student_ids) if match]
+    if not numbers:
+        return
+    highest = max(numbers)
+    with transaction.atomic():
+        sequences = IdSequence.objects.filter(name=STUDENT_ID_PREFIX)
+        if sequences.filter(last_value__lt=highest).update(last_value=highest) or sequences.exists():
+            return
+        try:
+            with transaction.atomic():
+                IdSequence.objects.create(name=STUDENT_ID_PREFIX, last_value=max(highest, largest_student_number()))
+        except IntegrityError:
+            # Another writer created the row first
+            sequences.filter(last_value__lt=highest).update(last_value=highest)
@@ -0,0 +1,264 @@
+import csv
+import io
+import json
+import zipfile
+from datetime import date, timedelta
+from xml.etree import ElementTree
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.utils import timezone
+
+from .ids import allocate_student_ids
+from .models import Student
+from .serializers import nested_student_fields
+
+
+IMPORT_FORMATS = ['json', 'csv', 'xlsx']
+
+# Copied onto an existing student when upserting by passport number
+UPSERT_FIELDS = [
+    field.name for field in Student._meta.concrete_fields
+    if field.editable and field.name not in ('id', 'passport_number', 'created_at', 'updated_at')
+]
+
+XLSX_NS = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+XLSX_REL_NS = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+PACKAGE_REL_NS = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+EXCEL_EPOCH = date(1899, 12, 30)
+
+
+class ImportFileError(ValueError):
+    pass
+
+
+def read_import_file(file, file_format):
+    """Student payloads (frontend shape) from an uploaded JSON, CSV or XLSX file"""
+    if file_format == 'json':
+        try:
+            data = json.load(file)
+        except ValueError as e:
+            raise ImportFileError(f'JSON oʻqib boʻlmadi: {e}')
+        if isinstance(data, dict):
+            data = data.get('students')
+        if not isinstance(data, list):
+            raise ImportFileError('JSON talabalar roʻyxati boʻlishi kerak')
+        return data
+    if file_format == 'csv':
+        text = io.TextIOWrapper(file, encoding='utf-8-sig', newline='')
+        return [unflatten(row) for row in csv.DictReader(text)]
+    if file_format == 'xlsx':
+        try:
+            return [unflatten(row) for row in read_xlsx_rows(file)]
+        except (zipfile.BadZipFile, KeyError, ElementTree.ParseError) as e:
+            raise ImportFileError(f'XLSX oʻqib boʻlmadi: {e}')
+    raise ImportFileError(f'Format {", ".join(IMPORT_FORMATS)} dan biri boʻlishi kerak')
+
+
+def unflatten(row):
+    """{'academic.group': 'CS-1'} -> {'academic': {'group': 'CS-1'}}; empty cells are dropped"""
+    payload = {}
+    for column, value in row.items():
+        if column is None or value is None or value == '':
+            continue
+        target = payload
+        *parents, key = column.strip().split('.')
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[key] = value
+    return payload
+
+
+def read_xlsx_rows(file):
+    """Rows of the first worksheet as dicts keyed by the header row"""
+    with zipfile.ZipFile(file) as archive:
+        shared_strings = []
+        if 'xl/sharedStrings.xml' in archive.namelist():
+            root = ElementTree.fromstring(archive.read('xl/sharedStrings.xml'))
+            for item in root.iter(f'{XLSX_NS}si'):
+                shared_strings.append(''.join(text.text or '' for text in item.iter(f'{XLSX_NS}t')))
+
+        workbook = ElementTree.fromstring(archive.read('xl/workbook.xml'))
+        relation_id = workbook.find(f'{XLSX_NS}sheets/{XLSX_NS}sheet').get(f'{XLSX_REL_NS}id')
+        relations = ElementTree.fromstring(archive.read('xl/_rels/workbook.xml.rels'))
+        target = next(
+            rel.get('Target') for rel in relations.iter(f'{PACKAGE_REL_NS}Relationship')
+            if rel.get('Id') == relation_id
+        )
+        sheet_path = target.lstrip('/') if target.startswith('/') else f'xl/{target}'
+
+        header = None
+        with archive.open(sheet_path) as sheet:
+            for _, element in ElementTree.iterparse(sheet):
+                if element.tag != f'{XLSX_NS}row':
+                    continue
+                values = _xlsx_row_values(element, shared_strings)
+                element.clear()
+                if header is None:
+                    header = [str(value or '') for value in values]
+                    continue
+                row = dict(zip(header, values))
+                for column, value in row.items():
+                    # Date cells are stored as day serials; the header says which ones are dates
+                    if column.endswith(('Date', 'dateOfBirth')) and isinstance(value, (int, float)):
+                        row[column] = (EXCEL_EPOCH + timedelta(days=int(value))).isoformat()
+                yield row
+
+
+def _xlsx_row_values(row, shared_strings):
+    values = []
+    for cell in row.iter(f'{XLSX_NS}c'):
+        reference = cell.get('r')
+        if reference:
+            letters = ''.join(char for char in reference if char.isalpha())
+            position = 0
+            for char in letters:
+                position = position * 26 + ord(char.upper()) - 64
+            values.extend([None] * (position - 1 - len(values)))
+
+        cell_type = cell.get('t')
+        if cell_type == 'inlineStr':
+            value = ''.join(text.text or '' for text in cell.iter(f'{XLSX_NS}t'))
+        else:
+            raw = cell.findtext(f'{XLSX_NS}v')
+            if raw is None:
+                value = None
+            elif cell_type == 's':
+                value = shared_strings[int(raw)]
+            elif cell_type in ('str', 'e'):
+                value = raw
+            elif cell_type == 'b':
+                value = raw == '1'
+            else:
+                number = float(raw)
+                value = int(number) if number.is_integer() else number
+        values.append(value)
+    return values
+
+
+def student_from_payload(payload):
+    student_id = payload.get('id')
+    return Student(
+        id=str(student_id) if student_id not in (None, '', 'NEW') else '',
+        full_name=payload.get('fullName', ''),
+        date_of_birth=payload.get('dateOfBirth'),
+        passport_number=str(payload.get('passportNumber', '')),
+        jshir=payload.get('jshir'),
+        citizenship=payload.get('citizenship', ''),
+        phone=payload.get('phone'),
+        email=payload.get('email'),
+        emergency_contact_name=payload.get('emergencyContactName'),
+        emergency_contact_phone=payload.get('emergencyContactPhone'),
+        **nested_student_fields(payload)
+    )
+
+
+def import_students(payloads, upsert=False, partial=False, dry_run=False, batch_size=1000):
+    """
+    Validate and import student payloads. Rows are numbered from 1 in the
+    returned errors. Unless partial=True nothing is written when any row fails.
+    """
+    errors = []
+    candidates = []
+    seen_passports = {}
+    seen_ids = {}
+
+    for row_number, payload in enumerate(payloads, start=1):
+        if not isinstance(payload, dict):
+            errors.append({'row': row_number, 'errors': {'__all__': ['Qator obyekt boʻlishi kerak']}})
+            continue
+        try:
+            student = student_from_payload(payload)
+            # A blank id is allocated on import; a supplied one is checked like any field
+            student.full_clean(exclude=[] if student.id else ['id'], validate_unique=False)
+        except ValidationError as e:
+            errors.append({
+                'row': row_number,
+                'passportNumber': payload.get('passportNumber'),
+                'errors': e.message_dict if hasattr(e, 'error_dict') else {'__all__': e.messages},
+            })
+            continue
+        except (TypeError, AttributeError) as e:
+            errors.append({'row': row_number, 'errors': {'__all__': [str(e)]}})
+            continue
+
+        if student.passport_number in seen_passports:
+            errors.append({
+                'row': row_number,
+                'passportNumber': student.passport_number,
+                'errors': {'passport_number': [f'{seen_passports[student.passport_number]}-qatorda takrorlangan']},
+            })
+            continue
+        if student.id and student.id in seen_ids:
+            errors.append({
+                'row': row_number,
+                'passportNumber': student.passport_number,
+                'errors': {'id': [f'{seen_ids[student.id]}-qatorda takrorlangan']},
+            })
+            continue
+        seen_passports[student.passport_number] = row_number
+        if student.id:
+            seen_ids[student.id] = row_number
+        candidates.append((row_number, student))
+
+    # Existing rows, looked up in batches rather than one query per row
+    existing_by_passport = {}
+    existing_ids = set()
+    for start in range(0, len(candidates), batch_size):
+        batch = [student for _, student in candidates[start:start + batch_size]]
+        existing_by_passport.update(
+            Student.objects.in_bulk([student.passport_number for student in batch], field_name='passport_number')
+        )
+        existing_ids.update(
+            Student.objects.filter(id__in=[student.id for student in batch if student.id])
+            .values_list('id', flat=True)
+        )
+
+    to_create, to_update = [], []
+    for row_number, student in candidates:
+        existing = existing_by_passport.get(student.passport_number)
+        if existing is None:
+            if student.id and student.id in existing_ids:
+                errors.append({
+                    'row': row_number,
+                    'passportNumber': student.passport_number,
+                    'errors': {'id': [f'{student.id} ID boshqa talabaga tegishli']},
+                })
+                continue
+            to_create.append(student)
+        elif not upsert:
+            errors.append({
+                'row': row_number,
+                'passportNumber': student.passport_number,
+                'errors': {'passport_number': ['Bu pasport raqamli talaba allaqachon mavjud']},
+            })
+        else:
+            for name in UPSERT_FIELDS:
+                setattr(existing, name, getattr(student, name))
+            to_update.append(existing)
+
+    errors.sort(key=lambda error: error['row'])
+    result = {
+        'created': 0,
+        'updated': 0,
+        'errors': errors,
+        'dryRun': dry_run,
+    }
+    if dry_run or (errors and not partial):
+        return result
+
+    with transaction.atomic():
+        new_ids = iter(allocate_student_ids(sum(1 for student in to_create if not student.id)))
+        for student in to_create:
+            if not student.id:
+                student.id = next(new_ids)
+        Student.objects.bulk_create(to_create, batch_size=batch_size)
+
+        now = timezone.now()
+        for student in to_update:
+            student.updated_at = now
+        Student.objects.bulk_update(to_update, UPSERT_FIELDS + ['updated_at'], batch_size=batch_size)
+
+    result['created'] = len(to_create)
+    result['updated'] = len(to_update)
+    return result
@@ -0,0 +1,42 @@
+import json
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# JSON encoding for API responses: orjson when installed (settings.API_JSON_LIBRARY
+# 'auto' or 'orjson'), otherwise the stdlib. Both decode to the same document,
+# but the bytes are not guaranteed equal: orjson writes 1e16 and 1e-7 where
+# json writes 1e+16 and 1e-07. ETags come from data versions, never from bodies.
+
+# Datetimes go through DRF's encoder, which shortens microseconds and writes Z
+ORJSON_OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS if orjson else 0
+
+_encoder = JSONEncoder()
+
+
+def use_orjson():
+    library = settings.API_JSON_LIBRARY
+    if library == 'orjson' and orjson is None:
+        raise ImproperlyConfigured('API_JSON_LIBRARY=orjson, lekin orjson oʻrnatilmagan (pip install orjson)')
+    return orjson is not None and library in ('auto', 'orjson')
+
+
+def dumps(data):
+    """Compact UTF-8 JSON bytes decoding to the same document as DRF's JSONRenderer output"""
+    if use_orjson():
+        body = orjson.dumps(data, default=_encoder.default, option=ORJSON_OPTIONS)
+    else:
+        body = json.dumps(data, cls=JSONEncoder, ensure_ascii=False, allow_nan=False, separators=(',', ':')).encode()
+    # Like DRF: these two are valid JSON but end a line in JavaScript
+    return body.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+def loads(body):
+    return orjson.loads(body) if use_orjson() else json.loads(body)
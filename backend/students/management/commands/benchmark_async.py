@@ -0,0 +1,142 @@
+import asyncio
+import random
+import secrets
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.test import AsyncClient, Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from students.models import Student
+from students.synthetic import generate_students
+
+
+LOADTEST_USERNAME = 'loadtest'
+LOADTEST_ID_PREFIX = 'LOAD'
+
+
+class Command(BaseCommand):
+    help = (
+        'Load-tests the read endpoints in-process: the sync DRF views on a fixed pool of '
+        'WSGI worker threads against the async views on one event loop, at several client counts'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', default='100,1000', help='Comma-separated concurrent client counts')
+        parser.add_argument('--requests', type=int, default=3000, help='Requests per run')
+        parser.add_argument('--threads', type=int, default=32, help='WSGI worker threads')
+        parser.add_argument('--rows', type=int, default=0, help='Synthetic students to add for the run')
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            client_counts = [int(value) for value in options['clients'].split(',')]
+        except ValueError:
+            raise CommandError('--clients vergul bilan ajratilgan sonlar boʻlishi kerak')
+
+        # A fresh throwaway account, so a real user called loadtest is left alone
+        user = User.objects.create_user(f'{LOADTEST_USERNAME}-{secrets.token_hex(4)}')
+        token = f'Bearer {RefreshToken.for_user(user).access_token}'
+        try:
+            # bulk_create and the queryset delete below keep StudentStats in step
+            if options['rows']:
+                Student.objects.bulk_create(
+                    generate_students(options['rows'], seed=options['seed'], id_prefix=LOADTEST_ID_PREFIX),
+                    batch_size=1000,
+                )
+            ids = list(Student.objects.values_list('id', flat=True)[:1000])
+            if not ids:
+                raise CommandError('Bazada talaba yoʻq, --rows bering')
+            # Response caching would answer everything after the first request
+            with override_settings(STUDENT_CACHE_TIMEOUT=0):
+                for clients in client_counts:
+                    random.seed(options['seed'])
+                    paths = self.make_paths(ids, options['requests'])
+                    sync_result = self.run_sync(paths, clients, options['threads'], token)
+                    async_result = asyncio.run(self.run_async(paths, clients, token))
+                    self.report(clients, 'WSGI (sync)', sync_result)
+                    self.report(clients, 'ASGI (async)', async_result)
+        finally:
+            Student.objects.filter(id__startswith=f'{LOADTEST_ID_PREFIX}-').delete()
+            user.delete()
+
+    def make_paths(self, ids, count):
+        """Dashboard-like mix of list pages, detail views, searches and stats"""
+        paths = []
+        for _ in range(count):
+            kind = random.random()
+            if kind < 0.5:
+                paths.append(f'students/?page={random.randint(1, 5)}&page_size=20')
+            elif kind < 0.8:
+                paths.append(f'students/{random.choice(ids)}/')
+            elif kind < 0.9:
+                paths.append(f'students/?search={random.choice(["ali", "cs", "uzbek", "stu"])}')
+            else:
+                paths.append('students/stats/')
+        return paths
+
+    def run_sync(self, paths, clients, threads, token):
+        local = threading.local()
+        executor = ThreadPoolExecutor(max_workers=threads)
+
+        def request(path):
+            if not hasattr(local, 'client'):
+                local.client = Client(HTTP_AUTHORIZATION=token)
+            return local.client.get(f'/api/{path}').status_code
+
+        async def drive():
+            loop = asyncio.get_running_loop()
+            # Requests beyond the pool size queue up, as on a threaded WSGI server
+            return await self.drive_clients(
+                paths, clients, lambda path: loop.run_in_executor(executor, request, path)
+            )
+
+        try:
+            return asyncio.run(drive())
+        finally:
+            executor.submit(connections.close_all).result()
+            executor.shutdown()
+
+    async def run_async(self, paths, clients, token):
+        client = AsyncClient()
+        headers = {'Authorization': token}
+
+        async def request(path):
+            response = await client.get(f'/api/async/{path}', headers=headers)
+            return response.status_code
+
+        return await self.drive_clients(paths, clients, request)
+
+    async def drive_clients(self, paths, clients, send):
+        """clients coroutines share the request list, each waiting for its previous response"""
+        queue = list(reversed(paths))
+        latencies, errors = [], 0
+
+        async def client():
+            nonlocal errors
+            while queue:
+                path = queue.pop()
+                started = time.perf_counter()
+                status = await send(path)
+                latencies.append(time.perf_counter() - started)
+                errors += status != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*(client() for _ in range(clients)))
+        return time.perf_counter() - started, latencies, errors
+
+    def report(self, clients, label, result):
+        elapsed, latencies, errors = result
+        if not latencies:
+            self.stdout.write(f'{clients:>5} mijoz  {label:<13} hech bir soʻrov tugamadi')
+            return
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+        self.stdout.write(
+            f'{clients:>5} mijoz  {label:<13} {len(latencies) / elapsed:8.1f} soʻrov/s  '
+            f'p50 {statistics.median(latencies) * 1000:7.1f} ms  p95 {p95:7.1f} ms  xato {errors}'
+        )
@@ -0,0 +1,83 @@
+import time
+from datetime import timedelta
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+from students.models import Student
+from students.synthetic import generate_students
+
+
+class Command(BaseCommand):
+    help = (
+        'Shows query plans and timings of the hot Student queries with and without '
+        'the secondary indexes on a synthetic dataset. Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=100000)
+        parser.add_argument('--repeat', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self.stdout.write(f'{options["rows"]} ta sintetik talaba qoʻshilmoqda...')
+            students = generate_students(options['rows'], seed=options['seed'])
+            while batch := list(islice(students, 5000)):
+                Student.objects.bulk_create(batch)
+            self.analyze()
+
+            with_indexes = self.run_queries(options['repeat'])
+            self.drop_secondary_indexes()
+            self.analyze()
+            without_indexes = self.run_queries(options['repeat'])
+
+            self.stdout.write('\n=== Natijalar (ms, bitta soʻrov) ===')
+            for name in with_indexes:
+                before_ms, before_plan = without_indexes[name]
+                after_ms, after_plan = with_indexes[name]
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n{name}: {before_ms:.2f} -> {after_ms:.2f}'))
+                self.stdout.write(f'  indekssiz:  {before_plan}')
+                self.stdout.write(f'  indeks bilan: {after_plan}')
+
+            transaction.set_rollback(True)
+
+    def hot_queries(self):
+        today = timezone.now().date()
+        return {
+            'list (-created_at)': Student.objects.order_by('-created_at', '-id')[:10],
+            'dormitory residents': Student.objects.filter(~Q(dormitory_status='None')).order_by('-created_at')[:10],
+            'group + course_year': Student.objects.filter(group='CO-24-1', course_year=2),
+            'citizenship': Student.objects.filter(citizenship='China')[:10],
+            'expiring registrations': Student.objects.filter(
+                registration_end_date__isnull=False,
+                registration_end_date__lte=today + timedelta(days=10),
+            ).order_by('registration_end_date')[:10],
+            'expiring visas': Student.objects.filter(visa_end_date__isnull=False).order_by('visa_end_date')[:10],
+            'top debtors': Student.objects.debtors()[:10],
+        }
+
+    def run_queries(self, repeat):
+        results = {}
+        for name, queryset in self.hot_queries().items():
+            plan = ' | '.join(line.strip() for line in queryset.explain().splitlines())
+            started = time.perf_counter()
+            for _ in range(repeat):
+                list(queryset.all())
+            results[name] = ((time.perf_counter() - started) * 1000 / repeat, plan)
+        return results
+
+    def drop_secondary_indexes(self):
+        """Leave only the primary key and unique passport_number, as in 0001_initial"""
+        table = Student._meta.db_table
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, table)
+            for name, info in constraints.items():
+                if info['index'] and not info['primary_key'] and not info['unique']:
+                    cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
@@ -0,0 +1,69 @@
+import gzip
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from rest_framework.renderers import JSONRenderer
+from students.jsonlib import orjson
+from students.middleware import brotli
+from students.renderers import FastJSONRenderer
+from students.serializers import STUDENT_ROW_FIELDS, represent_student_rows
+from students.synthetic import generate_students
+
+
+class Command(BaseCommand):
+    help = (
+        'Measures render time and bytes on the wire for student list pages: DRF JSONRenderer '
+        'against FastJSONRenderer, raw against gzip and brotli. Needs no database.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', default='1000,10000', help='Comma-separated list sizes')
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        try:
+            sizes = [int(value) for value in options['rows'].split(',')]
+        except ValueError:
+            raise CommandError('--rows vergul bilan ajratilgan sonlar boʻlishi kerak')
+
+        for rows in sizes:
+            students = generate_students(rows, seed=options['seed'])
+            data = represent_student_rows(
+                tuple(getattr(student, name) for name in STUDENT_ROW_FIELDS) for student in students
+            )
+
+            body = JSONRenderer().render(data)
+            self.stdout.write(f'{rows} ta talaba, {len(body) / 1024:.0f} KB JSON')
+            self.report('DRF JSONRenderer', self.measure(lambda: JSONRenderer().render(data), options['repeat']))
+            if orjson is None:
+                self.stdout.write('  orjson oʻrnatilmagan, FastJSONRenderer stdlib bilan ishlaydi')
+            with override_settings(API_JSON_LIBRARY='auto'):
+                # Same document; float exponents may be spelled differently
+                if json.loads(FastJSONRenderer().render(data)) != json.loads(body):
+                    raise CommandError('FastJSONRenderer DRF bilan bir xil JSON bermadi')
+                self.report('FastJSONRenderer', self.measure(lambda: FastJSONRenderer().render(data), options['repeat']))
+
+            self.report_encoding('gzip', body, lambda: gzip.compress(body, compresslevel=6, mtime=0), options['repeat'])
+            if brotli is None:
+                self.stdout.write('  brotli oʻrnatilmagan')
+            else:
+                self.report_encoding('brotli', body, lambda: brotli.compress(body, quality=5), options['repeat'])
+
+    def report(self, label, seconds):
+        self.stdout.write(f'  {label:<18} {seconds * 1000:8.1f} ms')
+
+    def report_encoding(self, label, body, compress, repeat):
+        seconds = self.measure(compress, repeat)
+        size = len(compress())
+        self.stdout.write(
+            f'  {label:<18} {seconds * 1000:8.1f} ms  {size / 1024:8.0f} KB  ({len(body) / size:.1f}x kichik)'
+        )
+
+    def measure(self, work, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            work()
+        return (time.perf_counter() - started) / repeat
@@ -0,0 +1,55 @@
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from students.models import Student
+from students.search import IcontainsSearch, get_search_backend
+from students.synthetic import generate_students
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares the configured search backend with the ORed icontains filter on '
+        'growing synthetic datasets. Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000', help='Comma-separated row counts')
+        parser.add_argument('--terms', default='Student 4217,SYN-031337,China,Comp,nomatch', help='Comma-separated search terms')
+        parser.add_argument('--repeat', type=int, default=10)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        backend = get_search_backend()
+        if type(backend) is IcontainsSearch:
+            raise CommandError('Indeksli qidiruv mavjud emas (STUDENT_SEARCH_BACKEND va migratsiyalarni tekshiring)')
+        baseline = IcontainsSearch()
+        sizes = sorted(int(size) for size in options['sizes'].split(','))
+        terms = [term for term in options['terms'].split(',') if term]
+
+        with transaction.atomic():
+            students = generate_students(sizes[-1], seed=options['seed'])
+            loaded = 0
+            for size in sizes:
+                while loaded < size and (batch := list(islice(students, min(5000, size - loaded)))):
+                    Student.objects.bulk_create(batch)
+                    loaded += len(batch)
+
+                self.stdout.write(self.style.MIGRATE_HEADING(f'\n{loaded} ta talaba (ms, COUNT + birinchi sahifa, /students/?search= kabi)'))
+                for term in terms:
+                    icontains_ms = self.measure(baseline, term, options['repeat'])
+                    backend_ms = self.measure(backend, term, options['repeat'])
+                    self.stdout.write(
+                        f'  {term!r:16} icontains={icontains_ms:8.2f}  {backend.name}={backend_ms:8.2f}'
+                    )
+
+            transaction.set_rollback(True)
+
+    def measure(self, backend, term, repeat):
+        queryset = backend.search(Student.objects.all(), term)
+        started = time.perf_counter()
+        for _ in range(repeat):
+            queryset.count()
+            list(queryset[:10])
+        return (time.perf_counter() - started) * 1000 / repeat
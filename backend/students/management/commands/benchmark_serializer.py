@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+from students.models import Student
+from students.serializers import STUDENT_ROW_FIELDS, StudentSerializer, represent_student_rows
+from students.synthetic import generate_students
+
+
+class Command(BaseCommand):
+    help = (
+        'Compares StudentSerializer with the values_list fast path (rows/second) '
+        'and checks that both render identical JSON. Everything is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=5)
+        parser.add_argument('--seed', type=int, default=42)
+
+    def handle(self, *args, **options):
+        rows, repeat = options['rows'], options['repeat']
+        renderer = JSONRenderer()
+
+        with transaction.atomic():
+            Student.objects.bulk_create(generate_students(rows, seed=options['seed']), batch_size=500)
+            queryset = Student.objects.all()
+
+            slow = renderer.render(StudentSerializer(queryset, many=True).data)
+            fast = renderer.render(represent_student_rows(queryset.values_list(*STUDENT_ROW_FIELDS)))
+            if slow != fast:
+                raise CommandError('Tezkor yoʻl StudentSerializer bilan bir xil JSON bermadi')
+
+            serializer_seconds = self.measure(
+                lambda: StudentSerializer(queryset.all(), many=True).data, repeat
+            )
+            fast_seconds = self.measure(
+                lambda: represent_student_rows(queryset.values_list(*STUDENT_ROW_FIELDS)), repeat
+            )
+
+            self.stdout.write(f'{rows} ta talaba, JSON bir xil ({len(fast)} bayt)')
+            self.stdout.write(f'  StudentSerializer: {rows / serializer_seconds:10.0f} qator/s')
+            self.stdout.write(f'  values_list yoʻli: {rows / fast_seconds:10.0f} qator/s')
+            self.stdout.write(self.style.SUCCESS(f'  tezlanish: {serializer_seconds / fast_seconds:.1f}x'))
+
+            transaction.set_rollback(True)
+
+    def measure(self, serialize, repeat):
+        started = time.perf_counter()
+        for _ in range(repeat):
+            serialize()
+        return (time.perf_counter() - started) / repeat
@@ -1,12 +1,26 @@
-from django.core.management.base import BaseCommand
+import time
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
 from django.contrib.auth.models import User
+from django.db import transaction
+from students.ids import allocate_student_ids
 from students.models import Student
+from students.synthetic import generate_students
 from datetime import datetime, timedelta
 from decimal import Decimal
 
 
 class Command(BaseCommand):
-    help = 'Creates demo user and sample student data'
+    help = (
+        'Creates demo user and sample student data. With --count, adds that many '
+        'synthetic students (deterministic for a --seed) for capacity testing.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--count', type=int, default=0, help='Synthetic students to add')
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--batch-size', type=int, default=5000, help='Students per transaction')
 
     def handle(self, *args, **options):
         # Create demo user
@@ -21,6 +35,10 @@ class Command(BaseCommand):
         else:
             self.stdout.write(self.style.WARNING(f'Foydalanuvchi "{username}" allaqachon mavjud'))
 
+        if options['count']:
+            self.create_synthetic(options['count'], options['seed'], options['batch_size'])
+            return
+
         # Create sample students if none exist
         if Student.objects.count() == 0:
             today = datetime.now().date()
@@ -128,3 +146,22 @@ class Command(BaseCommand):
             )
         else:
             self.stdout.write(self.style.WARNING('Talabalar allaqachon mavjud'))
+
+    def create_synthetic(self, count, seed, batch_size):
+        if count < 0 or batch_size < 1:
+            raise CommandError('--count va --batch-size musbat boʻlishi kerak')
+        # One sequence reservation for every id instead of one per student
+        students = generate_students(count, seed=seed, ids=allocate_student_ids(count))
+        created = 0
+        started = time.perf_counter()
+        while batch := list(islice(students, batch_size)):
+            with transaction.atomic():
+                Student.objects.bulk_insert(batch)
+            created += len(batch)
+            elapsed = time.perf_counter() - started
+            self.stdout.write(f'  {created}/{count}  {created / elapsed:.0f} qator/s')
+
+        elapsed = time.perf_counter() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{created} ta sintetik talaba {elapsed:.1f} s da yaratildi ({created / elapsed:.0f} qator/s)'
+        ))
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from students.importer import IMPORT_FORMATS, ImportFileError, import_students, read_import_file
+
+
+class Command(BaseCommand):
+    help = 'Imports a student roster from a JSON, CSV or XLSX file (the export formats are accepted as-is)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Roster file; the format is taken from the extension')
+        parser.add_argument(
+            '--upsert',
+            action='store_true',
+            help='Update students whose passport number already exists instead of failing',
+        )
+        parser.add_argument(
+            '--partial',
+            action='store_true',
+            help='Import the valid rows even when some rows fail validation',
+        )
+        parser.add_argument('--dry-run', action='store_true', help='Validate only, write nothing')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        import_format = path.suffix.lstrip('.').lower()
+        if import_format not in IMPORT_FORMATS:
+            raise CommandError(f'Format {", ".join(IMPORT_FORMATS)} dan biri boʻlishi kerak')
+
+        try:
+            with path.open('rb') as file:
+                payloads = read_import_file(file, import_format)
+                result = import_students(
+                    payloads,
+                    upsert=options['upsert'],
+                    partial=options['partial'],
+                    dry_run=options['dry_run'],
+                    batch_size=options['batch_size'],
+                )
+        except OSError as e:
+            raise CommandError(f'Faylni ochib boʻlmadi: {e}')
+        except ImportFileError as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            messages = '; '.join(
+                f'{field}: {" ".join(field_errors)}' for field, field_errors in error['errors'].items()
+            )
+            self.stdout.write(self.style.WARNING(f'{error["row"]}-qator: {messages}'))
+
+        if result['errors'] and not (options['partial'] or options['dry_run']):
+            raise CommandError(f'{len(result["errors"])} ta qatorda xato, hech narsa import qilinmadi')
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Tekshiruv tugadi: {len(payloads)} ta qator, {len(result["errors"])} ta xato'
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Import tugadi: {result["created"]} ta yaratildi, {result["updated"]} ta yangilandi'
+        ))
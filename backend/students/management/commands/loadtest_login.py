@@ -0,0 +1,123 @@
+import random
+import secrets
+import statistics
+import threading
+import time
+from collections import Counter
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connections
+from django.test import Client, override_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from students.throttling import login_metrics
+
+
+LOADTEST_USERNAME = 'loadtest'
+
+
+class Command(BaseCommand):
+    help = (
+        'Floods custom_login with bad passwords from a few IPs while other threads read '
+        '/api/students/, first without and then with login throttling, and reports the '
+        "readers' latency and the CPU spent hashing passwords"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--seconds', type=float, default=15, help='Length of each flood')
+        parser.add_argument('--attackers', type=int, default=8, help='Threads sending logins')
+        parser.add_argument('--ips', type=int, default=4, help='Source IPs the attackers rotate through')
+        parser.add_argument('--readers', type=int, default=4, help='Threads reading the student list')
+        parser.add_argument('--baseline-seconds', type=float, default=3)
+
+    def handle(self, *args, **options):
+        # A fresh throwaway account, so a real user called loadtest is left alone
+        user = User.objects.create_user(f'{LOADTEST_USERNAME}-{secrets.token_hex(4)}')
+        self.username = user.username
+        token = f'Bearer {RefreshToken.for_user(user).access_token}'
+        try:
+            # Response caching would hide the readers' real cost
+            with override_settings(STUDENT_CACHE_TIMEOUT=0):
+                latencies = self.read_while(token, options['readers'], lambda: time.sleep(options['baseline_seconds']))
+                self.report('login yoʻq', latencies)
+                for phase, enabled in enumerate((False, True), start=1):
+                    with override_settings(LOGIN_THROTTLE_ENABLED=enabled):
+                        before = login_metrics()
+                        statuses = Counter()
+                        latencies = self.read_while(
+                            token, options['readers'], lambda: self.flood(phase, options, statuses)
+                        )
+                        after = login_metrics()
+                    label = 'cheklov bilan' if enabled else 'cheklovsiz'
+                    self.report(f'hujum, {label}', latencies)
+                    self.stdout.write(
+                        f'    login javoblari {dict(statuses)}, xeshlashga '
+                        f'{after["hash_seconds"] - before["hash_seconds"]:.1f} s CPU'
+                    )
+        finally:
+            user.delete()
+
+    def read_while(self, token, readers, work):
+        """Run work() while `readers` threads GET the student list; returns their latencies"""
+        latencies, done = [], threading.Event()
+
+        def read():
+            client = Client(HTTP_AUTHORIZATION=token)
+            try:
+                while not done.is_set():
+                    started = time.perf_counter()
+                    client.get('/api/students/?page_size=20')
+                    latencies.append(time.perf_counter() - started)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=read) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        started = time.perf_counter()
+        try:
+            work()
+        finally:
+            done.set()
+            for thread in threads:
+                thread.join()
+        self.elapsed = time.perf_counter() - started
+        return latencies
+
+    def flood(self, phase, options, statuses):
+        """Bad passwords for the real user and for made-up usernames, from a few IPs"""
+        deadline = time.monotonic() + options['seconds']
+        lock = threading.Lock()
+
+        def attack():
+            rng = random.Random()
+            try:
+                while time.monotonic() < deadline:
+                    ip = f'203.0.{phase}.{rng.randrange(options["ips"]) + 1}'
+                    username = self.username if rng.random() < 0.5 else f'user{rng.randrange(10 ** 6)}'
+                    response = Client(REMOTE_ADDR=ip).post(
+                        '/api/auth/login/',
+                        {'username': username, 'password': 'wrong-password'},
+                        content_type='application/json',
+                    )
+                    with lock:
+                        statuses[response.status_code] += 1
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=attack) for _ in range(options['attackers'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    def report(self, label, latencies):
+        if not latencies:
+            self.stdout.write(f'{label:<20} hech bir soʻrov tugamadi ({self.elapsed:.1f} s)')
+            return
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1] * 1000
+        self.stdout.write(
+            f'{label:<20} {len(latencies) / self.elapsed:7.1f} soʻrov/s  '
+            f'p50 {statistics.median(latencies) * 1000:7.1f} ms  p95 {p95:7.1f} ms  ({self.elapsed:.1f} s)'
+        )
@@ -0,0 +1,22 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from students.changes import prune_changes
+
+
+class Command(BaseCommand):
+    help = 'Deletes old StudentChange rows (run nightly); clients behind the cutoff resync from scratch'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=settings.STUDENT_CHANGE_RETENTION_DAYS,
+            help='Keep this many days of changes',
+        )
+
+    def handle(self, *args, **options):
+        deleted = prune_changes(timezone.now() - timedelta(days=options['days']))
+        self.stdout.write(self.style.SUCCESS(f'{deleted} ta eski oʻzgarish oʻchirildi'))
@@ -0,0 +1,45 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from students.models import Student, StudentStats
+from students.stats import rebuild_stats
+
+
+class Command(BaseCommand):
+    help = 'Recomputes dashboard statistics from scratch (run nightly for date-driven counters)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--check',
+            action='store_true',
+            help='Only compare the stored counters with the live aggregate, fail on drift',
+        )
+
+    def handle(self, *args, **options):
+        today = timezone.now().date()
+        live = Student.objects.dashboard_stats(today=today)
+        stored = StudentStats.objects.filter(day=today).first()
+
+        drift = {}
+        if stored is not None:
+            drift = {
+                name: (getattr(stored, name), live[name])
+                for name in StudentStats.COUNTERS
+                if getattr(stored, name) != live[name]
+            }
+            for name, (stored_value, live_value) in drift.items():
+                self.stdout.write(
+                    self.style.WARNING(f'{name}: saqlangan={stored_value}, haqiqiy={live_value}')
+                )
+
+        if options['check']:
+            if stored is None:
+                raise CommandError(f'{today} uchun statistika mavjud emas')
+            if drift:
+                raise CommandError('Statistika haqiqiy qiymatlardan farq qiladi')
+            self.stdout.write(self.style.SUCCESS('Statistika toʻgʻri'))
+            return
+
+        rebuild_stats(today)
+        self.stdout.write(
+            self.style.SUCCESS(f'{today} uchun statistika qayta hisoblandi: {live["total_students"]} ta talaba')
+        )
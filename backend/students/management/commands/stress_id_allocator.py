@@ -0,0 +1,55 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection
+from students.ids import reserve_numbers
+from students.models import IdSequence
+
+
+STRESS_SEQUENCE = 'STRESS-'
+
+
+class Command(BaseCommand):
+    help = (
+        'Reserves ids from many threads at once on a scratch sequence and fails if any '
+        'number is handed out twice or skipped'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=16)
+        parser.add_argument('--iterations', type=int, default=50, help='Reservations per thread')
+        parser.add_argument('--block', type=int, default=3, help='Numbers per reservation')
+
+    def handle(self, *args, **options):
+        threads, iterations, block = options['threads'], options['iterations'], options['block']
+        IdSequence.objects.filter(name=STRESS_SEQUENCE).delete()
+
+        def worker(_):
+            numbers = []
+            try:
+                for _ in range(iterations):
+                    reserved = reserve_numbers(STRESS_SEQUENCE, block)
+                    if len(reserved) != block:
+                        raise CommandError(f'{block} ta oʻrniga {len(reserved)} ta raqam berildi')
+                    numbers.extend(reserved)
+            finally:
+                connection.close()
+            return numbers
+
+        try:
+            with ThreadPoolExecutor(max_workers=threads) as executor:
+                results = list(executor.map(worker, range(threads)))
+        except OperationalError as e:
+            raise CommandError(f'Maʼlumotlar bazasi xatosi: {e}')
+        finally:
+            IdSequence.objects.filter(name=STRESS_SEQUENCE).delete()
+
+        numbers = [number for result in results for number in result]
+        expected = threads * iterations * block
+        if len(set(numbers)) != len(numbers):
+            raise CommandError(f'{len(numbers) - len(set(numbers))} ta raqam takror berildi')
+        if sorted(numbers) != list(range(1, expected + 1)):
+            raise CommandError('Raqamlar ketma-ket emas')
+        self.stdout.write(self.style.SUCCESS(
+            f'{threads} ta oqim {expected} ta raqamni takrorsiz oldi'
+        ))
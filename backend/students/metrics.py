@@ -0,0 +1,219 @@
+import functools
+import hmac
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.exceptions import InvalidToken
+
+from .authentication import CachedJWTAuthentication
+from .throttling import login_metrics
+
+
+# Per-request performance figures (PerformanceMiddleware) and their
+# process-wide aggregates, served in Prometheus text format by metrics_view.
+# Like login_metrics(), the aggregates are per process: scrape every worker.
+
+logger = logging.getLogger('students.performance')
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+_current = ContextVar('request_perf', default=None)
+
+
+class RequestPerf:
+    """Query count, DB time and phase times of one request"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slow_queries = 0
+        self.phases = {'serialize': 0.0, 'render': 0.0}
+        self._active = set()
+        self._selects = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # connection.execute_wrapper hook
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - started
+            self.queries += 1
+            self.db_seconds += duration
+            if sql.lstrip()[:6].upper() == 'SELECT':
+                self._selects[sql] += 1
+            if duration * 1000 >= settings.PERF_SLOW_QUERY_MS:
+                self.slow_queries += 1
+                logger.warning('Slow query (%.1f ms, %s): %s', duration * 1000, context['connection'].alias, sql)
+
+    def repeated_selects(self):
+        """SELECTs run PERF_N_PLUS_ONE_THRESHOLD or more times: one per row of some earlier result"""
+        return [(sql, count) for sql, count in self._selects.items() if count >= settings.PERF_N_PLUS_ONE_THRESHOLD]
+
+
+def timed(phase):
+    """
+    Add the decorated function's time to the current request's `phase`,
+    without the queries it ran (those are DB time) or nested timed calls.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            perf = _current.get()
+            if perf is None or phase in perf._active:
+                return func(*args, **kwargs)
+            perf._active.add(phase)
+            started, db_seconds = time.perf_counter(), perf.db_seconds
+            try:
+                return func(*args, **kwargs)
+            finally:
+                perf._active.discard(phase)
+                perf.phases[phase] += time.perf_counter() - started - (perf.db_seconds - db_seconds)
+        return wrapper
+    return decorator
+
+
+def start_request():
+    perf = RequestPerf()
+    _current.set(perf)
+    return perf
+
+
+def finish_request():
+    _current.set(None)
+
+
+def server_timing(perf, total):
+    """Server-Timing header value, durations in milliseconds"""
+    app = total - perf.db_seconds - perf.phases['serialize'] - perf.phases['render']
+    return ', '.join([
+        f'db;dur={perf.db_seconds * 1000:.1f};desc="{perf.queries} queries"',
+        f'serialize;dur={perf.phases["serialize"] * 1000:.1f}',
+        f'render;dur={perf.phases["render"] * 1000:.1f}',
+        f'app;dur={max(app, 0) * 1000:.1f}',
+        f'total;dur={total * 1000:.1f}',
+    ])
+
+
+_lock = threading.Lock()
+# (view, action, method) -> [bucket counts..., +Inf count], latency sum
+_latency = {}
+_latency_sum = Counter()
+# (view, action, method, status) -> requests
+_requests = Counter()
+# (view, action) -> totals
+_queries = Counter()
+_db_seconds = Counter()
+_phase_seconds = {'serialize': Counter(), 'render': Counter()}
+_n_plus_one = Counter()
+_slow_queries = Counter()
+
+
+def record_request(view, action, method, status, perf, total, repeated):
+    endpoint = (view, action)
+    series = (view, action, method)
+    with _lock:
+        buckets = _latency.setdefault(series, [0] * (len(LATENCY_BUCKETS) + 1))
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if total <= bound:
+                buckets[index] += 1
+                break
+        else:
+            buckets[-1] += 1
+        _latency_sum[series] += total
+        _requests[series + (str(status),)] += 1
+        _queries[endpoint] += perf.queries
+        _db_seconds[endpoint] += perf.db_seconds
+        for phase, seconds in perf.phases.items():
+            _phase_seconds[phase][endpoint] += seconds
+        _n_plus_one[endpoint] += len(repeated)
+        _slow_queries[endpoint] += perf.slow_queries
+
+
+def _labels(names, values):
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for value in values)
+    return '{' + ','.join(f'{name}="{value}"' for name, value in zip(names, escaped)) + '}'
+
+
+def _counter(lines, name, help_text, samples, names, kind='counter'):
+    lines.append(f'# HELP {name} {help_text}')
+    lines.append(f'# TYPE {name} {kind}')
+    for key, value in sorted(samples.items()):
+        lines.append(f'{name}{_labels(names, key)} {value}')
+
+
+def render_metrics():
+    """All aggregates in Prometheus text exposition format 0.0.4"""
+    with _lock:
+        latency = {series: list(buckets) for series, buckets in _latency.items()}
+        latency_sum = dict(_latency_sum)
+        requests = dict(_requests)
+        totals = [
+            ('student_api_db_queries_total', 'SQL queries run', dict(_queries)),
+            ('student_api_db_seconds_total', 'Time spent in SQL queries', dict(_db_seconds)),
+            ('student_api_serialize_seconds_total', 'Time spent building representations',
+             dict(_phase_seconds['serialize'])),
+            ('student_api_render_seconds_total', 'Time spent rendering response bodies',
+             dict(_phase_seconds['render'])),
+            ('student_api_n_plus_one_total', 'Repeated SELECTs flagged as N+1 patterns', dict(_n_plus_one)),
+            ('student_api_slow_queries_total', 'Queries slower than PERF_SLOW_QUERY_MS', dict(_slow_queries)),
+        ]
+
+    lines = []
+    name = 'student_api_request_duration_seconds'
+    lines.append(f'# HELP {name} Request latency')
+    lines.append(f'# TYPE {name} histogram')
+    names = ('view', 'action', 'method')
+    for series, buckets in sorted(latency.items()):
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), buckets):
+            cumulative += count
+            lines.append(f'{name}_bucket{_labels(names + ("le",), series + (bound,))} {cumulative}')
+        lines.append(f'{name}_sum{_labels(names, series)} {latency_sum[series]}')
+        lines.append(f'{name}_count{_labels(names, series)} {cumulative}')
+    _counter(lines, 'student_api_requests_total', 'Requests by response status', requests, names + ('status',))
+    for name, help_text, samples in totals:
+        _counter(lines, name, help_text, samples, ('view', 'action'))
+
+    login = login_metrics()
+    _counter(
+        lines, 'student_login_attempts_total', 'Login attempts by outcome',
+        {(outcome,): login[outcome] for outcome in ('succeeded', 'failed', 'throttled')}, ('outcome',),
+    )
+    _counter(
+        lines, 'student_login_hash_cpu_seconds_total', 'CPU time spent hashing login passwords',
+        {(): login['hash_seconds']}, (),
+    )
+    return '\n'.join(lines) + '\n'
+
+
+def _is_staff(request):
+    """Staff signed in to the admin (session) or sending a staff JWT"""
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_staff:
+        return True
+    try:
+        result = CachedJWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken):
+        return False
+    return result is not None and result[0].is_staff
+
+
+def metrics_view(request):
+    """
+    GET /api/metrics for Prometheus with `Authorization: Bearer <METRICS_TOKEN>`;
+    staff users may also read it. Closed to everyone else, also without a token.
+    """
+    supplied = request.headers.get('Authorization', '').removeprefix('Bearer ')
+    scraper = bool(settings.METRICS_TOKEN) and hmac.compare_digest(supplied.encode(), settings.METRICS_TOKEN.encode())
+    if not scraper and not _is_staff(request):
+        return HttpResponse('Ruxsat yoʻq\n', status=403, content_type='text/plain; charset=utf-8')
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
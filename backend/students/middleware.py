@@ -0,0 +1,112 @@
+import time
+
+from django.conf import settings
+from django.db import connections
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.deprecation import MiddlewareMixin
+from django.utils.regex_helper import _lazy_re_compile
+
+from .metrics import finish_request, logger, record_request, server_timing, start_request
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+
+re_accepts_brotli = _lazy_re_compile(r'\bbr\b')
+
+
+def compress_sequence_brotli(sequence, quality):
+    compressor = brotli.Compressor(quality=quality)
+    for item in sequence:
+        data = compressor.process(item)
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    GZipMiddleware plus Brotli (when the brotli package is installed and the
+    client sends br), skipping bodies under API_COMPRESSION_MIN_BYTES and
+    event streams: a compressor holds output back until it fills a block,
+    which would delay change feed events.
+    """
+    brotli_quality = 5
+
+    def process_response(self, request, response):
+        if response.get('Content-Type', '').startswith('text/event-stream'):
+            return response
+        if not response.streaming and len(response.content) < settings.API_COMPRESSION_MIN_BYTES:
+            return response
+        accept_encoding = request.META.get('HTTP_ACCEPT_ENCODING', '')
+        if (
+            brotli is None
+            or response.has_header('Content-Encoding')
+            or not re_accepts_brotli.search(accept_encoding)
+            or (response.streaming and response.is_async)
+        ):
+            return super().process_response(request, response)
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        if response.streaming:
+            response.streaming_content = compress_sequence_brotli(response.streaming_content, self.brotli_quality)
+            del response.headers['Content-Length']
+        else:
+            compressed_content = brotli.compress(response.content, quality=self.brotli_quality)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response.headers['Content-Length'] = str(len(response.content))
+
+        # Same as GZipMiddleware: the encoded body is a different representation
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = 'br'
+        return response
+
+
+class PerformanceMiddleware(MiddlewareMixin):
+    """
+    Counts the queries and DB time of every request (on this thread's
+    connections; a streaming body's queries run after the response and are
+    not included), adds a Server-Timing header, logs repeated SELECTs as
+    likely N+1 patterns and records the figures for /api/metrics under the
+    view name and ViewSet action.
+    """
+
+    def process_request(self, request):
+        if not settings.PERF_INSTRUMENTATION:
+            return
+        request._perf = perf = start_request()
+        request._perf_endpoint = ('unmatched', '')
+        for connection in connections.all():
+            connection.execute_wrappers.append(perf)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if hasattr(request, '_perf'):
+            actions = getattr(view_func, 'actions', None) or {}
+            request._perf_endpoint = (view_func.__name__, actions.get(request.method.lower(), ''))
+
+    def process_response(self, request, response):
+        perf = getattr(request, '_perf', None)
+        if perf is None:
+            return response
+        del request._perf
+        finish_request()
+        for connection in connections.all():
+            if perf in connection.execute_wrappers:
+                connection.execute_wrappers.remove(perf)
+
+        total = time.perf_counter() - perf.started
+        view, action = request._perf_endpoint
+        repeated = perf.repeated_selects()
+        for sql, count in repeated:
+            logger.warning('Possible N+1 in %s %s: %d x %s', view, action or request.method, count, sql)
+        record_request(view, action, request.method, response.status_code, perf, total, repeated)
+        if settings.PERF_SERVER_TIMING:
+            response.headers['Server-Timing'] = server_timing(perf, total)
+        return response
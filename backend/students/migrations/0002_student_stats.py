@@ -0,0 +1,30 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StudentStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('total_students', models.PositiveIntegerField(default=0)),
+                ('fully_paid', models.PositiveIntegerField(default=0)),
+                ('expiring_registration', models.PositiveIntegerField(default=0)),
+                ('dormitory_residents', models.PositiveIntegerField(default=0)),
+                ('outstanding_debt', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'student stats',
+                'ordering': ['-day'],
+            },
+        ),
+    ]
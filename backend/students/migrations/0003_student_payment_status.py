@@ -0,0 +1,81 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:04
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+PAYMENT_STATUS_FIELDS = [
+    'tuition_remaining', 'registration_fee_remaining', 'dormitory_planned_total',
+    'dormitory_balance', 'total_debt', 'is_fully_paid',
+]
+
+
+def backfill_payment_status(apps, schema_editor):
+    # Historical models have no custom methods, so the rules from
+    # Student.refresh_payment_status are repeated here
+    Student = apps.get_model('students', 'Student')
+    zero = Decimal('0')
+    batch = []
+    for student in Student.objects.all().iterator(chunk_size=1000):
+        student.tuition_remaining = student.tuition_total - student.tuition_paid
+        student.registration_fee_remaining = student.registration_fee_total - student.registration_fee_paid
+        student.dormitory_planned_total = zero
+        student.dormitory_balance = zero
+        rate = student.dormitory_monthly_rate
+        check_in = student.dormitory_check_in_date
+        checkout = student.dormitory_planned_checkout_date
+        if student.dormitory_status != 'None' and rate and check_in and checkout:
+            months = (checkout.year - check_in.year) * 12 + (checkout.month - check_in.month)
+            student.dormitory_planned_total = rate * months
+            student.dormitory_balance = student.dormitory_planned_total - (student.dormitory_paid_amount or zero)
+        debts = [student.tuition_remaining, student.registration_fee_remaining, student.dormitory_balance]
+        student.total_debt = sum((max(debt, zero) for debt in debts), zero)
+        student.is_fully_paid = all(debt <= 0 for debt in debts)
+        batch.append(student)
+        if len(batch) >= 1000:
+            Student.objects.bulk_update(batch, PAYMENT_STATUS_FIELDS)
+            batch = []
+    if batch:
+        Student.objects.bulk_update(batch, PAYMENT_STATUS_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0002_student_stats'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='student',
+            name='dormitory_balance',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='dormitory_planned_total',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='is_fully_paid',
+            field=models.BooleanField(db_index=True, default=False, editable=False),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='registration_fee_remaining',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='total_debt',
+            field=models.DecimalField(db_index=True, decimal_places=2, default=0, editable=False, max_digits=12),
+        ),
+        migrations.AddField(
+            model_name='student',
+            name='tuition_remaining',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(backfill_payment_status, migrations.RunPython.noop),
+    ]
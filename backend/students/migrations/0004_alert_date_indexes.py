@@ -0,0 +1,23 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0003_student_payment_status'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='student',
+            name='registration_end_date',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='student',
+            name='visa_end_date',
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+    ]
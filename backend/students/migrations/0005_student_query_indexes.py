@@ -0,0 +1,29 @@
+# Generated by Django 5.0.1 on 2026-10-18 09:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0004_alert_date_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['created_at', 'id'], name='student_created_at_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(condition=models.Q(('dormitory_status', 'None'), _negated=True), fields=['dormitory_status'], name='student_dormitory_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['group', 'course_year'], name='student_group_course_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='student',
+            index=models.Index(fields=['citizenship', 'created_at'], name='student_citizenship_idx'),
+        ),
+    ]
@@ -0,0 +1,82 @@
+from django.db import migrations, models
+
+import students.search
+
+
+SEARCH_COLUMNS = ['full_name', 'id', 'group', 'major', 'citizenship']
+
+
+def create_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    quote = schema_editor.quote_name
+    columns = ', '.join(quote(column) for column in SEARCH_COLUMNS)
+
+    if connection.vendor == 'sqlite':
+        # External-content FTS5 table over students_student, synced by triggers.
+        # 0009 re-keys it from the implicit rowid, which VACUUM may renumber.
+        new_values = ', '.join(f'new.{quote(column)}' for column in SEARCH_COLUMNS)
+        old_values = ', '.join(f'old.{quote(column)}' for column in SEARCH_COLUMNS)
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE students_student_fts USING fts5({columns}, "
+            f"content='students_student', content_rowid='rowid', "
+            f"prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER students_student_fts_insert AFTER INSERT ON students_student BEGIN "
+            f"INSERT INTO students_student_fts(rowid, {columns}) VALUES (new.rowid, {new_values}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER students_student_fts_delete AFTER DELETE ON students_student BEGIN "
+            f"INSERT INTO students_student_fts(students_student_fts, rowid, {columns}) "
+            f"VALUES ('delete', old.rowid, {old_values}); END"
+        )
+        schema_editor.execute(
+            f"CREATE TRIGGER students_student_fts_update AFTER UPDATE OF {columns} ON students_student BEGIN "
+            f"INSERT INTO students_student_fts(students_student_fts, rowid, {columns}) "
+            f"VALUES ('delete', old.rowid, {old_values}); "
+            f"INSERT INTO students_student_fts(rowid, {columns}) VALUES (new.rowid, {new_values}); END"
+        )
+        schema_editor.execute("INSERT INTO students_student_fts(students_student_fts) VALUES ('rebuild')")
+
+    elif connection.vendor == 'postgresql':
+        # Trigram GIN indexes on the same expression Django emits for icontains
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in SEARCH_COLUMNS:
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS student_{column}_trgm_idx ON students_student '
+                f'USING gin (UPPER({quote(column)}::text) gin_trgm_ops)'
+            )
+
+
+def drop_search_index(apps, schema_editor):
+    connection = schema_editor.connection
+    if connection.vendor == 'sqlite':
+        for action in ['insert', 'delete', 'update']:
+            schema_editor.execute(f'DROP TRIGGER IF EXISTS students_student_fts_{action}')
+        schema_editor.execute('DROP TABLE IF EXISTS students_student_fts')
+    elif connection.vendor == 'postgresql':
+        for column in SEARCH_COLUMNS:
+            schema_editor.execute(f'DROP INDEX IF EXISTS student_{column}_trgm_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('students', '0005_student_query_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+        migrations.CreateModel(
+            name='StudentSearchIndex',
+            fields=[
+                ('rowid', models.IntegerField(primary_key=True, serialize=False)),
+                ('document', students.search.FTSDocumentField(db_column='students_student_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'students_student_fts',
+                'managed': False,
+            },
+        ),
+    ]
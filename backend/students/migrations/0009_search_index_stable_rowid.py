@@ -0,0 +1,89 @@
+from django.db import migrations
+
+
+SEARCH_COLUMNS = ['full_name', 'id', 'group', 'major', 'citizenship']
+# Explicit INTEGER column the FTS5 index is keyed on. VACUUM may renumber the
+# implicit rowid of students_student (its primary key is text), never this.
+KEY_COLUMN = 'search_rowid'
+
+
+def create_fts(schema_editor, key):
+    """FTS5 table over students_student keyed on `key`, its sync triggers and a rebuild"""
+    quote = schema_editor.quote_name
+    columns = ', '.join(quote(column) for column in SEARCH_COLUMNS)
+    old_values = ', '.join(f'old.{quote(column)}' for column in SEARCH_COLUMNS)
+    new_values = ', '.join(f'new.{quote(column)}' for column in SEARCH_COLUMNS)
+    schema_editor.execute(
+        f"CREATE VIRTUAL TABLE students_student_fts USING fts5({columns}, "
+        f"content='students_student', content_rowid='{key}', "
+        f"prefix='2 3', tokenize='unicode61 remove_diacritics 2')"
+    )
+    if key == KEY_COLUMN:
+        # Django does not know the column: number new rows here, then index them
+        insert_body = (
+            f"UPDATE students_student SET {key} = (SELECT IFNULL(MAX({key}), 0) + 1 FROM students_student) "
+            f"WHERE rowid = new.rowid; "
+            f"INSERT INTO students_student_fts(rowid, {columns}) "
+            f"SELECT {key}, {columns} FROM students_student WHERE rowid = new.rowid;"
+        )
+    else:
+        insert_body = f"INSERT INTO students_student_fts(rowid, {columns}) VALUES (new.rowid, {new_values});"
+    schema_editor.execute(
+        f"CREATE TRIGGER students_student_fts_insert AFTER INSERT ON students_student BEGIN {insert_body} END"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER students_student_fts_delete AFTER DELETE ON students_student BEGIN "
+        f"INSERT INTO students_student_fts(students_student_fts, rowid, {columns}) "
+        f"VALUES ('delete', old.{key}, {old_values}); END"
+    )
+    schema_editor.execute(
+        f"CREATE TRIGGER students_student_fts_update AFTER UPDATE OF {columns} ON students_student BEGIN "
+        f"INSERT INTO students_student_fts(students_student_fts, rowid, {columns}) "
+        f"VALUES ('delete', old.{key}, {old_values}); "
+        f"INSERT INTO students_student_fts(rowid, {columns}) VALUES (new.{key}, {new_values}); END"
+    )
+    schema_editor.execute("INSERT INTO students_student_fts(students_student_fts) VALUES ('rebuild')")
+
+
+def drop_fts(schema_editor):
+    for action in ['insert', 'delete', 'update']:
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS students_student_fts_{action}')
+    schema_editor.execute('DROP TABLE IF EXISTS students_student_fts')
+
+
+def key_on_search_rowid(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    drop_fts(schema_editor)
+    schema_editor.execute(f'ALTER TABLE students_student ADD COLUMN {KEY_COLUMN} integer NULL')
+    schema_editor.execute(f'UPDATE students_student SET {KEY_COLUMN} = rowid')
+    schema_editor.execute(
+        f'CREATE UNIQUE INDEX students_student_{KEY_COLUMN}_uniq ON students_student ({KEY_COLUMN})'
+    )
+    create_fts(schema_editor, KEY_COLUMN)
+
+
+def key_on_rowid(apps, schema_editor):
+    if schema_editor.connection.vendor != 'sqlite':
+        return
+    drop_fts(schema_editor)
+    schema_editor.execute(f'DROP INDEX IF EXISTS students_student_{KEY_COLUMN}_uniq')
+    schema_editor.execute(f'ALTER TABLE students_student DROP COLUMN {KEY_COLUMN}')
+    create_fts(schema_editor, 'rowid')
+
+
+class Migration(migrations.Migration):
+    """
+    Re-key the SQLite FTS5 index from 0006 on a column VACUUM keeps. The
+    column is not a model field, so a later migration that remakes
+    students_student on SQLite drops it with the triggers and must run
+    key_on_search_rowid again.
+    """
+
+    dependencies = [
+        ('students', '0008_student_change'),
+    ]
+
+    operations = [
+        migrations.RunPython(key_on_search_rowid, key_on_rowid),
+    ]
@@ -1,5 +1,175 @@
-from django.db import models
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import connections, models, router, transaction
+from django.db.models import Count, Q, Sum
+from django.core.exceptions import ValidationError
 from django.core.validators import MinValueValidator
+from django.utils import timezone
+
+from .cache import bump_version
+from .search import FTS_TABLE, FTSDocumentField
+
+
+def _advance_student_ids(student_ids):
+    # Imported here: students.ids imports this module
+    from .ids import advance_student_ids
+    advance_student_ids(student_ids)
+
+
+def _apply_stats_delta(before=None, after=None):
+    # Imported here: students.stats imports this module
+    from .stats import apply_stats_delta
+    apply_stats_delta(before=before, after=after)
+
+
+def _merge_contributions(contributions):
+    from .stats import merge_contributions
+    return merge_contributions(contributions)
+
+
+class StudentQuerySet(models.QuerySet):
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        for obj in objs:
+            obj.refresh_payment_status()
+        # With conflict handling some rows may already exist: compare the stored rows
+        conflicts = kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts')
+        with transaction.atomic(using=self.db):
+            _advance_student_ids([obj.pk for obj in objs if obj.pk])
+            before = self.stats_of([obj.pk for obj in objs]) if conflicts else None
+            created = super().bulk_create(objs, *args, **kwargs)
+            StudentChange.record(StudentChange.CREATED, [obj.pk for obj in created])
+            if conflicts:
+                _apply_stats_delta(before, self.stats_of([obj.pk for obj in objs]))
+            else:
+                _apply_stats_delta(after=_merge_contributions(obj.stats_contribution() for obj in created))
+        bump_version()
+        return created
+
+    def bulk_insert(self, objs):
+        """
+        bulk_create for large loads (create_demo_data --count): one INSERT run
+        through executemany with every value prepared directly. On wide rows
+        bulk_create spends most of its time in the insert compiler's per-value
+        work. Objects need their primary key set; no signals are sent.
+        """
+        objs = list(objs)
+        connection = connections[self.db]
+        fields = self.model._meta.concrete_fields
+        quote_name = connection.ops.quote_name
+        sql = (
+            f'INSERT INTO {quote_name(self.model._meta.db_table)} '
+            f'({", ".join(quote_name(field.column) for field in fields)}) '
+            f'VALUES ({", ".join(["%s"] * len(fields))})'
+        )
+        # Amounts, dates and the timestamps repeat across rows: prepare each once
+        repeating = {
+            field.attname for field in fields if isinstance(field, (models.DecimalField, models.DateField))
+        }
+        prepared = {}
+        now = timezone.now()
+        params = []
+        for obj in objs:
+            obj.refresh_payment_status()
+            obj.created_at = obj.updated_at = now
+            row = []
+            for field in fields:
+                value = getattr(obj, field.attname)
+                if field.attname not in repeating:
+                    row.append(field.get_db_prep_save(value, connection))
+                    continue
+                key = (field.attname, value)
+                if key not in prepared:
+                    prepared[key] = field.get_db_prep_save(value, connection)
+                row.append(prepared[key])
+            params.append(row)
+            obj._state.adding, obj._state.db = False, self.db
+        with transaction.atomic(using=self.db):
+            _advance_student_ids([obj.pk for obj in objs])
+            with connection.cursor() as cursor:
+                cursor.executemany(sql, params)
+            StudentChange.record(StudentChange.CREATED, [obj.pk for obj in objs])
+            _apply_stats_delta(after=_merge_contributions(obj.stats_contribution() for obj in objs))
+        bump_version()
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        fields = list(fields)
+        if set(fields) & set(Student.PAYMENT_SOURCE_FIELDS):
+            for obj in objs:
+                obj.refresh_payment_status()
+            fields += [name for name in Student.PAYMENT_STATUS_FIELDS if name not in fields]
+        # Runs update() per batch, which logs the change and shifts the stats
+        return super().bulk_update(objs, fields, *args, **kwargs)
+
+    def update(self, **kwargs):
+        # Row cache keys, ETags and delta readers all go by updated_at
+        kwargs.setdefault('updated_at', timezone.now())
+        # bulk_update sends the status columns it computed itself
+        refresh = bool(set(kwargs) & set(Student.PAYMENT_SOURCE_FIELDS)) and not (
+            set(Student.PAYMENT_STATUS_FIELDS) <= set(kwargs)
+        )
+        tracked = refresh or set(kwargs) & set(Student.STATS_FIELDS)
+        with transaction.atomic(using=self.db):
+            # The change feed needs the affected ids, which UPDATE does not return
+            ids = list(self.values_list('pk', flat=True))
+            before = self.stats_of(ids) if tracked else None
+            rows = super().update(**kwargs)
+            fields = list(kwargs)
+            if refresh:
+                self._refresh_payment_status(ids)
+                fields += [name for name in Student.PAYMENT_STATUS_FIELDS if name not in fields]
+            StudentChange.record(StudentChange.UPDATED, ids, fields)
+            if tracked:
+                _apply_stats_delta(before, self.stats_of(ids))
+        bump_version()
+        return rows
+
+    def _refresh_payment_status(self, ids, batch_size=500):
+        """Recompute the stored payment status columns of these students after an UPDATE"""
+        # The base manager's plain QuerySet: this update() must not run again
+        plain = Student._base_manager.using(self.db)
+        for start in range(0, len(ids), batch_size):
+            students = list(plain.filter(pk__in=ids[start:start + batch_size]))
+            for student in students:
+                student.refresh_payment_status()
+            plain.bulk_update(students, Student.PAYMENT_STATUS_FIELDS)
+
+    def delete(self):
+        with transaction.atomic(using=self.db):
+            before = self.dashboard_stats()
+            result = super().delete()
+            _apply_stats_delta(before=before)
+        bump_version()
+        return result
+
+    def stats_of(self, ids, batch_size=500):
+        """dashboard_stats() of the students with these ids, read in batches"""
+        ids = list(ids)
+        return _merge_contributions(
+            Student.objects.using(self.db).filter(pk__in=ids[start:start + batch_size]).dashboard_stats()
+            for start in range(0, len(ids), batch_size)
+        )
+
+    def debtors(self):
+        """Students who still owe money, largest debt first"""
+        return self.filter(total_debt__gt=0).order_by('-total_debt')
+
+    def dashboard_stats(self, today=None):
+        """Compute dashboard counters in a single aggregate query"""
+        today = today or timezone.now().date()
+        result = self.aggregate(
+            total_students=Count('pk'),
+            fully_paid=Count('pk', filter=Q(is_fully_paid=True)),
+            expiring_registration=Count('pk', filter=Q(
+                registration_end_date__lte=today + timedelta(days=10)
+            )),
+            dormitory_residents=Count('pk', filter=~Q(dormitory_status='None')),
+            outstanding_debt=Sum('total_debt'),
+        )
+        result['outstanding_debt'] = result['outstanding_debt'] or Decimal('0')
+        return result
 
 
 class Student(models.Model):
@@ -41,9 +211,9 @@ class Student(models.Model):
     # Visa and Registration Information
     visa_type = models.CharField(max_length=50, default='Student Visa')
     visa_start_date = models.DateField(blank=True, null=True)
-    visa_end_date = models.DateField(blank=True, null=True)
+    visa_end_date = models.DateField(blank=True, null=True, db_index=True)
     registration_start_date = models.DateField(blank=True, null=True)
-    registration_end_date = models.DateField(blank=True, null=True)
+    registration_end_date = models.DateField(blank=True, null=True, db_index=True)
     registration_address_type = models.CharField(
         max_length=20,
         choices=REGISTRATION_ADDRESS_TYPE_CHOICES,
@@ -71,11 +241,277 @@ class Student(models.Model):
     dormitory_monthly_rate = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
     dormitory_paid_amount = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
 
+    # Payment status, recomputed from the fields above on every save
+    tuition_remaining = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    registration_fee_remaining = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
+    dormitory_planned_total = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False)
+    dormitory_balance = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, db_index=True)
+    total_debt = models.DecimalField(max_digits=12, decimal_places=2, default=0, editable=False, db_index=True)
+    is_fully_paid = models.BooleanField(default=False, editable=False, db_index=True)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    PAYMENT_SOURCE_FIELDS = [
+        'tuition_total', 'tuition_paid', 'registration_fee_total', 'registration_fee_paid',
+        'dormitory_status', 'dormitory_check_in_date', 'dormitory_planned_checkout_date',
+        'dormitory_monthly_rate', 'dormitory_paid_amount',
+    ]
+    PAYMENT_STATUS_FIELDS = [
+        'tuition_remaining', 'registration_fee_remaining', 'dormitory_planned_total',
+        'dormitory_balance', 'total_debt', 'is_fully_paid',
+    ]
+    # Columns stats_contribution() reads
+    STATS_FIELDS = ['is_fully_paid', 'registration_end_date', 'dormitory_status', 'total_debt']
+
+    objects = StudentQuerySet.as_manager()
+
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Default list ordering; id breaks ties between rows created together
+            models.Index(fields=['created_at', 'id'], name='student_created_at_idx'),
+            models.Index(
+                fields=['dormitory_status'],
+                condition=~Q(dormitory_status='None'),
+                name='student_dormitory_idx',
+            ),
+            models.Index(fields=['group', 'course_year'], name='student_group_course_idx'),
+            models.Index(fields=['citizenship', 'created_at'], name='student_citizenship_idx'),
+        ]
 
     def __str__(self):
         return f"{self.full_name} ({self.id})"
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # The stored contribution, so save() and delete() can apply the difference
+        loaded = instance.__dict__
+        if all(name in loaded for name in cls.STATS_FIELDS):
+            instance._stored_stats = {name: loaded[name] for name in cls.STATS_FIELDS}
+        return instance
+
+    def stored_stats_contribution(self):
+        """stats_contribution() of the row as stored, read again when it was not loaded"""
+        stored = getattr(self, '_stored_stats', None)
+        if stored is None:
+            return Student.objects.using(self._state.db).filter(pk=self.pk).dashboard_stats()
+        return self.stats_contribution(values=stored)
+
+    def save(self, *args, **kwargs):
+        self.refresh_payment_status()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and set(update_fields) & set(self.PAYMENT_SOURCE_FIELDS):
+            kwargs['update_fields'] = set(update_fields) | set(self.PAYMENT_STATUS_FIELDS)
+        tracked = update_fields is None or set(kwargs['update_fields']) & set(self.STATS_FIELDS)
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            before = None
+            if self._state.adding:
+                # An explicit STU-NNN id must not be allocated again later
+                _advance_student_ids([self.pk])
+            elif tracked:
+                before = self.stored_stats_contribution()
+            super().save(*args, **kwargs)
+            if tracked:
+                _apply_stats_delta(before, self.stats_contribution())
+                self._stored_stats = {name: getattr(self, name) for name in self.STATS_FIELDS}
+        bump_version()
+
+    def delete(self, *args, **kwargs):
+        using = kwargs.get('using') or router.db_for_write(type(self), instance=self)
+        with transaction.atomic(using=using):
+            before = self.stored_stats_contribution()
+            result = super().delete(*args, **kwargs)
+            _apply_stats_delta(before=before)
+        bump_version()
+        return result
+
+    def _normalize_values(self):
+        # Serializers assign raw JSON values (floats, date strings) before save
+        for field in self._meta.concrete_fields:
+            if isinstance(field, (models.DecimalField, models.DateField)) and not isinstance(field, models.DateTimeField):
+                try:
+                    setattr(self, field.attname, field.to_python(getattr(self, field.attname)))
+                except ValidationError as e:
+                    raise ValidationError({field.name: e.messages})
+
+    def field_values(self):
+        """Normalized values of every concrete field, for change tracking"""
+        self._normalize_values()
+        return {field.attname: getattr(self, field.attname) for field in self._meta.concrete_fields}
+
+    @property
+    def etag(self):
+        """Strong validator for If-Match; changes whenever the row is saved"""
+        return f'"{int(self.updated_at.timestamp() * 1_000_000):x}"'
+
+    def calculate_balances(self):
+        """Remaining amounts per payment kind and the planned dormitory total"""
+        tuition_remaining = self.tuition_total - self.tuition_paid
+        registration_fee_remaining = self.registration_fee_total - self.registration_fee_paid
+
+        dormitory_planned_total = Decimal('0')
+        dormitory_balance = Decimal('0')
+        rate = self.dormitory_monthly_rate
+        check_in = self.dormitory_check_in_date
+        checkout = self.dormitory_planned_checkout_date
+        if self.dormitory_status != 'None' and rate and check_in and checkout:
+            months = (checkout.year - check_in.year) * 12 + (checkout.month - check_in.month)
+            dormitory_planned_total = rate * months
+            dormitory_balance = dormitory_planned_total - (self.dormitory_paid_amount or Decimal('0'))
+
+        return {
+            'tuition_remaining': tuition_remaining,
+            'registration_fee_remaining': registration_fee_remaining,
+            'dormitory_planned_total': dormitory_planned_total,
+            'dormitory_balance': dormitory_balance,
+        }
+
+    def refresh_payment_status(self):
+        """Recompute the stored payment status columns"""
+        self._normalize_values()
+        balances = self.calculate_balances()
+        debts = [
+            balances['tuition_remaining'],
+            balances['registration_fee_remaining'],
+            balances['dormitory_balance'],
+        ]
+        for name, value in balances.items():
+            setattr(self, name, value)
+        self.total_debt = sum((max(debt, Decimal('0')) for debt in debts), Decimal('0'))
+        self.is_fully_paid = all(debt <= 0 for debt in debts)
+
+    def stats_contribution(self, today=None, values=None):
+        """What this student, or the STATS_FIELDS `values` of it, adds to each StudentStats counter"""
+        today = today or timezone.now().date()
+        if values is None:
+            values = {name: getattr(self, name) for name in self.STATS_FIELDS}
+        registration_end_date = values['registration_end_date']
+        return {
+            'total_students': 1,
+            'fully_paid': int(values['is_fully_paid']),
+            'expiring_registration': int(
+                bool(registration_end_date) and registration_end_date <= today + timedelta(days=10)
+            ),
+            'dormitory_residents': int(values['dormitory_status'] != 'None'),
+            'outstanding_debt': values['total_debt'],
+        }
+
+
+class StudentSearchIndex(models.Model):
+    """Read-only mapping of the SQLite FTS5 table created by migration 0006"""
+    rowid = models.IntegerField(primary_key=True)
+    student = models.OneToOneField(
+        Student,
+        on_delete=models.DO_NOTHING,
+        db_column='id',
+        db_constraint=False,
+        related_name='search_index',
+    )
+    document = FTSDocumentField(db_column=FTS_TABLE)
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = FTS_TABLE
+
+
+class StudentStats(models.Model):
+    """Dashboard counters, one row per day; the latest row is the current state"""
+    COUNTERS = [
+        'total_students', 'fully_paid', 'expiring_registration',
+        'dormitory_residents', 'outstanding_debt',
+    ]
+
+    day = models.DateField(unique=True)
+    total_students = models.PositiveIntegerField(default=0)
+    fully_paid = models.PositiveIntegerField(default=0)
+    expiring_registration = models.PositiveIntegerField(default=0)
+    dormitory_residents = models.PositiveIntegerField(default=0)
+    outstanding_debt = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-day']
+        verbose_name_plural = 'student stats'
+
+    def __str__(self):
+        return f"Stats {self.day}"
+
+    def as_dict(self):
+        return {name: getattr(self, name) for name in self.COUNTERS}
+
+
+class IdSequence(models.Model):
+    """Last number handed out per id prefix; see students.ids"""
+    name = models.CharField(max_length=20, primary_key=True)
+    last_value = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}{self.last_value}"
+
+
+class StudentChange(models.Model):
+    """
+    Append-only log of Student writes, filled by the post_save/post_delete
+    receivers and the bulk paths; its id is the change feed's event id.
+    """
+    CREATED = 'created'
+    UPDATED = 'updated'
+    DELETED = 'deleted'
+    ACTION_CHOICES = [
+        (CREATED, 'Created'),
+        (UPDATED, 'Updated'),
+        (DELETED, 'Deleted'),
+    ]
+
+    student_id = models.CharField(max_length=20)
+    action = models.CharField(max_length=10, choices=ACTION_CHOICES)
+    # Model field names written by an update; null means the whole row
+    fields = models.JSONField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        ordering = ['id']
+
+    def __str__(self):
+        return f"{self.id} {self.action} {self.student_id}"
+
+    # pg_advisory_xact_lock key serializing change log writers on PostgreSQL
+    WRITE_LOCK_ID = 0x53545543
+
+    @classmethod
+    def record(cls, action, student_ids, fields=None):
+        """
+        Log one change per student; runs in the writer's transaction. Rows
+        differ only in student_id, so the rest is prepared once and inserted
+        with executemany (bulk_create prepares every value of every row).
+
+        Readers hand out the largest id they saw as a sync token, so ids must
+        become visible in order: a writer holds the log until it commits.
+        SQLite's database write lock already does; PostgreSQL takes an
+        advisory lock released at commit.
+        """
+        student_ids = list(student_ids)
+        if not student_ids:
+            return
+        connection = connections[router.db_for_write(cls)]
+        values = {
+            cls._meta.get_field('action'): action,
+            cls._meta.get_field('fields'): sorted(fields) if fields is not None else None,
+            cls._meta.get_field('created_at'): timezone.now(),
+        }
+        shared = [field.get_db_prep_save(value, connection) for field, value in values.items()]
+        quote_name = connection.ops.quote_name
+        columns = [cls._meta.get_field('student_id'), *values]
+        sql = (
+            f'INSERT INTO {quote_name(cls._meta.db_table)} '
+            f'({", ".join(quote_name(field.column) for field in columns)}) '
+            f'VALUES ({", ".join(["%s"] * len(columns))})'
+        )
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            if connection.vendor == 'postgresql':
+                cursor.execute('SELECT pg_advisory_xact_lock(%s)', [cls.WRITE_LOCK_ID])
+            cursor.executemany(sql, [[student_id, *shared] for student_id in student_ids])
@@ -0,0 +1,81 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class StudentPagination(PageNumberPagination):
+    """
+    Page-number pagination by default. Sending ``?cursor=`` (empty for the
+    first page) switches to keyset pagination on (created_at, id), which
+    seeks with an index instead of OFFSET. ``?count=false`` skips COUNT(*).
+    """
+    page_size_query_param = 'page_size'
+    max_page_size = 1000
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = self.cursor_query_param in request.query_params
+        if not self.keyset:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        page_size = self.get_page_size(request)
+        include_count = request.query_params.get(self.count_query_param, 'true').lower() not in ('0', 'false')
+        self.count = queryset.count() if include_count else None
+
+        queryset = queryset.order_by('-created_at', '-id')
+        cursor = request.query_params[self.cursor_query_param]
+        if cursor:
+            created_at, student_id = self.decode_cursor(cursor)
+            queryset = queryset.filter(
+                Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=student_id)
+            )
+
+        # One extra row tells us whether there is a next page
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page_rows = rows[:page_size]
+        return self.page_rows
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return super().get_paginated_response(data)
+
+        response = OrderedDict()
+        if self.count is not None:
+            response['count'] = self.count
+        response['next'] = self.get_next_keyset_link()
+        response['results'] = data
+        return Response(response)
+
+    def get_next_keyset_link(self):
+        if not self.has_next:
+            return None
+        last = self.page_rows[-1]
+        return replace_query_param(
+            self.base_url, self.cursor_query_param, self.encode_cursor(last.created_at, last.id)
+        )
+
+    def encode_cursor(self, created_at, student_id):
+        payload = json.dumps([created_at.isoformat(), student_id]).encode()
+        return base64.urlsafe_b64encode(payload).decode().rstrip('=')
+
+    def decode_cursor(self, cursor):
+        try:
+            padded = cursor + '=' * (-len(cursor) % 4)
+            created_at, student_id = json.loads(base64.urlsafe_b64decode(padded))
+            created_at = parse_datetime(created_at)
+        except (TypeError, ValueError):
+            created_at = None
+        if created_at is None:
+            raise NotFound('Notoʻgʻri cursor')
+        return created_at, student_id
@@ -0,0 +1,16 @@
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .jsonlib import loads, use_orjson
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser decoding through students.jsonlib (orjson when installed)"""
+    def parse(self, stream, media_type=None, parser_context=None):
+        encoding = (parser_context or {}).get('encoding', 'utf-8')
+        if not use_orjson() or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return loads(stream.read())
+        except ValueError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
@@ -0,0 +1,122 @@
+from decimal import Decimal, InvalidOperation
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .cache import bump_version
+from .models import Student, StudentChange
+from .stats import apply_stats_delta, merge_contributions
+
+
+# Payment kinds as named in the API (same keys as the serializer) -> paid column
+PAYMENT_KINDS = {
+    'tuition': 'tuition_paid',
+    'registrationFee': 'registration_fee_paid',
+    'dormitory': 'dormitory_paid_amount',
+}
+MAX_PAID = Decimal('99999999.99')
+BULK_PAYMENTS_MAX_ROWS = 5000
+
+
+def parse_amount(value):
+    try:
+        amount = Decimal(str(value)).quantize(Decimal('0.01'))
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+    return amount if amount.is_finite() else None
+
+
+def write_back(students, field_names):
+    """
+    Save field_names of each student with one parameterised UPDATE run through
+    executemany. bulk_update builds a CASE WHEN per row and column, which for
+    a few hundred students costs seconds to compile.
+    """
+    students = list(students)
+    fields = [Student._meta.get_field(name) for name in field_names]
+    assignments = ', '.join(f'{connection.ops.quote_name(field.column)} = %s' for field in fields)
+    sql = (
+        f'UPDATE {connection.ops.quote_name(Student._meta.db_table)} SET {assignments} '
+        f'WHERE {connection.ops.quote_name(Student._meta.pk.column)} = %s'
+    )
+    params = [
+        [field.get_db_prep_save(getattr(student, field.attname), connection) for field in fields] + [student.pk]
+        for student in students
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+    StudentChange.record(StudentChange.UPDATED, [student.pk for student in students], field_names)
+    bump_version()
+
+
+def post_payments(rows, partial=False, batch_size=1000):
+    """
+    Add each row's amount (negative for a reversal) to the student's paid
+    column. Students are locked while they are read, their payment status is
+    recomputed and they are written back in one executemany. Unless
+    partial=True nothing is written when any row fails.
+    """
+    results = []
+    postings = []
+    for row_number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict):
+            results.append({'row': row_number, 'errors': ['Qator obyekt boʻlishi kerak']})
+            continue
+        errors = []
+        student_id, kind = row.get('id'), row.get('kind')
+        amount = parse_amount(row.get('amount'))
+        if not student_id:
+            errors.append('id kiritilishi shart')
+        if kind not in PAYMENT_KINDS:
+            errors.append(f'kind {", ".join(PAYMENT_KINDS)} dan biri boʻlishi kerak')
+        if amount is None or not amount:
+            errors.append('amount noldan farqli son boʻlishi kerak')
+        result = {'row': row_number, 'id': student_id, 'kind': kind}
+        if errors:
+            result['errors'] = errors
+        else:
+            result['amount'] = float(amount)
+            postings.append((result, str(student_id), PAYMENT_KINDS[kind], amount))
+        results.append(result)
+
+    with transaction.atomic():
+        students = Student.objects.select_for_update().in_bulk(
+            {student_id for _, student_id, _, _ in postings}
+        )
+        before = {student_id: student.stats_contribution() for student_id, student in students.items()}
+
+        changed = {}
+        for result, student_id, field, amount in postings:
+            student = students.get(student_id)
+            if student is None:
+                result['errors'] = ['Talaba topilmadi']
+                continue
+            paid = (getattr(student, field) or Decimal('0')) + amount
+            if not Decimal('0') <= paid <= MAX_PAID:
+                result['errors'] = [f'Toʻlangan summa {paid} boʻlib qoladi']
+                continue
+            setattr(student, field, paid)
+            result['paid'] = float(paid)
+            changed[student_id] = student
+
+        failed = [result for result in results if 'errors' in result]
+        for result in results:
+            result['status'] = 'error' if 'errors' in result else 'applied'
+        if failed and not partial:
+            for result in results:
+                result.pop('paid', None)
+                if result['status'] == 'applied':
+                    result['status'] = 'skipped'
+            return {'applied': 0, 'results': results}
+
+        now = timezone.now()
+        for student in changed.values():
+            student.updated_at = now
+            student.refresh_payment_status()
+        write_back(changed.values(), list(PAYMENT_KINDS.values()) + Student.PAYMENT_STATUS_FIELDS + ['updated_at'])
+        apply_stats_delta(
+            before=merge_contributions(before[student_id] for student_id in changed),
+            after=merge_contributions(student.stats_contribution() for student in changed.values()),
+        )
+
+    return {'applied': len(results) - len(failed), 'results': results}
@@ -0,0 +1,50 @@
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+from .changes import format_event
+from .jsonlib import dumps
+from .metrics import timed
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer encoding through students.jsonlib (orjson when installed)"""
+    @timed('render')
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # Indented output (browsable API, ?indent=) stays on the stdlib path
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
+
+
+class PassthroughRenderer(BaseRenderer):
+    """
+    Lets content negotiation accept ?format= values for views that build
+    their own (streaming) response; never renders anything itself.
+    """
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return data
+
+
+class CSVRenderer(PassthroughRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+
+class NDJSONRenderer(PassthroughRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+
+class XLSXRenderer(PassthroughRenderer):
+    media_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    format = 'xlsx'
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Change feed media type; renders error responses as one error event"""
+    media_type = 'text/event-stream'
+    format = 'event-stream'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return format_event('error', data)
@@ -0,0 +1,64 @@
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+REPLICA_ALIAS = 'replica'
+
+# Set by StudentViewSet for the duration of a safe request
+_read_from_replica = ContextVar('read_from_replica', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+def use_replica(enabled):
+    """Route this request's reads to the replica; returns a token for reset_replica()"""
+    return _read_from_replica.set(enabled and replica_configured())
+
+
+def reset_replica(token):
+    _read_from_replica.reset(token)
+
+
+def reads_from_replica():
+    return _read_from_replica.get()
+
+
+def _sticky_key(user):
+    return f'students:primary:{user.pk}'
+
+
+def pin_to_primary(user):
+    """Read this user's requests from the primary until the replica has caught up"""
+    if replica_configured() and user.is_authenticated:
+        cache.set(_sticky_key(user), True, settings.STUDENT_REPLICA_STICKY_SECONDS)
+
+
+def pinned_to_primary(user):
+    return user.is_authenticated and bool(cache.get(_sticky_key(user)))
+
+
+async def apinned_to_primary(user):
+    return user.is_authenticated and bool(await cache.aget(_sticky_key(user)))
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes always go to the primary. Reads go to the replica only while a
+    view has opted in with use_replica(), and never after this request has
+    written, so read-after-write sees its own changes.
+    """
+
+    def db_for_read(self, model, **hints):
+        return REPLICA_ALIAS if _read_from_replica.get() else 'default'
+
+    def db_for_write(self, model, **hints):
+        _read_from_replica.set(False)
+        return 'default'
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Both aliases hold the same data
+        return True
@@ -0,0 +1,95 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection, models
+from django.db.models import F, FloatField, Func, Q, Value
+from django.db.models.functions import Greatest
+
+
+SEARCH_FIELDS = ['full_name', 'id', 'group', 'major', 'citizenship']
+FTS_TABLE = 'students_student_fts'
+
+
+class FTSDocumentField(models.TextField):
+    """The hidden FTS5 column named after its table; supports __match"""
+
+
+@FTSDocumentField.register_lookup
+class FTSMatch(models.Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class IcontainsSearch:
+    """ORed icontains over SEARCH_FIELDS; works everywhere, scans the whole table"""
+    name = 'icontains'
+
+    def search(self, queryset, term):
+        condition = Q()
+        for field in SEARCH_FIELDS:
+            condition |= Q(**{f'{field}__icontains': term})
+        return queryset.filter(condition)
+
+
+class SQLiteFTSSearch(IcontainsSearch):
+    """
+    FTS5 index kept in sync by triggers (migration 0006). Every word of the
+    term is matched as a prefix and results are ordered by bm25 rank.
+    """
+    name = 'sqlite_fts'
+
+    def search(self, queryset, term):
+        words = re.findall(r'\w+', term)
+        if not words:
+            return super().search(queryset, term)
+        match = ' '.join('"{}"*'.format(word) for word in words)
+        # The join lets SQLite drive the query from the FTS index
+        return queryset.filter(search_index__document__match=match).annotate(
+            search_rank=F('search_index__rank')
+        ).order_by('search_rank', '-created_at')
+
+
+class PostgresTrigramSearch(IcontainsSearch):
+    """
+    icontains served by the pg_trgm GIN indexes from migration 0006, ranked
+    by the best trigram similarity across SEARCH_FIELDS.
+    """
+    name = 'postgres_trgm'
+
+    def search(self, queryset, term):
+        similarities = [
+            Func(F(field), Value(term), function='similarity', output_field=FloatField())
+            for field in SEARCH_FIELDS
+        ]
+        return super().search(queryset, term).annotate(
+            search_rank=Greatest(*similarities)
+        ).order_by('-search_rank', '-created_at')
+
+
+BACKENDS = {backend.name: backend for backend in [IcontainsSearch, SQLiteFTSSearch, PostgresTrigramSearch]}
+
+
+def fts_available():
+    return connection.vendor == 'sqlite' and FTS_TABLE in connection.introspection.table_names()
+
+
+@lru_cache(maxsize=None)
+def get_search_backend(name=None):
+    """
+    Backend named by settings.STUDENT_SEARCH_BACKEND; 'auto' picks the
+    index-backed one for the current database when it has been migrated.
+    """
+    name = name or getattr(settings, 'STUDENT_SEARCH_BACKEND', 'auto')
+    if name == 'auto':
+        if fts_available():
+            name = SQLiteFTSSearch.name
+        elif connection.vendor == 'postgresql':
+            name = PostgresTrigramSearch.name
+        else:
+            name = IcontainsSearch.name
+    return BACKENDS[name]()
@@ -1,7 +1,83 @@
+from django.core.exceptions import ValidationError as DjangoValidationError
 from rest_framework import serializers
+from .cache import row_cache, row_cache_key
+from .ids import allocate_student_ids
+from .metrics import timed
 from .models import Student
 
 
+def nested_student_fields(data):
+    """Model field values from the academic/visa/payment/dormitory blocks of a payload"""
+    academic_data = data.get('academic', {})
+    visa_data = data.get('visa', {})
+    tuition_data = data.get('tuition', {})
+    registration_fee_data = data.get('registrationFee', {})
+    dormitory_data = data.get('dormitory', {})
+    return dict(
+        # Academic
+        group=academic_data.get('group', ''),
+        course_year=academic_data.get('courseYear', 1),
+        major=academic_data.get('major', ''),
+        language=academic_data.get('language', 'English'),
+        # Visa
+        visa_type=visa_data.get('visaType', 'Student Visa'),
+        visa_start_date=visa_data.get('visaStartDate') or None,
+        visa_end_date=visa_data.get('visaEndDate') or None,
+        registration_start_date=visa_data.get('registrationStartDate') or None,
+        registration_end_date=visa_data.get('registrationEndDate') or None,
+        registration_address_type=visa_data.get('registrationAddressType', 'Dormitory'),
+        registration_address_details=visa_data.get('registrationAddressDetails', ''),
+        # Tuition
+        tuition_total=tuition_data.get('total', 2800.00),
+        tuition_paid=tuition_data.get('paid', 0.00),
+        # Registration Fee
+        registration_fee_total=registration_fee_data.get('total', 300.00),
+        registration_fee_paid=registration_fee_data.get('paid', 0.00),
+        # Dormitory
+        dormitory_status=dormitory_data.get('status', 'None'),
+        dormitory_check_in_date=dormitory_data.get('checkInDate') or None,
+        dormitory_planned_checkout_date=dormitory_data.get('plannedCheckoutDate') or None,
+        dormitory_actual_checkout_date=dormitory_data.get('actualCheckoutDate') or None,
+        dormitory_monthly_rate=dormitory_data.get('monthlyRate') or None,
+        dormitory_paid_amount=dormitory_data.get('paidAmount') or None,
+    )
+
+
+# Top-level fields update() copies from validated_data
+UPDATABLE_FIELDS = [
+    'full_name', 'date_of_birth', 'passport_number', 'jshir', 'citizenship',
+    'phone', 'email', 'emergency_contact_name', 'emergency_contact_phone',
+]
+
+# Payload block -> {payload key: model field}, as read by update()
+NESTED_UPDATE_FIELDS = {
+    'academic': {
+        'group': 'group', 'courseYear': 'course_year', 'major': 'major', 'language': 'language',
+    },
+    'visa': {
+        'visaType': 'visa_type', 'visaStartDate': 'visa_start_date', 'visaEndDate': 'visa_end_date',
+        'registrationStartDate': 'registration_start_date', 'registrationEndDate': 'registration_end_date',
+        'registrationAddressType': 'registration_address_type',
+        'registrationAddressDetails': 'registration_address_details',
+    },
+    'tuition': {'total': 'tuition_total', 'paid': 'tuition_paid'},
+    'registrationFee': {'total': 'registration_fee_total', 'paid': 'registration_fee_paid'},
+    'dormitory': {
+        'status': 'dormitory_status', 'checkInDate': 'dormitory_check_in_date',
+        'plannedCheckoutDate': 'dormitory_planned_checkout_date',
+        'actualCheckoutDate': 'dormitory_actual_checkout_date',
+        'monthlyRate': 'dormitory_monthly_rate', 'paidAmount': 'dormitory_paid_amount',
+    },
+}
+
+# Nested values where an empty string from the form means "clear"
+NULLABLE_NESTED_FIELDS = {
+    'visa_start_date', 'visa_end_date', 'registration_start_date', 'registration_end_date',
+    'dormitory_check_in_date', 'dormitory_planned_checkout_date', 'dormitory_actual_checkout_date',
+    'dormitory_monthly_rate', 'dormitory_paid_amount',
+}
+
+
 class StudentSerializer(serializers.ModelSerializer):
     # Transform to match frontend structure
     fullName = serializers.CharField(source='full_name')
@@ -32,6 +108,21 @@ class StudentSerializer(serializers.ModelSerializer):
             'registrationFee', 'dormitory'
         ]
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Sparse fieldsets for reads: ?fields=id,fullName,academic
+        request = self.context.get('request')
+        if request is not None and request.method == 'GET':
+            requested = request.query_params.get('fields')
+            if requested:
+                keep = {name.strip() for name in requested.split(',')}
+                for name in set(self.fields) - keep:
+                    self.fields.pop(name)
+
+    @timed('serialize')
+    def to_representation(self, instance):
+        return super().to_representation(instance)
+
     def get_academic(self, obj):
         return {
             'group': obj.group,
@@ -80,26 +171,10 @@ class StudentSerializer(serializers.ModelSerializer):
         return dormitory_data
 
     def create(self, validated_data):
-        # Extract nested data
-        academic_data = self.initial_data.get('academic', {})
-        visa_data = self.initial_data.get('visa', {})
-        tuition_data = self.initial_data.get('tuition', {})
-        registration_fee_data = self.initial_data.get('registrationFee', {})
-        dormitory_data = self.initial_data.get('dormitory', {})
-
         # Generate ID if not provided
         student_id = validated_data.get('id') or self.initial_data.get('id')
         if not student_id or student_id == 'NEW':
-            # Generate new ID
-            last_student = Student.objects.order_by('-id').first()
-            if last_student:
-                try:
-                    num = int(last_student.id.split('-')[1])
-                    student_id = f"STU-{str(num + 1).zfill(3)}"
-                except:
-                    student_id = "STU-001"
-            else:
-                student_id = "STU-001"
+            student_id = allocate_student_ids()[0]
         
         # Create student
         student = Student.objects.create(
@@ -113,89 +188,150 @@ class StudentSerializer(serializers.ModelSerializer):
             email=validated_data.get('email', ''),
             emergency_contact_name=validated_data.get('emergency_contact_name', validated_data.get('emergencyContactName', '')),
             emergency_contact_phone=validated_data.get('emergency_contact_phone', validated_data.get('emergencyContactPhone', '')),
-            # Academic
-            group=academic_data.get('group', ''),
-            course_year=academic_data.get('courseYear', 1),
-            major=academic_data.get('major', ''),
-            language=academic_data.get('language', 'English'),
-            # Visa
-            visa_type=visa_data.get('visaType', 'Student Visa'),
-            visa_start_date=visa_data.get('visaStartDate') or None,
-            visa_end_date=visa_data.get('visaEndDate') or None,
-            registration_start_date=visa_data.get('registrationStartDate') or None,
-            registration_end_date=visa_data.get('registrationEndDate') or None,
-            registration_address_type=visa_data.get('registrationAddressType', 'Dormitory'),
-            registration_address_details=visa_data.get('registrationAddressDetails', ''),
-            # Tuition
-            tuition_total=tuition_data.get('total', 2800.00),
-            tuition_paid=tuition_data.get('paid', 0.00),
-            # Registration Fee
-            registration_fee_total=registration_fee_data.get('total', 300.00),
-            registration_fee_paid=registration_fee_data.get('paid', 0.00),
-            # Dormitory
-            dormitory_status=dormitory_data.get('status', 'None'),
-            dormitory_check_in_date=dormitory_data.get('checkInDate') or None,
-            dormitory_planned_checkout_date=dormitory_data.get('plannedCheckoutDate') or None,
-            dormitory_actual_checkout_date=dormitory_data.get('actualCheckoutDate') or None,
-            dormitory_monthly_rate=dormitory_data.get('monthlyRate') or None,
-            dormitory_paid_amount=dormitory_data.get('paidAmount') or None,
+            **nested_student_fields(self.initial_data)
         )
         return student
 
     def update(self, instance, validated_data):
-        # Extract nested data
-        academic_data = self.initial_data.get('academic', {})
-        visa_data = self.initial_data.get('visa', {})
-        tuition_data = self.initial_data.get('tuition', {})
-        registration_fee_data = self.initial_data.get('registrationFee', {})
-        dormitory_data = self.initial_data.get('dormitory', {})
-
-        # Update basic fields
-        instance.full_name = validated_data.get('full_name', instance.full_name)
-        instance.date_of_birth = validated_data.get('date_of_birth', instance.date_of_birth)
-        instance.passport_number = validated_data.get('passport_number', instance.passport_number)
-        instance.jshir = validated_data.get('jshir', instance.jshir)
-        instance.citizenship = validated_data.get('citizenship', instance.citizenship)
-        instance.phone = validated_data.get('phone', instance.phone)
-        instance.email = validated_data.get('email', instance.email)
-        instance.emergency_contact_name = validated_data.get('emergency_contact_name', instance.emergency_contact_name)
-        instance.emergency_contact_phone = validated_data.get('emergency_contact_phone', instance.emergency_contact_phone)
-
-        # Update academic
-        if academic_data:
-            instance.group = academic_data.get('group', instance.group)
-            instance.course_year = academic_data.get('courseYear', instance.course_year)
-            instance.major = academic_data.get('major', instance.major)
-            instance.language = academic_data.get('language', instance.language)
-
-        # Update visa
-        if visa_data:
-            instance.visa_type = visa_data.get('visaType', instance.visa_type)
-            instance.visa_start_date = visa_data.get('visaStartDate') or None
-            instance.visa_end_date = visa_data.get('visaEndDate') or None
-            instance.registration_start_date = visa_data.get('registrationStartDate') or None
-            instance.registration_end_date = visa_data.get('registrationEndDate') or None
-            instance.registration_address_type = visa_data.get('registrationAddressType', instance.registration_address_type)
-            instance.registration_address_details = visa_data.get('registrationAddressDetails', instance.registration_address_details)
-
-        # Update tuition
-        if tuition_data:
-            instance.tuition_total = tuition_data.get('total', instance.tuition_total)
-            instance.tuition_paid = tuition_data.get('paid', instance.tuition_paid)
-
-        # Update registration fee
-        if registration_fee_data:
-            instance.registration_fee_total = registration_fee_data.get('total', instance.registration_fee_total)
-            instance.registration_fee_paid = registration_fee_data.get('paid', instance.registration_fee_paid)
-
-        # Update dormitory
-        if dormitory_data:
-            instance.dormitory_status = dormitory_data.get('status', instance.dormitory_status)
-            instance.dormitory_check_in_date = dormitory_data.get('checkInDate') or None
-            instance.dormitory_planned_checkout_date = dormitory_data.get('plannedCheckoutDate') or None
-            instance.dormitory_actual_checkout_date = dormitory_data.get('actualCheckoutDate') or None
-            instance.dormitory_monthly_rate = dormitory_data.get('monthlyRate') or None
-            instance.dormitory_paid_amount = dormitory_data.get('paidAmount') or None
-
-        instance.save()
+        # Only keys that were sent are applied, so PATCH and PUT share this path
+        original = instance.field_values()
+
+        for name, value in validated_data.items():
+            if name in UPDATABLE_FIELDS:
+                setattr(instance, name, value)
+
+        for block, keys in NESTED_UPDATE_FIELDS.items():
+            block_data = self.initial_data.get(block)
+            if not isinstance(block_data, dict):
+                continue
+            for key, name in keys.items():
+                if key in block_data:
+                    value = block_data[key]
+                    setattr(instance, name, (value or None) if name in NULLABLE_NESTED_FIELDS else value)
+
+        try:
+            current = instance.field_values()
+        except DjangoValidationError as e:
+            raise serializers.ValidationError(e.message_dict)
+        changed = [name for name, value in current.items() if value != original[name]]
+        if changed:
+            instance.save(update_fields=changed + ['updated_at'])
         return instance
+
+
+# Columns read by represent_student_rows, in unpacking order
+STUDENT_ROW_FIELDS = (
+    'id', 'full_name', 'date_of_birth', 'passport_number', 'jshir', 'citizenship',
+    'phone', 'email', 'emergency_contact_name', 'emergency_contact_phone',
+    'group', 'course_year', 'major', 'language',
+    'visa_type', 'visa_start_date', 'visa_end_date', 'registration_start_date',
+    'registration_end_date', 'registration_address_type', 'registration_address_details',
+    'tuition_total', 'tuition_paid', 'registration_fee_total', 'registration_fee_paid',
+    'dormitory_status', 'dormitory_check_in_date', 'dormitory_planned_checkout_date',
+    'dormitory_actual_checkout_date', 'dormitory_monthly_rate', 'dormitory_paid_amount',
+    'created_at',
+)
+
+
+@timed('serialize')
+def represent_student_rows(rows, fields=None):
+    """
+    Read-only fast path producing exactly what StudentSerializer(many=True).data
+    renders, from values_list(*STUDENT_ROW_FIELDS) rows instead of model
+    instances and DRF field machinery.
+    """
+    results = []
+    append = results.append
+    for (
+        student_id, full_name, date_of_birth, passport_number, jshir, citizenship,
+        phone, email, emergency_contact_name, emergency_contact_phone,
+        group, course_year, major, language,
+        visa_type, visa_start_date, visa_end_date, registration_start_date,
+        registration_end_date, registration_address_type, registration_address_details,
+        tuition_total, tuition_paid, registration_fee_total, registration_fee_paid,
+        dormitory_status, dormitory_check_in_date, dormitory_planned_checkout_date,
+        dormitory_actual_checkout_date, dormitory_monthly_rate, dormitory_paid_amount,
+        _created_at,
+    ) in rows:
+        dormitory = {'status': dormitory_status}
+        if dormitory_check_in_date:
+            dormitory['checkInDate'] = dormitory_check_in_date.isoformat()
+        if dormitory_planned_checkout_date:
+            dormitory['plannedCheckoutDate'] = dormitory_planned_checkout_date.isoformat()
+        if dormitory_actual_checkout_date:
+            dormitory['actualCheckoutDate'] = dormitory_actual_checkout_date.isoformat()
+        if dormitory_monthly_rate:
+            dormitory['monthlyRate'] = float(dormitory_monthly_rate)
+        if dormitory_paid_amount:
+            dormitory['paidAmount'] = float(dormitory_paid_amount)
+
+        append({
+            'id': student_id,
+            'fullName': full_name,
+            'dateOfBirth': date_of_birth.isoformat() if date_of_birth is not None else None,
+            'passportNumber': passport_number,
+            'jshir': jshir,
+            'citizenship': citizenship,
+            'phone': phone,
+            'email': email,
+            'emergencyContactName': emergency_contact_name,
+            'emergencyContactPhone': emergency_contact_phone,
+            'academic': {
+                'group': group,
+                'courseYear': course_year,
+                'major': major,
+                'language': language
+            },
+            'visa': {
+                'visaType': visa_type,
+                'visaStartDate': visa_start_date.isoformat() if visa_start_date else '',
+                'visaEndDate': visa_end_date.isoformat() if visa_end_date else '',
+                'registrationStartDate': registration_start_date.isoformat() if registration_start_date else '',
+                'registrationEndDate': registration_end_date.isoformat() if registration_end_date else '',
+                'registrationAddressType': registration_address_type,
+                'registrationAddressDetails': registration_address_details or ''
+            },
+            'tuition': {
+                'total': float(tuition_total),
+                'paid': float(tuition_paid)
+            },
+            'registrationFee': {
+                'total': float(registration_fee_total),
+                'paid': float(registration_fee_paid)
+            },
+            'dormitory': dormitory,
+        })
+
+    return select_fields(results, fields)
+
+
+def select_fields(items, fields=None):
+    """Apply a ?fields=id,fullName sparse fieldset to representations"""
+    if not fields:
+        return items
+    keep = {name.strip() for name in fields.split(',')}
+    return [{name: value for name, value in item.items() if name in keep} for item in items]
+
+
+@timed('serialize')
+def represent_cached_students(rows, batch_size=500):
+    """
+    Representations for rows carrying id and updated_at, in row order. Hits
+    come from the row cache in one get_many; misses are read with the
+    values_list fast path and stored for the next request.
+    """
+    keys = [row_cache_key(row.id, row.updated_at) for row in rows]
+    cache = row_cache()
+    found = cache.get_many(keys)
+    missing = {row.id: key for row, key in zip(rows, keys) if key not in found}
+    if missing:
+        missing_ids = list(missing)
+        fresh = {}
+        for start in range(0, len(missing_ids), batch_size):
+            batch = Student.objects.filter(id__in=missing_ids[start:start + batch_size])
+            for item in represent_student_rows(batch.values_list(*STUDENT_ROW_FIELDS)):
+                fresh[missing[item['id']]] = item
+        cache.set_many(fresh, timeout=None)
+        found.update(fresh)
+    # A row deleted since it was listed has no representation
+    return [found[key] for key in keys if key in found]
@@ -0,0 +1,68 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .cache import bump_version
+from .models import Student, StudentStats
+
+
+def rebuild_stats(today=None):
+    """Recompute today's StudentStats row from the Student table"""
+    today = today or timezone.now().date()
+    live = Student.objects.dashboard_stats(today=today)
+    stats, _ = StudentStats.objects.update_or_create(day=today, defaults=live)
+    bump_version()
+    return stats
+
+
+def get_stats(today=None):
+    """Current dashboard counters, rebuilding the row on the first read of a day"""
+    today = today or timezone.now().date()
+    stats = StudentStats.objects.filter(day=today).first()
+    if stats is None:
+        stats = rebuild_stats(today)
+    return stats.as_dict()
+
+
+def represent_stats(stats):
+    """get_stats() counters in the /students/stats/ response shape"""
+    return {
+        'totalStudents': stats['total_students'],
+        'fullyPaid': stats['fully_paid'],
+        'expiringRegistration': stats['expiring_registration'],
+        'dormitoryResidents': stats['dormitory_residents'],
+        'outstandingDebt': float(stats['outstanding_debt']),
+    }
+
+
+def apply_stats_delta(before=None, after=None, today=None):
+    """
+    Shift today's counters by the difference between two stats_contribution()
+    results. Pass before=None for a new student and after=None for a deleted one.
+    """
+    today = today or timezone.now().date()
+    delta = {}
+    for name in StudentStats.COUNTERS:
+        change = (after or {}).get(name, 0) - (before or {}).get(name, 0)
+        if change:
+            delta[name] = F(name) + change
+    if not delta:
+        return
+
+    def apply():
+        if not StudentStats.objects.filter(day=today).update(**delta):
+            # No row yet today: the rebuild already sees the committed change
+            rebuild_stats(today)
+        else:
+            bump_version()
+
+    transaction.on_commit(apply)
+
+
+def merge_contributions(contributions):
+    """Sum several stats_contribution() results, e.g. for a bulk import"""
+    total = {}
+    for contribution in contributions:
+        for name, value in contribution.items():
+            total[name] = total.get(name, 0) + value
+    return total
@@ -0,0 +1,199 @@
+import random
+from itertools import accumulate
+from datetime import date, timedelta
+from decimal import Decimal
+
+from .models import Student
+
+
+# Realistic, seed-deterministic synthetic students for benchmarks and
+# capacity tests (create_demo_data --count). Weights are relative.
+
+# Name pools: (first names, last names)
+CENTRAL_ASIAN_NAMES = (
+    ['Aziz', 'Bekzod', 'Dilnoza', 'Farrukh', 'Gulnora', 'Jamshid', 'Kamola', 'Madina', 'Nodir', 'Rustam',
+     'Sardor', 'Shahnoza', 'Timur', 'Zarina', 'Aigerim', 'Merdan', 'Ogulgerek', 'Firuz', 'Nilufar', 'Daniyar'],
+    ['Aliyev', 'Karimov', 'Rahimov', 'Saidov', 'Tursunov', 'Yusupov', 'Nazarov', 'Ergashev', 'Orazov',
+     'Berdiyev', 'Nurmatov', 'Sultanov', 'Abdullayev', 'Kasymov', 'Annayev'],
+)
+AFGHAN_NAMES = (
+    ['Ahmad', 'Mohammad', 'Zahra', 'Farid', 'Mariam', 'Omid', 'Hamid', 'Nazanin', 'Wahid', 'Soraya'],
+    ['Ahmadzai', 'Rahimi', 'Karimi', 'Hashimi', 'Noori', 'Sultani', 'Stanikzai', 'Haidari'],
+)
+SOUTH_ASIAN_NAMES = (
+    ['Aarav', 'Priya', 'Rahul', 'Ananya', 'Ali', 'Fatima', 'Hassan', 'Ayesha', 'Rohan', 'Sana', 'Vikram',
+     'Zainab', 'Arjun', 'Hira', 'Imran'],
+    ['Sharma', 'Patel', 'Khan', 'Singh', 'Gupta', 'Ahmed', 'Qureshi', 'Iyer', 'Reddy', 'Malik', 'Chaudhry'],
+)
+CHINESE_NAMES = (
+    ['Wei', 'Fang', 'Jing', 'Hao', 'Lei', 'Yan', 'Min', 'Xin', 'Jun', 'Li'],
+    ['Wang', 'Li', 'Zhang', 'Liu', 'Chen', 'Yang', 'Huang', 'Zhao', 'Zhou', 'Wu'],
+)
+KOREAN_NAMES = (
+    ['Min-jun', 'Ji-woo', 'Seo-yeon', 'Do-yun', 'Ha-eun', 'Ji-ho', 'Su-bin'],
+    ['Kim', 'Lee', 'Park', 'Choi', 'Jung', 'Kang', 'Yoon'],
+)
+RUSSIAN_NAMES = (
+    ['Alexander', 'Anna', 'Dmitry', 'Elena', 'Ivan', 'Maria', 'Sergey', 'Olga', 'Nikita', 'Daria'],
+    ['Ivanov', 'Petrov', 'Smirnov', 'Kuznetsov', 'Popov', 'Volkov', 'Sokolov', 'Morozov'],
+)
+ENGLISH_NAMES = (
+    ['John', 'Emily', 'Michael', 'Sarah', 'David', 'Jessica', 'Daniel', 'Ashley', 'James', 'Olivia'],
+    ['Smith', 'Johnson', 'Williams', 'Brown', 'Jones', 'Miller', 'Davis', 'Wilson'],
+)
+TURKISH_NAMES = (
+    ['Emre', 'Elif', 'Burak', 'Zeynep', 'Mehmet', 'Ayse', 'Can', 'Selin'],
+    ['Yilmaz', 'Kaya', 'Demir', 'Sahin', 'Celik', 'Ozturk', 'Arslan'],
+)
+
+# citizenship: (weight, passport code, phone code, names, language weights Russian/English/Uzbek)
+CITIZENSHIP_PROFILES = {
+    'Turkmenistan': (22, 'TM', '+993', CENTRAL_ASIAN_NAMES, (70, 20, 10)),
+    'Tajikistan': (12, 'TJ', '+992', CENTRAL_ASIAN_NAMES, (60, 15, 25)),
+    'India': (12, 'IN', '+91', SOUTH_ASIAN_NAMES, (5, 95, 0)),
+    'Afghanistan': (10, 'AF', '+93', AFGHAN_NAMES, (20, 40, 40)),
+    'Kazakhstan': (9, 'KZ', '+7', CENTRAL_ASIAN_NAMES, (80, 15, 5)),
+    'Pakistan': (8, 'PK', '+92', SOUTH_ASIAN_NAMES, (5, 95, 0)),
+    'Kyrgyzstan': (7, 'KG', '+996', CENTRAL_ASIAN_NAMES, (75, 15, 10)),
+    'China': (6, 'CN', '+86', CHINESE_NAMES, (40, 60, 0)),
+    'Russia': (5, 'RU', '+7', RUSSIAN_NAMES, (95, 5, 0)),
+    'South Korea': (3, 'KR', '+82', KOREAN_NAMES, (30, 70, 0)),
+    'Uzbekistan': (3, 'UZ', '+998', CENTRAL_ASIAN_NAMES, (30, 20, 50)),
+    'Turkey': (2, 'TR', '+90', TURKISH_NAMES, (20, 70, 10)),
+    'USA': (1, 'US', '+1', ENGLISH_NAMES, (0, 100, 0)),
+}
+CITIZENSHIPS = list(CITIZENSHIP_PROFILES)
+LANGUAGES = ['Russian', 'English', 'Uzbek']
+
+# major: (weight, group code, years of study, yearly tuition)
+MAJOR_PROFILES = {
+    'General Medicine': (35, 'MED', 6, Decimal('3500')),
+    'Computer Science': (20, 'CS', 4, Decimal('2800')),
+    'International Business': (15, 'IB', 4, Decimal('2800')),
+    'Economics': (15, 'EC', 4, Decimal('2500')),
+    'Law': (8, 'LAW', 4, Decimal('2500')),
+    'Pedagogy': (7, 'PED', 4, Decimal('2200')),
+}
+MAJORS = list(MAJOR_PROFILES)
+# Relative size of each course year: later years have fewer students left
+COURSE_YEAR_WEIGHTS = [30, 25, 20, 15, 6, 4]
+GROUP_SIZE = 25
+
+REGISTRATION_FEE = Decimal('300')
+DORMITORY_RATES = {'Normal': Decimal('40'), 'VIP': Decimal('80')}
+DORMITORY_BUILDINGS = 4
+ADDRESSES = [
+    'Tashkent, Chilonzor district', 'Tashkent, Yunusobod district', 'Tashkent, Mirzo Ulugbek district',
+    'Tashkent, Yakkasaroy district', 'Tashkent, Shayxontohur district', 'Tashkent, Sergeli district',
+]
+
+# Cumulative weights for rng.choices: much faster than re-summing per call
+_citizenship_weights = list(accumulate(profile[0] for profile in CITIZENSHIP_PROFILES.values()))
+_major_weights = list(accumulate(profile[0] for profile in MAJOR_PROFILES.values()))
+_language_weights = {name: list(accumulate(profile[4])) for name, profile in CITIZENSHIP_PROFILES.items()}
+_course_year_weights = {name: list(accumulate(COURSE_YEAR_WEIGHTS[:profile[2]])) for name, profile in MAJOR_PROFILES.items()}
+_dormitory_weights = list(accumulate([62, 30, 8]))
+
+
+def _digits(rng, count):
+    return str(rng.randrange(10 ** (count - 1), 10 ** count))
+
+
+def generate_students(count, seed=42, today=None, id_prefix='SYN', ids=None):
+    """
+    Yield unsaved synthetic students, the same ones for the same seed. ids
+    (e.g. from allocate_student_ids) replaces the default SYN-000001 series.
+
+    About 60% owe tuition (10% have paid none), 4% of visas have expired
+    and 8% end within 30 days, 9% of registrations are overdue and 38% of
+    students live in a dormitory, a fifth of them paid up for the year.
+    """
+    rng = random.Random(seed)
+    today = today or date.today()
+    # Academic years start on 1 September
+    year_start = date(today.year if today.month >= 9 else today.year - 1, 9, 1)
+    if ids is None:
+        ids = (f'{id_prefix}-{number:06d}' for number in range(1, count + 1))
+    # Enough sections per major and course year for about GROUP_SIZE students each
+    sections = {}
+    for major, (weight, _, years, _) in MAJOR_PROFILES.items():
+        year_weights = COURSE_YEAR_WEIGHTS[:years]
+        for course_year, year_weight in enumerate(year_weights, start=1):
+            share = weight / _major_weights[-1] * year_weight / sum(year_weights)
+            sections[major, course_year] = max(round(count * share / GROUP_SIZE), 1)
+
+    for number, student_id in zip(range(1, count + 1), ids):
+        citizenship = rng.choices(CITIZENSHIPS, cum_weights=_citizenship_weights)[0]
+        _, passport_code, phone_code, (first_names, last_names), _ = CITIZENSHIP_PROFILES[citizenship]
+        major = rng.choices(MAJORS, cum_weights=_major_weights)[0]
+        _, major_code, years, tuition = MAJOR_PROFILES[major]
+        course_year = rng.choices(range(1, years + 1), cum_weights=_course_year_weights[major])[0]
+        entry_year = year_start.year - course_year + 1
+        first_name, last_name = rng.choice(first_names), rng.choice(last_names)
+
+        # Visas run a year from the start date, registrations 90 days
+        visa_start = today - timedelta(days=rng.randint(0, 380))
+        if rng.random() < 0.95:
+            registration_end = min(today + timedelta(days=rng.randint(1, 90)), visa_start + timedelta(days=365))
+        else:
+            registration_end = today - timedelta(days=rng.randint(1, 30))
+
+        tuition_mix = rng.random()
+        if tuition_mix < 0.4:
+            tuition_paid = tuition
+        elif tuition_mix < 0.7:
+            tuition_paid = tuition / 2
+        elif tuition_mix < 0.9:
+            tuition_paid = Decimal(rng.randrange(0, int(tuition), 100))
+        else:
+            tuition_paid = Decimal('0')
+        fee_mix = rng.random()
+        fee_paid = REGISTRATION_FEE if fee_mix < 0.85 else REGISTRATION_FEE / 2 if fee_mix < 0.9 else Decimal('0')
+
+        dormitory_status = rng.choices(['None', 'Normal', 'VIP'], cum_weights=_dormitory_weights)[0]
+        student = Student(
+            id=student_id,
+            full_name=f'{last_name} {first_name}',
+            date_of_birth=date(entry_year - 19, 1, 1) + timedelta(days=rng.randint(0, 3 * 365)),
+            passport_number=f'{passport_code}{student_id.replace("-", "")}',
+            jshir=_digits(rng, 14) if rng.random() < 0.7 else '',
+            citizenship=citizenship,
+            phone=f'{phone_code} {_digits(rng, 9)}',
+            email=f'{first_name}.{last_name}{number}@example.com'.lower(),
+            emergency_contact_name=f'{last_name} {rng.choice(first_names)}',
+            emergency_contact_phone=f'{phone_code} {_digits(rng, 9)}',
+            group=f'{major_code}-{entry_year % 100:02d}-{rng.randint(1, sections[major, course_year])}',
+            course_year=course_year,
+            major=major,
+            language=rng.choices(LANGUAGES, cum_weights=_language_weights[citizenship])[0],
+            visa_start_date=visa_start,
+            visa_end_date=visa_start + timedelta(days=365),
+            registration_start_date=registration_end - timedelta(days=90),
+            registration_end_date=registration_end,
+            registration_address_type='Other' if dormitory_status == 'None' else 'Dormitory',
+            registration_address_details=rng.choice(ADDRESSES),
+            tuition_total=tuition,
+            tuition_paid=tuition_paid,
+            registration_fee_total=REGISTRATION_FEE,
+            registration_fee_paid=fee_paid,
+            dormitory_status=dormitory_status,
+        )
+        if dormitory_status != 'None':
+            rate = DORMITORY_RATES[dormitory_status]
+            check_in = year_start + timedelta(days=rng.randint(0, 20)) if rng.random() < 0.8 else (
+                today - timedelta(days=rng.randint(0, max((today - year_start).days, 0)))
+            )
+            months_stayed = max((today - check_in).days // 30 + 1, 1)
+            student.registration_address_details = (
+                f'Dormitory {rng.randint(1, DORMITORY_BUILDINGS)}, Room {rng.randint(1, 5)}{rng.randint(1, 40):02d}'
+            )
+            student.dormitory_check_in_date = check_in
+            student.dormitory_planned_checkout_date = year_start.replace(year=year_start.year + 1) - timedelta(days=60)
+            student.dormitory_monthly_rate = rate
+            if rng.random() < 0.2:
+                # Paid the whole stay up front
+                student.dormitory_paid_amount = student.calculate_balances()['dormitory_planned_total']
+            else:
+                # Month by month; some are behind, a few ahead
+                student.dormitory_paid_amount = rate * max(months_stayed + rng.choice([-2, -1, 0, 0, 0, 1]), 0)
+        yield student
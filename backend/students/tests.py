@@ -0,0 +1,768 @@
+import json
+import threading
+from datetime import date
+from unittest import mock, skipUnless
+
+from asgiref.sync import async_to_sync
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.db import connection, transaction
+from django.test import AsyncClient, TestCase, TransactionTestCase, override_settings
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from .cache import row_cache
+from .changes import latest_change_id, read_changes, student_delta
+from .ids import allocate_student_ids
+from .jsonlib import dumps
+from .models import Student, StudentChange, StudentStats
+from .serializers import STUDENT_ROW_FIELDS, StudentSerializer, represent_student_rows
+from .search import get_search_backend
+from .stats import get_stats, rebuild_stats
+
+
+def student_payload(passport, **overrides):
+    payload = {
+        'id': 'NEW',
+        'fullName': f'Student {passport}',
+        'dateOfBirth': '2000-01-01',
+        'passportNumber': passport,
+        'citizenship': 'Uzbekistan',
+        'emergencyContactName': 'Parent',
+        'emergencyContactPhone': '+998 90 000 00 00',
+        'academic': {'group': 'CS-1', 'courseYear': 2, 'major': 'CS', 'language': 'English'},
+        'visa': {'visaType': 'Student Visa', 'registrationAddressType': 'Dormitory'},
+        'tuition': {'total': 2800, 'paid': 0},
+        'registrationFee': {'total': 300, 'paid': 0},
+        'dormitory': {'status': 'None'},
+    }
+    payload.update(overrides)
+    return payload
+
+
+class StudentIdAllocationTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+
+    def create(self, passport, **overrides):
+        return self.client.post('/api/students/', student_payload(passport, **overrides), format='json')
+
+    def test_allocator_skips_explicit_ids(self):
+        self.assertEqual(self.create('P1').data['id'], 'STU-001')
+        self.assertEqual(self.create('P2').data['id'], 'STU-002')
+        self.assertEqual(self.create('P3', id='STU-003').status_code, 201)
+        response = self.create('P4')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['id'], 'STU-004')
+
+    def test_import_advances_past_explicit_ids(self):
+        response = self.client.post(
+            '/api/students/bulk-import/', [student_payload('P1', id='STU-010'), student_payload('P2')], format='json'
+        )
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['created'], 2)
+        # P2 took STU-001; STU-010 was written explicitly
+        self.assertEqual(self.create('P3').data['id'], 'STU-011')
+
+    def test_import_reports_repeated_ids(self):
+        rows = [student_payload('P1', id='STU-010'), student_payload('P2', id='STU-010')]
+        response = self.client.post('/api/students/bulk-import/', rows, format='json')
+        self.assertEqual(response.status_code, 400, response.data)
+        self.assertEqual(response.data['errors'], [
+            {'row': 2, 'passportNumber': 'P2', 'errors': {'id': ['1-qatorda takrorlangan']}},
+        ])
+        self.assertFalse(Student.objects.exists())
+
+    def test_import_reports_overlong_ids(self):
+        response = self.client.post(
+            '/api/students/bulk-import/', [student_payload('P1', id='STU-' + '9' * 30)], format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(list(response.data['errors'][0]['errors']), ['id'])
+        self.assertFalse(Student.objects.exists())
+
+
+class ConcurrentIdAllocationTests(TransactionTestCase):
+    threads = 8
+    reservations = 10
+
+    def test_threads_get_unique_ids(self):
+        Student.objects.create(
+            id='STU-005', full_name='Existing', date_of_birth='2000-01-01', passport_number='P0',
+            citizenship='Uzbekistan', group='CS-1', course_year=1, major='CS',
+        )
+        results, errors = [], []
+        start = threading.Barrier(self.threads)
+
+        def worker():
+            try:
+                start.wait()
+                for _ in range(self.reservations):
+                    results.extend(allocate_student_ids(2))
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=worker) for _ in range(self.threads)]
+        for thread in workers:
+            thread.start()
+        for thread in workers:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        expected = self.threads * self.reservations * 2
+        self.assertEqual(len(set(results)), len(results))
+        self.assertEqual(sorted(results), [f'STU-{number:03d}' for number in range(6, 6 + expected)])
+
+
+class AsyncStudentListTests(TestCase):
+    def test_search_resolves_backend_outside_event_loop(self):
+        user = User.objects.create_user('admin', password='admin')
+        client = APIClient()
+        client.force_authenticate(user)
+        client.post('/api/students/', student_payload('P1', fullName='Ali Valiyev'), format='json')
+        client.post('/api/students/', student_payload('P2', fullName='Bobur Karimov'), format='json')
+        token = AccessToken.for_user(user)
+        # A cold cache makes 'auto' introspect the database
+        get_search_backend.cache_clear()
+        self.addCleanup(get_search_backend.cache_clear)
+        response = async_to_sync(AsyncClient().get)(
+            '/api/async/students/', {'search': 'Ali'}, headers={'Authorization': f'Bearer {token}'}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([row['id'] for row in response.json()['results']], ['STU-001'])
+
+
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_staff_can_sign_in_together(self):
+        for number in range(4):
+            User.objects.create_user(f'staff{number}', password='secret')
+        # Every login falls in the same one-second hashing window
+        with mock.patch('students.throttling.time.time', return_value=1_700_000_000.0):
+            statuses = [
+                APIClient().post('/api/auth/login/', {'username': f'staff{number}', 'password': 'secret'}).status_code
+                for number in range(4)
+            ]
+        self.assertEqual(statuses, [200] * 4)
+
+    def test_non_string_credentials_rejected(self):
+        for payload in ({'username': 123, 'password': 'secret'}, {'username': 'staff', 'password': ['secret']}):
+            response = APIClient().post('/api/auth/login/', payload, format='json')
+            self.assertEqual(response.status_code, 400)
+
+
+class CachedUserRevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+
+    def test_password_change_revokes_cached_user(self):
+        user = User.objects.create_user('admin', password='old-secret')
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f'Bearer {AccessToken.for_user(user)}')
+        self.assertEqual(client.get('/api/students/').status_code, 200)
+
+        # As the admin form and changepassword do: the instance never saw the old hash
+        user = User.objects.get(pk=user.pk)
+        user.set_password('new-secret')
+        user.save()
+        self.assertEqual(client.get('/api/students/').status_code, 401)
+
+
+class MetricsAccessTests(TestCase):
+    def get(self, token=None):
+        client = APIClient()
+        if token:
+            client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        return client.get('/api/metrics')
+
+    @override_settings(METRICS_TOKEN='')
+    def test_closed_without_token(self):
+        self.assertEqual(self.get().status_code, 403)
+        user = User.objects.create_user('teacher', password='secret')
+        self.assertEqual(self.get(AccessToken.for_user(user)).status_code, 403)
+
+    @override_settings(METRICS_TOKEN='')
+    def test_staff_can_read(self):
+        user = User.objects.create_user('admin', password='secret', is_staff=True)
+        response = self.get(AccessToken.for_user(user))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b'student_api_request_duration_seconds', response.content)
+
+    @override_settings(METRICS_TOKEN='scrape-me')
+    def test_token_opens_metrics(self):
+        self.assertEqual(self.get('scrape-me').status_code, 200)
+        self.assertEqual(self.get('wrong').status_code, 403)
+
+
+class ResponseCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+
+    def test_replica_body_not_served_to_primary_reads(self):
+        with mock.patch('students.cache.reads_from_replica', return_value=True):
+            self.assertEqual(self.client.get('/api/students/').data['count'], 0)
+        # The lagging replica body was cached under the version that already
+        # includes this write; a primary read must not reuse it
+        with self.captureOnCommitCallbacks(execute=False):
+            self.client.post('/api/students/', student_payload('P1'), format='json')
+        self.assertEqual(self.client.get('/api/students/').data['count'], 1)
+
+
+class RowCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        row_cache().clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+
+    def test_write_through_caches_stored_values(self):
+        payload = student_payload('P1')
+        payload['academic']['courseYear'] = '3'
+        created = self.client.post('/api/students/', payload, format='json')
+        self.assertEqual(created.data['academic']['courseYear'], 3)
+        student_id = created.data['id']
+        self.assertEqual(self.client.get(f'/api/students/{student_id}/').data['academic']['courseYear'], 3)
+
+        self.client.patch(f'/api/students/{student_id}/', {'tuition': {'paid': '100.50'}}, format='json')
+        row = self.client.get('/api/students/').data['results'][0]
+        self.assertEqual(row['academic']['courseYear'], 3)
+        self.assertEqual(row['tuition']['paid'], 100.5)
+
+
+class StatsDeltaTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        rebuild_stats()
+
+    def write(self, func, *args, **kwargs):
+        # Deltas are applied on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return func(*args, **kwargs)
+
+    def assertStatsMatchLive(self):
+        self.assertEqual(get_stats(), Student.objects.dashboard_stats())
+
+    def make(self, student_id, **fields):
+        values = dict(
+            id=student_id, full_name=f'Student {student_id}', date_of_birth=date(2000, 1, 1),
+            passport_number=f'P-{student_id}', citizenship='Uzbekistan', group='CS-1', course_year=1, major='CS',
+        )
+        values.update(fields)
+        return Student(**values)
+
+    def test_model_save_and_delete(self):
+        student = self.make('STU-001')
+        self.write(student.save)
+        self.assertStatsMatchLive()
+        student = Student.objects.get(pk='STU-001')
+        student.tuition_paid = student.tuition_total
+        student.registration_fee_paid = student.registration_fee_total
+        self.write(student.save)
+        self.assertEqual(get_stats()['fully_paid'], 1)
+        self.assertStatsMatchLive()
+        self.write(student.delete)
+        self.assertStatsMatchLive()
+
+    def test_save_without_loaded_row(self):
+        self.write(self.make('STU-001').save)
+        student = Student.objects.only('id').get(pk='STU-001')
+        student.dormitory_status = 'Normal'
+        self.write(student.save, update_fields=['dormitory_status'])
+        self.assertEqual(get_stats()['dormitory_residents'], 1)
+        self.assertStatsMatchLive()
+
+    def test_queryset_writes(self):
+        self.write(Student.objects.bulk_create, [self.make(f'STU-00{number}') for number in range(1, 4)])
+        self.assertStatsMatchLive()
+        self.write(Student.objects.filter(pk='STU-001').update, dormitory_status='VIP')
+        self.assertStatsMatchLive()
+        students = list(Student.objects.filter(pk__in=['STU-002', 'STU-003']))
+        for student in students:
+            student.tuition_paid = student.tuition_total
+            student.registration_fee_paid = student.registration_fee_total
+        self.write(Student.objects.bulk_update, students, ['tuition_paid', 'registration_fee_paid'])
+        self.assertEqual(get_stats()['fully_paid'], 2)
+        self.assertStatsMatchLive()
+        self.write(Student.objects.filter(pk__in=['STU-001', 'STU-002']).delete)
+        self.assertStatsMatchLive()
+        self.write(Student.objects.bulk_insert, [self.make('STU-010', dormitory_status='Normal')])
+        self.assertStatsMatchLive()
+        self.assertEqual(StudentStats.objects.count(), 1)
+
+    def test_api_writes(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        created = self.write(client.post, '/api/students/', student_payload('P1'), format='json')
+        student_id = created.data['id']
+        self.write(client.patch, f'/api/students/{student_id}/', {'dormitory': {'status': 'VIP'}}, format='json')
+        self.assertStatsMatchLive()
+        payments = [
+            {'id': student_id, 'kind': 'tuition', 'amount': 2800},
+            {'id': student_id, 'kind': 'registrationFee', 'amount': 300},
+        ]
+        self.write(client.post, '/api/students/bulk-payments/', payments, format='json')
+        self.assertEqual(get_stats()['fully_paid'], 1)
+        self.assertStatsMatchLive()
+        imported = [student_payload('P1', tuition={'total': 5000, 'paid': 0}), student_payload('P2')]
+        self.write(client.post, '/api/students/bulk-import/?upsert=true', imported, format='json')
+        self.assertEqual(get_stats()['total_students'], 2)
+        self.assertStatsMatchLive()
+        self.write(client.delete, f'/api/students/{student_id}/')
+        self.assertStatsMatchLive()
+
+
+class ChangeLogOrderTests(TransactionTestCase):
+    reset_sequences = True
+
+    def test_later_writer_waits_for_open_change(self):
+        recorded, release = threading.Event(), threading.Event()
+        errors = []
+
+        def writer(student_id, hold):
+            try:
+                with transaction.atomic():
+                    StudentChange.record(StudentChange.UPDATED, [student_id])
+                    recorded.set()
+                    if hold:
+                        release.wait(10)
+            except Exception as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        slow = threading.Thread(target=writer, args=('STU-001', True))
+        slow.start()
+        recorded.wait(10)
+        fast = threading.Thread(target=writer, args=('STU-002', False))
+        fast.start()
+        fast.join(0.5)
+        # The later change must not be readable, and a token handed out,
+        # while the earlier one can still commit below it
+        self.assertTrue(fast.is_alive())
+        self.assertEqual(latest_change_id(), 0)
+        release.set()
+        slow.join()
+        fast.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual(
+            list(StudentChange.objects.values_list('student_id', flat=True)), ['STU-001', 'STU-002']
+        )
+        self.assertEqual(student_delta(0)['deleted'], ['STU-001', 'STU-002'])
+
+    def test_feed_waits_for_open_change(self):
+        recorded, release = threading.Event(), threading.Event()
+
+        def writer(student_id, hold):
+            with transaction.atomic():
+                StudentChange.record(StudentChange.DELETED, [student_id])
+                recorded.set()
+                if hold:
+                    release.wait(10)
+            connection.close()
+
+        slow = threading.Thread(target=writer, args=('STU-001', True))
+        slow.start()
+        recorded.wait(10)
+        fast = threading.Thread(target=writer, args=('STU-002', False))
+        fast.start()
+        fast.join(0.5)
+        self.assertEqual(read_changes(0), (0, ''))
+        release.set()
+        slow.join()
+        fast.join()
+
+        last_id, chunk = read_changes(0)
+        self.assertEqual(last_id, 2)
+        self.assertEqual(
+            [line for line in chunk.splitlines() if line.startswith('data: {"id"')],
+            ['data: {"id":"STU-001"}', 'data: {"id":"STU-002"}'],
+        )
+
+
+class QuerySetUpdateTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        self.student_id = self.client.post('/api/students/', student_payload('P1'), format='json').data['id']
+
+    def test_update_refreshes_payment_status_and_timestamp(self):
+        before = Student.objects.get(pk=self.student_id)
+        etag = self.client.get(f'/api/students/{self.student_id}/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Student.objects.filter(pk=self.student_id).update(tuition_paid=2800, registration_fee_paid=300)
+
+        student = Student.objects.get(pk=self.student_id)
+        self.assertGreater(student.updated_at, before.updated_at)
+        self.assertTrue(student.is_fully_paid)
+        self.assertEqual(student.total_debt, 0)
+        self.assertNotEqual(student.etag, etag)
+        response = self.client.get(f'/api/students/{self.student_id}/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['tuition']['paid'], 2800)
+        change = StudentChange.objects.latest('id')
+        self.assertIn('is_fully_paid', change.fields)
+
+
+class JSONLibraryTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        self.client.post('/api/students/', student_payload('P1'), format='json')
+
+    def test_same_document_and_etag_with_either_library(self):
+        data = {'amount': 1e16, 'small': 1e-7, 'name': 'Oʻzbek \u2028'}
+        bodies, etags = [], []
+        for library in ('json', 'orjson'):
+            with override_settings(API_JSON_LIBRARY=library):
+                bodies.append(json.loads(dumps(data)))
+                cache.clear()
+                etags.append(self.client.get('/api/students/STU-001/')['ETag'])
+        self.assertEqual(bodies, [data, data])
+        self.assertEqual(etags[0], etags[1])
+
+
+class SearchIndexTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        for passport, name in [('P1', 'Ali Valiyev'), ('P2', 'Bobur Karimov'), ('P3', 'Dilshod Aliyev')]:
+            self.client.post('/api/students/', student_payload(passport, fullName=name), format='json')
+
+    def search(self, term):
+        queryset = get_search_backend('sqlite_fts').search(Student.objects.all(), term)
+        return sorted(queryset.values_list('full_name', flat=True))
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite FTS5 index')
+    def test_index_survives_renumbered_rowids(self):
+        # What VACUUM may do to a table whose primary key is not an INTEGER
+        with connection.cursor() as cursor:
+            cursor.execute('UPDATE students_student SET rowid = rowid + 1000')
+        self.assertEqual(self.search('bobur'), ['Bobur Karimov'])
+        Student.objects.filter(full_name='Bobur Karimov').update(full_name='Bobur Aliyev')
+        Student.objects.filter(full_name='Ali Valiyev').delete()
+        self.client.post('/api/students/', student_payload('P4', fullName='Aziz Aliyev'), format='json')
+        self.assertEqual(self.search('aliyev'), ['Aziz Aliyev', 'Bobur Aliyev', 'Dilshod Aliyev'])
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO students_student_fts(students_student_fts, rank) VALUES ('integrity-check', 1)")
+
+
+class BulkPaymentTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        rebuild_stats()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        with self.captureOnCommitCallbacks(execute=True):
+            created = self.client.post('/api/students/', student_payload('P1'), format='json')
+        self.student_id = created.data['id']
+        self.payments = [
+            {'id': self.student_id, 'kind': 'tuition', 'amount': 2800},
+            {'id': self.student_id, 'kind': 'registrationFee', 'amount': 300},
+            {'id': 'STU-999', 'kind': 'tuition', 'amount': 100},
+            {'id': self.student_id, 'kind': 'dormitory', 'amount': 0},
+        ]
+
+    def post(self, path):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(path, self.payments, format='json')
+
+    def test_failed_row_cancels_the_batch(self):
+        response = self.post('/api/students/bulk-payments/')
+        self.assertEqual(response.status_code, 400, response.data)
+        self.assertEqual(response.data['applied'], 0)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']], ['skipped', 'skipped', 'error', 'error']
+        )
+        self.assertEqual(response.data['results'][2]['errors'], ['Talaba topilmadi'])
+        student = Student.objects.get(pk=self.student_id)
+        self.assertEqual((student.tuition_paid, student.registration_fee_paid), (0, 0))
+        self.assertFalse(StudentChange.objects.filter(action=StudentChange.UPDATED).exists())
+
+    def test_partial_applies_valid_rows(self):
+        response = self.post('/api/students/bulk-payments/?partial=true')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(response.data['applied'], 2)
+        self.assertEqual(
+            [result['status'] for result in response.data['results']], ['applied', 'applied', 'error', 'error']
+        )
+        student = Student.objects.get(pk=self.student_id)
+        self.assertTrue(student.is_fully_paid)
+        self.assertEqual(student.total_debt, 0)
+        self.assertEqual(get_stats()['fully_paid'], 1)
+        self.assertEqual(get_stats(), Student.objects.dashboard_stats())
+
+    def test_paid_amount_cannot_go_negative(self):
+        self.payments = [{'id': self.student_id, 'kind': 'tuition', 'amount': -1}]
+        response = self.post('/api/students/bulk-payments/?partial=true')
+        self.assertEqual(response.data['applied'], 0)
+        self.assertEqual(response.data['results'][0]['status'], 'error')
+
+
+class ImportRowErrorTests(TestCase):
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        self.client.post('/api/students/', student_payload('P1'), format='json')
+        self.rows = [
+            student_payload('P2'),
+            student_payload('P1'),
+            student_payload('P3', dateOfBirth='not a date'),
+            student_payload('P2'),
+            'P4',
+        ]
+
+    def import_rows(self, query=''):
+        return self.client.post(f'/api/students/bulk-import/{query}', self.rows, format='json')
+
+    def test_errors_numbered_by_row_and_nothing_written(self):
+        response = self.import_rows()
+        self.assertEqual(response.status_code, 400, response.data)
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3, 4, 5])
+        errors = {error['row']: error['errors'] for error in response.data['errors']}
+        self.assertEqual(errors[2], {'passport_number': ['Bu pasport raqamli talaba allaqachon mavjud']})
+        self.assertIn('date_of_birth', errors[3])
+        self.assertEqual(errors[4], {'passport_number': ['1-qatorda takrorlangan']})
+        self.assertEqual(errors[5], {'__all__': ['Qator obyekt boʻlishi kerak']})
+        self.assertEqual(response.data['created'], 0)
+        self.assertEqual(Student.objects.count(), 1)
+
+    def test_dry_run_and_partial(self):
+        response = self.import_rows('?dry_run=true')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual(len(response.data['errors']), 4)
+        self.assertEqual(Student.objects.count(), 1)
+
+        response = self.import_rows('?partial=true')
+        self.assertEqual(response.status_code, 200, response.data)
+        self.assertEqual((response.data['created'], len(response.data['errors'])), (1, 4))
+        self.assertTrue(Student.objects.filter(passport_number='P2').exists())
+
+
+class DeltaSyncTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        for passport in ['P1', 'P2', 'P3']:
+            self.write(self.client.post, '/api/students/', student_payload(passport), format='json')
+
+    def write(self, func, *args, **kwargs):
+        # The response cache version is bumped on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return func(*args, **kwargs)
+
+    def sync(self, token=None):
+        response = self.client.get('/api/students/changes/', {'since': token} if token else {})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_changes_and_tombstones_since_token(self):
+        first = self.sync()
+        self.assertTrue(first['reset'])
+        self.assertEqual([student['id'] for student in first['students']], ['STU-003', 'STU-002', 'STU-001'])
+
+        self.write(self.client.patch, '/api/students/STU-001/', {'fullName': 'Ali Valiyev'}, format='json')
+        self.write(self.client.delete, '/api/students/STU-002/')
+        self.write(self.client.post, '/api/students/', student_payload('P4'), format='json')
+        delta = self.sync(first['token'])
+        self.assertFalse(delta['reset'])
+        self.assertEqual([student['id'] for student in delta['students']], ['STU-004', 'STU-001'])
+        self.assertEqual(delta['students'][1]['fullName'], 'Ali Valiyev')
+        self.assertEqual(delta['deleted'], ['STU-002'])
+
+        latest = self.sync(delta['token'])
+        self.assertEqual((latest['token'], latest['students'], latest['deleted']), (delta['token'], [], []))
+
+    def test_unknown_token_resets(self):
+        self.assertTrue(self.sync('999999')['reset'])
+        self.assertTrue(self.sync('not-a-token')['reset'])
+
+
+class ChangeFeedTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        rebuild_stats()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        with self.captureOnCommitCallbacks(execute=True):
+            for passport in ['P1', 'P2']:
+                self.client.post('/api/students/', student_payload(passport), format='json')
+
+    def events(self, text):
+        events = []
+        for block in text.strip().split('\n\n'):
+            fields = dict(line.split(': ', 1) for line in block.split('\n'))
+            events.append((fields['event'], json.loads(fields['data'])))
+        return events
+
+    def test_events_after_id(self):
+        after = latest_change_id()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch('/api/students/STU-001/', {'tuition': {'paid': 500}}, format='json')
+            self.client.delete('/api/students/STU-002/')
+        last_id, text = read_changes(after)
+        self.assertEqual(last_id, latest_change_id())
+        events = self.events(text)
+        self.assertEqual([event for event, _ in events], ['updated', 'deleted', 'stats'])
+        self.assertEqual(events[0][1], {'id': 'STU-001', 'tuition': {'total': 2800.0, 'paid': 500.0}})
+        self.assertEqual(events[1][1], {'id': 'STU-002'})
+        self.assertEqual(events[2][1]['totalStudents'], 1)
+        self.assertEqual(read_changes(last_id), (last_id, ''))
+
+    @override_settings(STUDENT_CHANGE_FEED_MAX_SECONDS=0)
+    def test_stream_resumes_after_last_event_id(self):
+        after = latest_change_id()
+        self.client.post('/api/students/', student_payload('P3'), format='json')
+        response = self.client.get('/api/students/events/', HTTP_LAST_EVENT_ID=str(after))
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        text = b''.join(response.streaming_content).decode()
+        self.assertTrue(text.startswith('retry: '))
+        events = self.events(text.split('\n\n', 1)[1])
+        self.assertEqual([event for event, _ in events], ['created', 'stats'])
+        self.assertEqual(events[0][1]['id'], 'STU-003')
+
+
+class FastSerializerTests(TestCase):
+    def setUp(self):
+        base = dict(
+            date_of_birth=date(2000, 1, 1), citizenship='Uzbekistan', group='CS-1', course_year=1, major='CS',
+        )
+        Student.objects.bulk_create([
+            Student(id='STU-001', full_name='Bare', passport_number='P1', **base),
+            Student(
+                id='STU-002', full_name='Oʻgʻiloy "Full"', passport_number='P2', jshir='123', phone='+998',
+                email='a@b.uz', emergency_contact_name='Ona', emergency_contact_phone='+998 90',
+                language='Uzbek', visa_start_date=date(2024, 1, 1), visa_end_date=date(2025, 1, 1),
+                registration_start_date=date(2024, 2, 1), registration_end_date=date(2025, 2, 1),
+                registration_address_details='Yotoqxona 2', tuition_total='3000.50', tuition_paid='1000.25',
+                registration_fee_paid='300', dormitory_status='VIP', dormitory_check_in_date=date(2024, 9, 1),
+                dormitory_planned_checkout_date=date(2025, 6, 30), dormitory_actual_checkout_date=date(2025, 6, 1),
+                dormitory_monthly_rate='650000.00', dormitory_paid_amount='0.10', **base,
+            ),
+            Student(
+                id='STU-003', full_name='Zero rate', passport_number='P3', dormitory_status='Normal',
+                dormitory_monthly_rate=0, dormitory_paid_amount=0, **base,
+            ),
+        ])
+
+    def test_same_bytes_as_drf(self):
+        students = Student.objects.order_by('id')
+        fast = represent_student_rows(students.values_list(*STUDENT_ROW_FIELDS))
+        drf = StudentSerializer(students, many=True).data
+        self.assertEqual(dumps(fast), dumps(drf))
+
+    def test_sparse_fields(self):
+        rows = Student.objects.order_by('id').values_list(*STUDENT_ROW_FIELDS)
+        self.assertEqual(
+            represent_student_rows(rows, 'id,tuition'),
+            [{'id': 'STU-001', 'tuition': {'total': 2800.0, 'paid': 0.0}},
+             {'id': 'STU-002', 'tuition': {'total': 3000.5, 'paid': 1000.25}},
+             {'id': 'STU-003', 'tuition': {'total': 2800.0, 'paid': 0.0}}],
+        )
+
+
+class ConditionalWriteTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        created = self.client.post('/api/students/', student_payload('P1'), format='json')
+        self.url = f'/api/students/{created.data["id"]}/'
+        self.etag = self.client.get(self.url)['ETag']
+
+    def patch(self, data, **headers):
+        return self.client.patch(self.url, data, format='json', **headers)
+
+    def test_stale_if_match_is_rejected(self):
+        response = self.patch({'fullName': 'First'}, HTTP_IF_MATCH=self.etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], self.etag)
+        self.assertEqual(self.patch({'fullName': 'Second'}, HTTP_IF_MATCH=self.etag).status_code, 412)
+        self.assertEqual(self.client.delete(self.url, HTTP_IF_MATCH=self.etag).status_code, 412)
+        self.assertEqual(Student.objects.get().full_name, 'First')
+        # Weak and wildcard forms, and no header at all
+        self.assertEqual(self.patch({'fullName': 'Third'}, HTTP_IF_MATCH=f'W/{response["ETag"]}').status_code, 200)
+        self.assertEqual(self.patch({'fullName': 'Fourth'}, HTTP_IF_MATCH='*').status_code, 200)
+        self.assertEqual(self.patch({'fullName': 'Fifth'}).status_code, 200)
+
+    def test_patch_saves_only_changed_columns(self):
+        before = Student.objects.get()
+        response = self.patch({'phone': '+998 91', 'academic': {'group': 'CS-1', 'courseYear': 3}})
+        self.assertEqual(response.status_code, 200, response.data)
+        change = StudentChange.objects.latest('id')
+        self.assertEqual(sorted(change.fields), ['course_year', 'phone', 'updated_at'])
+        student = Student.objects.get()
+        self.assertEqual((student.phone, student.course_year, student.full_name), ('+998 91', 3, before.full_name))
+
+        changes = StudentChange.objects.count()
+        self.assertEqual(self.patch({'phone': '+998 91'}).status_code, 200)
+        self.assertEqual(StudentChange.objects.count(), changes)
+        self.assertEqual(Student.objects.get().updated_at, student.updated_at)
+
+
+class ConditionalGetTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        rebuild_stats()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user('admin', password='admin'))
+        self.write(self.client.post, '/api/students/', student_payload('P1'), format='json')
+
+    def write(self, func, *args, **kwargs):
+        # Cached responses are invalidated by a version bump on commit
+        with self.captureOnCommitCallbacks(execute=True):
+            return func(*args, **kwargs)
+
+    def test_not_modified_until_written(self):
+        for url in ['/api/students/', '/api/students/STU-001/', '/api/students/stats/']:
+            with self.subTest(url=url):
+                first = self.client.get(url)
+                self.assertEqual(first.status_code, 200)
+                self.assertEqual(first['Cache-Control'], 'private, no-cache')
+                again = self.client.get(url, HTTP_IF_NONE_MATCH=first['ETag'])
+                self.assertEqual(again.status_code, 304)
+                self.assertEqual(again['ETag'], first['ETag'])
+                since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+                self.assertEqual(since.status_code, 304)
+
+        etags = {url: self.client.get(url)['ETag'] for url in ['/api/students/', '/api/students/STU-001/']}
+        self.write(self.client.patch, '/api/students/STU-001/', {'fullName': 'Ali Valiyev'}, format='json')
+        for url, etag in etags.items():
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(self.client.get('/api/students/').data['results'][0]['fullName'], 'Ali Valiyev')
+
+    def test_writes_invalidate_list_and_stats(self):
+        self.assertEqual(self.client.get('/api/students/').data['count'], 1)
+        self.assertEqual(self.client.get('/api/students/stats/').data['totalStudents'], 1)
+        self.write(self.client.post, '/api/students/', student_payload('P2'), format='json')
+        self.assertEqual(self.client.get('/api/students/').data['count'], 2)
+        self.assertEqual(self.client.get('/api/students/stats/').data['totalStudents'], 2)
+        self.write(Student.objects.filter(pk='STU-002').delete)
+        self.assertEqual(self.client.get('/api/students/').data['count'], 1)
+        self.assertEqual(self.client.get('/api/students/stats/').data['totalStudents'], 1)
+        self.assertEqual(self.client.get('/api/students/STU-002/').status_code, 404)
@@ -0,0 +1,110 @@
+import hashlib
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+
+# Login throttling for custom_login. Every authenticate() call runs a full
+# password hash, so attempts are refused before hashing once an IP or a
+# username has failed too often (exponential backoff), or when the whole
+# process is already hashing LOGIN_MAX_HASHES_PER_SECOND passwords.
+
+_metrics_lock = threading.Lock()
+# Process-wide counters since start, read by login_metrics()
+_metrics = {
+    'attempts': 0,
+    'succeeded': 0,
+    'failed': 0,
+    'throttled': 0,
+    'hash_seconds': 0.0,
+}
+
+
+def throttle_cache():
+    return caches[settings.LOGIN_THROTTLE_CACHE]
+
+
+def client_ip(request):
+    # Honours REST_FRAMEWORK['NUM_PROXIES'] for X-Forwarded-For
+    return BaseThrottle().get_ident(request)
+
+
+def _scopes(ip, username):
+    # Usernames are hashed: raw ones may not be valid cache keys
+    digest = hashlib.sha256(username.casefold().encode()).hexdigest()[:32]
+    return [
+        ('ip', ip, settings.LOGIN_IP_FAILURES_BEFORE_BACKOFF),
+        ('user', digest, settings.LOGIN_USERNAME_FAILURES_BEFORE_BACKOFF),
+    ]
+
+
+def backoff_seconds(failures, allowed):
+    """Lockout after the failures-th failure: 0 up to allowed, then doubling"""
+    if failures < allowed:
+        return 0
+    return min(settings.LOGIN_BACKOFF_BASE_SECONDS * 2 ** (failures - allowed), settings.LOGIN_BACKOFF_MAX_SECONDS)
+
+
+def login_retry_after(ip, username):
+    """
+    Seconds until this IP and username may try again, 0 when allowed. The
+    answer does not depend on whether the username exists, so a refused
+    attempt takes the same time either way.
+    """
+    if not settings.LOGIN_THROTTLE_ENABLED:
+        return 0
+    keys = [f'login:lock:{scope}:{value}' for scope, value, _ in _scopes(ip, username)]
+    remaining = max(throttle_cache().get_many(keys).values(), default=0) - time.time()
+    return math.ceil(remaining) if remaining > 0 else 0
+
+
+def reserve_password_hash():
+    """Take one of this second's LOGIN_MAX_HASHES_PER_SECOND; False when none is left"""
+    if not settings.LOGIN_THROTTLE_ENABLED or not settings.LOGIN_MAX_HASHES_PER_SECOND:
+        return True
+    cache = throttle_cache()
+    window = f'login:hashes:{int(time.time())}'
+    cache.add(window, 0, 5)
+    try:
+        return cache.incr(window) <= settings.LOGIN_MAX_HASHES_PER_SECOND
+    except ValueError:
+        return True
+
+
+def login_failed(ip, username):
+    """Count a failed attempt and lock the IP/username out once past their allowance"""
+    cache = throttle_cache()
+    for scope, value, allowed in _scopes(ip, username):
+        key = f'login:failures:{scope}:{value}'
+        # Failures are forgotten after the longest lockout without new ones
+        cache.add(key, 0, settings.LOGIN_BACKOFF_MAX_SECONDS)
+        try:
+            failures = cache.incr(key)
+        except ValueError:
+            failures = 1
+        lockout = backoff_seconds(failures, allowed)
+        if lockout:
+            cache.set(f'login:lock:{scope}:{value}', time.time() + lockout, lockout)
+
+
+def login_succeeded(ip, username):
+    """Clear the username's failures; the IP keeps its count"""
+    scope, value, _ = _scopes(ip, username)[1]
+    throttle_cache().delete_many([f'login:failures:{scope}:{value}', f'login:lock:{scope}:{value}'])
+
+
+def record_login(outcome, hash_seconds=0.0):
+    with _metrics_lock:
+        _metrics['attempts'] += 1
+        _metrics[outcome] += 1
+        _metrics['hash_seconds'] += hash_seconds
+
+
+def login_metrics():
+    """Snapshot of this process's login counters"""
+    with _metrics_lock:
+        return dict(_metrics)
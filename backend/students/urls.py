@@ -1,14 +1,24 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from rest_framework_simplejwt.views import TokenRefreshView
-from .views import StudentViewSet, custom_login, change_password
+from . import async_views
+from .metrics import metrics_view
+from .views import StudentViewSet, custom_login, change_password, login_stats
 
 router = DefaultRouter()
 router.register(r'students', StudentViewSet, basename='student')
 
 urlpatterns = [
     path('', include(router.urls)),
+    # Async read-only endpoints, meant to be served by an ASGI server
+    path('async/students/', async_views.student_list, name='async_student_list'),
+    path('async/students/stats/', async_views.student_stats, name='async_student_stats'),
+    path('async/students/events/', async_views.student_events, name='async_student_events'),
+    path('async/students/<str:pk>/', async_views.student_detail, name='async_student_detail'),
     path('auth/login/', custom_login, name='custom_login'),
     path('auth/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
     path('auth/change-password/', change_password, name='change_password'),
+    path('auth/login-stats/', login_stats, name='login_stats'),
+    # Prometheus scrape target
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -1,14 +1,39 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import APIException
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.settings import api_settings
+from rest_framework.permissions import SAFE_METHODS, AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
-from django.db.models import Q
+from django.db import router, transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.http import http_date
+from datetime import timedelta
+import time
 from .models import Student
-from .serializers import StudentSerializer
+from .authentication import QueryTokenJWTAuthentication, forget_user
+from .cache import cached_response, row_cache, row_cache_key
+from .changes import event_stream_response, parse_sync_token, resume_point, stream_changes, student_delta
+from .export import EXPORT_FORMATS
+from .importer import IMPORT_FORMATS, ImportFileError, import_students, read_import_file
+from .pagination import StudentPagination
+from .parsers import FastJSONParser
+from .payments import BULK_PAYMENTS_MAX_ROWS, post_payments
+from .renderers import CSVRenderer, EventStreamRenderer, NDJSONRenderer, XLSXRenderer
+from .routers import pin_to_primary, pinned_to_primary, reset_replica, use_replica
+from .search import get_search_backend
+from .serializers import (
+    STUDENT_ROW_FIELDS, StudentSerializer, represent_cached_students, represent_student_rows, select_fields,
+)
+from .stats import get_stats, represent_stats
+from .throttling import (
+    client_ip, login_failed, login_metrics, login_retry_after, login_succeeded, record_login, reserve_password_hash,
+)
 
 
 @api_view(['POST'])
@@ -23,14 +48,37 @@ def custom_login(request):
             {'error': 'Username va parol kiritilishi shart'},
             status=status.HTTP_400_BAD_REQUEST
         )
+    if not isinstance(username, str) or not isinstance(password, str):
+        return Response(
+            {'error': 'Username va parol matn boʻlishi kerak'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
     
+    ip = client_ip(request)
+    retry_after = login_retry_after(ip, username) or (0 if reserve_password_hash() else 1)
+    if retry_after:
+        # Refused before hashing, whether or not the username exists
+        record_login('throttled')
+        return Response(
+            {'error': f'Juda koʻp urinish, {retry_after} soniyadan keyin qayta urinib koʻring'},
+            status=status.HTTP_429_TOO_MANY_REQUESTS,
+            headers={'Retry-After': str(retry_after)}
+        )
+
+    started = time.thread_time()
     user = authenticate(username=username, password=password)
+    hash_seconds = time.thread_time() - started
     
     if user is None:
+        login_failed(ip, username)
+        record_login('failed', hash_seconds)
         return Response(
             {'error': 'Noto\'g\'ri foydalanuvchi nomi yoki parol'},
             status=status.HTTP_401_UNAUTHORIZED
         )
+
+    login_succeeded(ip, username)
+    record_login('succeeded', hash_seconds)
     
     refresh = RefreshToken.for_user(user)
     
@@ -44,6 +92,13 @@ def custom_login(request):
     })
 
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def login_stats(request):
+    """This process's login counters, including CPU seconds spent hashing passwords"""
+    return Response(login_metrics())
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def change_password(request):
@@ -75,77 +130,253 @@ def change_password(request):
             status=status.HTTP_400_BAD_REQUEST
         )
     
-    # Set new password
+    # Set new password; tokens issued for the old one stop working
+    forget_user(user)
     user.set_password(new_password)
     user.save()
+    refresh = RefreshToken.for_user(user)
     
     return Response({
-        'message': 'Parol muvaffaqiyatli o\'zgartirildi'
+        'message': 'Parol muvaffaqiyatli o\'zgartirildi',
+        'access': str(refresh.access_token),
+        'refresh': str(refresh),
     })
 
 
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = 'Talaba maʼlumotlari boshqa foydalanuvchi tomonidan oʻzgartirilgan, sahifani yangilang'
+    default_code = 'precondition_failed'
+
+
 class StudentViewSet(viewsets.ModelViewSet):
     queryset = Student.objects.all()
     serializer_class = StudentSerializer
     permission_classes = [IsAuthenticated]
+    pagination_class = StudentPagination
+
+    ALERT_DEFAULT_LIMIT = 5
+    ALERT_MAX_LIMIT = 100
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Safe requests read from the replica unless this user wrote moments ago
+        self.replica_token = use_replica(
+            request.method in SAFE_METHODS and not pinned_to_primary(request.user)
+        )
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if getattr(self, 'replica_token', None) is not None:
+            reset_replica(self.replica_token)
+            self.replica_token = None
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            pin_to_primary(request.user)
+        return super().finalize_response(request, response, *args, **kwargs)
 
     def get_queryset(self):
         queryset = Student.objects.all()
         search = self.request.query_params.get('search', None)
         if search:
-            queryset = queryset.filter(
-                Q(full_name__icontains=search) |
-                Q(id__icontains=search) |
-                Q(group__icontains=search) |
-                Q(major__icontains=search) |
-                Q(citizenship__icontains=search)
-            )
+            queryset = get_search_backend().search(queryset, search)
+        if self.action in ('update', 'partial_update', 'destroy'):
+            # Held until the write commits, so the If-Match check cannot go stale
+            queryset = queryset.select_for_update()
         return queryset
 
+    def get_object(self):
+        instance = super().get_object()
+        if_match = self.request.headers.get('If-Match')
+        if if_match and self.request.method in ('PUT', 'PATCH', 'DELETE'):
+            # A compressed response carries the weak form of the same tag
+            tags = [tag.strip().removeprefix('W/') for tag in if_match.split(',')]
+            if '*' not in tags and instance.etag not in tags:
+                raise PreconditionFailed()
+        return instance
+
+    def retrieve(self, request, *args, **kwargs):
+        def build():
+            instance = self.get_object()
+            key = row_cache_key(instance.pk, instance.updated_at)
+            data = row_cache().get(key)
+            if data is None:
+                data = StudentSerializer(instance).data
+                row_cache().set(key, data, None)
+            if request.query_params.get('fields'):
+                data = select_fields([data], request.query_params['fields'])[0]
+            return Response(data, headers={
+                'ETag': instance.etag,
+                'Last-Modified': http_date(instance.updated_at.timestamp()),
+            })
+        return cached_response(request, build)
+
+    def update(self, request, *args, **kwargs):
+        partial = kwargs.pop('partial', False)
+        with transaction.atomic():
+            instance = self.get_object()
+            serializer = self.get_serializer(instance, data=request.data, partial=partial)
+            serializer.is_valid(raise_exception=True)
+            self.perform_update(serializer)
+        return Response(serializer.data, headers={'ETag': instance.etag})
+
+    def destroy(self, request, *args, **kwargs):
+        with transaction.atomic():
+            return super().destroy(request, *args, **kwargs)
+
+    def list(self, request, *args, **kwargs):
+        return cached_response(request, lambda: self._list_response(request))
+
+    def _list_response(self, request):
+        # Only keys are read here; representations come from the row cache
+        queryset = self.filter_queryset(self.get_queryset()).values_list('id', 'updated_at', 'created_at', named=True)
+        fields = request.query_params.get('fields')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(select_fields(represent_cached_students(page), fields))
+        return Response(select_fields(represent_cached_students(list(queryset)), fields))
+
+    def perform_create(self, serializer):
+        self._cache_saved(serializer)
+
+    def perform_update(self, serializer):
+        self._cache_saved(serializer)
+
+    def _cache_saved(self, serializer):
+        instance = serializer.save()
+        # The instance still holds the raw payload values ("3" for a course year);
+        # represent, cache and return what the database stored
+        instance.refresh_from_db()
+        row_cache().set(row_cache_key(instance.pk, instance.updated_at), serializer.data, None)
+
+    def perform_destroy(self, instance):
+        row_cache().delete(row_cache_key(instance.pk, instance.updated_at))
+        instance.delete()
+
     @action(detail=False, methods=['get'])
     def stats(self, request):
         """Get statistics for dashboard"""
-        from django.utils import timezone
-        from datetime import timedelta
-        
-        students = Student.objects.all()
-        total_students = students.count()
-        
-        # Calculate fully paid count
-        fully_paid = 0
-        expiring_registration = 0
-        dormitory_residents = 0
-        
-        for student in students:
-            # Check if fully paid
-            tuition_remaining = float(student.tuition_total) - float(student.tuition_paid)
-            registration_remaining = float(student.registration_fee_total) - float(student.registration_fee_paid)
-            
-            # Calculate dormitory balance
-            dormitory_balance = 0
-            if student.dormitory_status != 'None':
-                dormitory_residents += 1
-                if student.dormitory_monthly_rate and student.dormitory_check_in_date and student.dormitory_planned_checkout_date:
-                    from datetime import datetime
-                    check_in = student.dormitory_check_in_date
-                    checkout = student.dormitory_planned_checkout_date
-                    months = (checkout.year - check_in.year) * 12 + (checkout.month - check_in.month)
-                    total_planned = float(student.dormitory_monthly_rate) * months
-                    paid = float(student.dormitory_paid_amount or 0)
-                    dormitory_balance = total_planned - paid
-            
-            if tuition_remaining <= 0 and registration_remaining <= 0 and dormitory_balance <= 0:
-                fully_paid += 1
-            
-            # Check expiring registration
-            if student.registration_end_date:
-                days_left = (student.registration_end_date - timezone.now().date()).days
-                if days_left <= 10:
-                    expiring_registration += 1
-        
-        return Response({
-            'totalStudents': total_students,
-            'fullyPaid': fully_paid,
-            'expiringRegistration': expiring_registration,
-            'dormitoryResidents': dormitory_residents
-        })
+        return cached_response(request, self._stats_response)
+
+    def _stats_response(self):
+        return Response(represent_stats(get_stats()))
+
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=api_settings.DEFAULT_RENDERER_CLASSES + [CSVRenderer, NDJSONRenderer, XLSXRenderer],
+    )
+    def export(self, request):
+        """Stream the (searched) roster as ?format=csv|ndjson|xlsx"""
+        export_format = request.query_params.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return Response(
+                {'error': 'format csv, ndjson yoki xlsx boʻlishi kerak'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        stream, content_type = EXPORT_FORMATS[export_format]
+        # Bind the alias now: the stream is consumed after routing state is reset
+        queryset = self.filter_queryset(self.get_queryset()).using(router.db_for_read(Student))
+        response = StreamingHttpResponse(stream(queryset), content_type=content_type)
+        filename = f'talabalar-{timezone.now().date().isoformat()}.{export_format}'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=[EventStreamRenderer] + api_settings.DEFAULT_RENDERER_CLASSES,
+        authentication_classes=[QueryTokenJWTAuthentication],
+    )
+    def events(self, request):
+        """Server-sent change feed, resuming after Last-Event-ID or ?after="""
+        return event_stream_response(stream_changes(resume_point(request)))
+
+    @action(detail=False, methods=['get'])
+    def changes(self, request):
+        """Delta sync: students written and ids deleted since ?since=<token>"""
+        since = parse_sync_token(request.query_params.get('since'))
+        return cached_response(request, lambda: Response(student_delta(since)))
+
+    @action(detail=False, methods=['post'], url_path='bulk-import', parser_classes=[FastJSONParser, MultiPartParser])
+    def bulk_import(self, request):
+        """Import a JSON body or an uploaded CSV/XLSX/JSON ``file`` in one transaction"""
+        def flag(name):
+            value = request.query_params.get(name, request.data.get(name) if hasattr(request.data, 'get') else None)
+            return str(value).lower() in ('1', 'true', 'yes')
+
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                import_format = upload.name.rsplit('.', 1)[-1].lower()
+                payloads = read_import_file(upload, import_format)
+            elif isinstance(request.data, list):
+                payloads = request.data
+            else:
+                payloads = request.data.get('students')
+                if not isinstance(payloads, list):
+                    raise ImportFileError(
+                        f'Talabalar roʻyxati yoki {", ".join(IMPORT_FORMATS)} fayl yuborilishi kerak'
+                    )
+        except ImportFileError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = import_students(
+            payloads, upsert=flag('upsert'), partial=flag('partial'), dry_run=flag('dry_run')
+        )
+        failed = result['errors'] and not (flag('partial') or flag('dry_run'))
+        return Response(result, status=status.HTTP_400_BAD_REQUEST if failed else status.HTTP_200_OK)
+
+    @action(detail=False, methods=['post'], url_path='bulk-payments')
+    def bulk_payments(self, request):
+        """Post a batch of {id, kind, amount} payments in one transaction"""
+        rows = request.data if isinstance(request.data, list) else request.data.get('payments')
+        if not isinstance(rows, list) or not rows:
+            return Response(
+                {'error': 'Toʻlovlar roʻyxati yuborilishi kerak'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(rows) > BULK_PAYMENTS_MAX_ROWS:
+            return Response(
+                {'error': f'Bir soʻrovda koʻpi bilan {BULK_PAYMENTS_MAX_ROWS} ta toʻlov yuborish mumkin'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        partial = str(request.query_params.get('partial', '')).lower() in ('1', 'true', 'yes')
+        result = post_payments(rows, partial=partial)
+        failed = result['applied'] < len(rows) and not partial
+        return Response(result, status=status.HTTP_400_BAD_REQUEST if failed else status.HTTP_200_OK)
+
+    def _alert_response(self, request, queryset, date_field):
+        """Serialize the first ?limit= rows of an alert feed, optionally within ?days="""
+        try:
+            limit = min(max(int(request.query_params.get('limit', self.ALERT_DEFAULT_LIMIT)), 1), self.ALERT_MAX_LIMIT)
+            days = request.query_params.get('days')
+            days = int(days) if days not in (None, '') else None
+        except ValueError:
+            return Response(
+                {'error': 'limit va days butun son boʻlishi kerak'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if date_field is not None:
+            queryset = queryset.filter(**{f'{date_field}__isnull': False}).order_by(date_field, 'id')
+            if days is not None:
+                today = timezone.now().date()
+                queryset = queryset.filter(**{f'{date_field}__lte': today + timedelta(days=days)})
+
+        rows = queryset.values_list(*STUDENT_ROW_FIELDS, named=True)[:limit]
+        return Response(represent_student_rows(rows, request.query_params.get('fields')))
+
+    @action(detail=False, methods=['get'], url_path='alerts/expiring-registrations')
+    def expiring_registrations(self, request):
+        """Students whose registration ends soonest"""
+        return self._alert_response(request, Student.objects.all(), 'registration_end_date')
+
+    @action(detail=False, methods=['get'], url_path='alerts/expiring-visas')
+    def expiring_visas(self, request):
+        """Students whose visa ends soonest"""
+        return self._alert_response(request, Student.objects.all(), 'visa_end_date')
+
+    @action(detail=False, methods=['get'], url_path='alerts/top-debtors')
+    def top_debtors(self, request):
+        """Students with the largest outstanding debt"""
+        return self._alert_response(request, Student.objects.debtors(), None)
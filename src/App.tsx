@@ -38,7 +38,8 @@ const App: React.FC = () => {
   const loadStudents = async () => {
     try {
       setLoading(true);
-      const data = await apiService.getStudents(search || undefined);
+      // The full roster is kept locally and delta-synced; searches go to the server
+      const data = search ? await apiService.getStudents(search) : await apiService.syncStudents();
       // Ensure data is an array
       if (Array.isArray(data)) {
         setStudents(data);
@@ -81,6 +82,31 @@ const App: React.FC = () => {
     }
   }, [search, isAuthenticated]);
 
+  // Patch the list from the server's change feed instead of reloading it
+  const searchRef = React.useRef(search);
+  searchRef.current = search;
+  React.useEffect(() => {
+    if (!isAuthenticated) return;
+    return apiService.subscribeToChanges({
+      onCreated: (student) => {
+        // A search result list is only refreshed by the search itself
+        if (searchRef.current) return;
+        setStudents(prev => (prev.some(s => s.id === student.id) ? prev : [student, ...prev]));
+      },
+      onUpdated: (changes) => {
+        setStudents(prev => prev.map(s => (s.id === changes.id ? { ...s, ...changes } : s)));
+      },
+      onDeleted: ({ id }) => {
+        setStudents(prev => prev.filter(s => s.id !== id));
+      },
+      onStats: setStats,
+      // Too far behind for the feed to patch; resync the list
+      onReset: () => {
+        if (!searchRef.current) loadStudents();
+      },
+    });
+  }, [isAuthenticated]);
+
   const handleLogin = async (username: string, password: string) => {
     try {
       setLoginError('');
@@ -209,6 +235,7 @@ const AppContent: React.FC<{
                     />
                     <PageContent
                       students={students}
+                      stats={stats}
                       pathname={location.pathname}
                       onSelectStudent={setSelectedStudent}
                       onEditStudent={setSelectedStudent}
@@ -223,6 +250,7 @@ const AppContent: React.FC<{
                 element={
                   <PageContent
                     students={students}
+                    stats={stats}
                     pathname={location.pathname}
                     onSelectStudent={setSelectedStudent}
                     onEditStudent={setSelectedStudent}
@@ -236,6 +264,7 @@ const AppContent: React.FC<{
                 element={
                   <PageContent
                     students={students}
+                    stats={stats}
                     pathname={location.pathname}
                     onSelectStudent={setSelectedStudent}
                     onEditStudent={setSelectedStudent}
@@ -249,6 +278,7 @@ const AppContent: React.FC<{
                 element={
                   <PageContent
                     students={students}
+                    stats={stats}
                     pathname={location.pathname}
                     onSelectStudent={setSelectedStudent}
                     onEditStudent={setSelectedStudent}
@@ -262,6 +292,7 @@ const AppContent: React.FC<{
                 element={
                   <PageContent
                     students={students}
+                    stats={stats}
                     pathname={location.pathname}
                     onSelectStudent={setSelectedStudent}
                     onEditStudent={setSelectedStudent}
@@ -275,6 +306,7 @@ const AppContent: React.FC<{
                 element={
                   <PageContent
                     students={students}
+                    stats={stats}
                     pathname={location.pathname}
                     onSelectStudent={setSelectedStudent}
                     onEditStudent={setSelectedStudent}
@@ -283,7 +315,7 @@ const AppContent: React.FC<{
                   />
                 }
               />
-              <Route path="/ogohlantirishlar" element={<AlertsPanel students={students} />} />
+              <Route path="/ogohlantirishlar" element={<AlertsPanel stats={stats} />} />
               <Route path="/profil" element={<Profile />} />
               <Route path="/sozlamalar" element={<Settings />} />
             </Routes>
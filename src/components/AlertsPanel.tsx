@@ -11,6 +11,7 @@ import {
   Typography
 } from '@mui/material';
 import { Student } from '../types';
+import { apiService } from '../services/api';
 import {
   calculateDormitoryBalance,
   calculateRegistrationDaysLeft,
@@ -18,55 +19,59 @@ import {
 } from '../utils';
 
 interface AlertsPanelProps {
-  students: Student[];
+  // Dashboard counters; alerts are reloaded from the server when they change
+  stats?: { expiringRegistration: number };
 }
 
-export const AlertsPanel: React.FC<AlertsPanelProps> = ({ students }) => {
-  // Ensure students is an array
-  const studentsArray = Array.isArray(students) ? students : [];
-  
-  const registrationExpiring = studentsArray.filter(
-    (s) => s.visa?.registrationEndDate && calculateRegistrationDaysLeft(s) <= 10
-  );
+// The expiring list is for display only; its count comes from the stats
+const EXPIRING_LIST_LIMIT = 100;
+const RELOAD_DELAY_MS = 500;
 
-  const sortedByRegistration = [...studentsArray]
-    .filter((s) => s.visa?.registrationEndDate)
-    .sort(
-      (a, b) =>
-        calculateRegistrationDaysLeft(a) - calculateRegistrationDaysLeft(b)
-    );
+export const AlertsPanel: React.FC<AlertsPanelProps> = ({ stats }) => {
+  const [registrationExpiring, setRegistrationExpiring] = React.useState<Student[]>([]);
+  const [sortedByRegistration, setSortedByRegistration] = React.useState<Student[]>([]);
+  const [topDebtors, setTopDebtors] = React.useState<Student[]>([]);
 
-  const debtors = studentsArray.filter(s => {
-    const tuitionRemaining = calculateRemaining(s.tuition);
-    const registrationRemaining = calculateRemaining(s.registrationFee);
-    const dormitoryBalance = calculateDormitoryBalance(s.dormitory);
-    return (
-      tuitionRemaining > 0 ||
-      registrationRemaining > 0 ||
-      dormitoryBalance.balance > 0
-    );
-  });
+  React.useEffect(() => {
+    let cancelled = false;
+    // The change feed sends fresh stats after every batch; reload once per burst
+    const timeoutId = setTimeout(() => {
+      Promise.all([
+        apiService.getExpiringRegistrations({ days: 10, limit: EXPIRING_LIST_LIMIT }),
+        apiService.getExpiringRegistrations({ limit: 5 }),
+        apiService.getTopDebtors(5),
+      ])
+        .then(([expiring, soonest, debtors]) => {
+          if (cancelled) return;
+          setRegistrationExpiring(expiring);
+          setSortedByRegistration(soonest);
+          setTopDebtors(debtors);
+        })
+        .catch(error => {
+          console.error('Error loading alerts:', error);
+        });
+    }, RELOAD_DELAY_MS);
+    return () => {
+      cancelled = true;
+      clearTimeout(timeoutId);
+    };
+  }, [stats]);
 
-  const topDebtors = [...debtors].sort((a, b) => {
-    const aTotal =
-      calculateRemaining(a.tuition) +
-      calculateRemaining(a.registrationFee) +
-      Math.max(calculateDormitoryBalance(a.dormitory).balance, 0);
-    const bTotal =
-      calculateRemaining(b.tuition) +
-      calculateRemaining(b.registrationFee) +
-      Math.max(calculateDormitoryBalance(b.dormitory).balance, 0);
-    return bTotal - aTotal;
-  });
+  const expiringTotal = stats?.expiringRegistration ?? registrationExpiring.length;
 
   return (
     <Grid container spacing={2}>
       <Grid size={{ xs: 12, md: 4 }}>
         <Paper sx={{ p: 2.5, height: '100%' }}>
           <Typography variant="subtitle2" gutterBottom>
-            Roʻyxatdan oʻtish muddati 10 kun ichida tugaydigan talabalar
+            Roʻyxatdan oʻtish muddati 10 kun ichida tugaydigan talabalar ({expiringTotal})
           </Typography>
-          {registrationExpiring.length === 0 && (
+          {expiringTotal > registrationExpiring.length && registrationExpiring.length > 0 && (
+            <Typography variant="caption" color="text.secondary">
+              Muddati eng yaqin {registrationExpiring.length} tasi koʻrsatilgan
+            </Typography>
+          )}
+          {expiringTotal === 0 && registrationExpiring.length === 0 && (
             <Alert severity="success" variant="outlined">
               Hamma roʻyxatdan oʻtish muddati 10 kundan koʻproq.
             </Alert>
@@ -111,7 +116,7 @@ export const AlertsPanel: React.FC<AlertsPanelProps> = ({ students }) => {
             Roʻyxatdan qolgan kuni eng kam boʻlgan talabalar
           </Typography>
           <List dense>
-            {sortedByRegistration.slice(0, 5).map(s => (
+            {sortedByRegistration.map(s => (
               <ListItem key={s.id} sx={{ px: 0 }}>
                 <ListItemText
                   primary={s.fullName}
@@ -162,7 +167,7 @@ export const AlertsPanel: React.FC<AlertsPanelProps> = ({ students }) => {
           
           {topDebtors.length > 0 && (
             <Box sx={{ mt: 1 }}>
-              {topDebtors.slice(0, 5).map(s => {
+              {topDebtors.map(s => {
                 const tuitionRemaining = calculateRemaining(s.tuition);
                 const registrationRemaining = calculateRemaining(s.registrationFee);
                 const dormitoryBalance = calculateDormitoryBalance(s.dormitory);
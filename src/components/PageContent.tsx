@@ -7,6 +7,7 @@ import { calculateDormitoryBalance, calculateRemaining, calculateRegistrationDay
 
 interface PageContentProps {
   students: Student[];
+  stats?: { expiringRegistration: number };
   pathname: string;
   onSelectStudent: (student: Student) => void;
   onEditStudent: (student: Student) => void;
@@ -16,6 +17,7 @@ interface PageContentProps {
 
 export const PageContent: React.FC<PageContentProps> = ({
   students,
+  stats,
   pathname,
   onSelectStudent,
   onEditStudent,
@@ -110,7 +112,7 @@ export const PageContent: React.FC<PageContentProps> = ({
           </p>
         </Box>
       )}
-      {showAlerts && <AlertsPanel students={students} />}
+      {showAlerts && <AlertsPanel stats={stats} />}
       <StudentTable
         students={filteredStudents}
         onSelectStudent={onSelectStudent}
@@ -1,3 +1,5 @@
+import { clearRoster, loadRoster, saveRoster } from './studentStore';
+
 const API_BASE_URL = process.env.REACT_APP_API_URL || 'http://localhost:8000/api';
 
 interface LoginResponse {
@@ -15,6 +17,14 @@ interface ApiError {
   message?: string;
 }
 
+export interface ChangeFeedHandlers {
+  onCreated: (student: any) => void;
+  onUpdated: (changes: any) => void;
+  onDeleted: (change: { id: string }) => void;
+  onStats: (stats: any) => void;
+  onReset: () => void;
+}
+
 class ApiService {
   private getToken(): string | null {
     return localStorage.getItem('access_token');
@@ -119,13 +129,48 @@ class ApiService {
 
   logout(): void {
     this.removeToken();
+    clearRoster();
   }
 
   async getStudents(search?: string): Promise<any[]> {
-    const query = search ? `?search=${encodeURIComponent(search)}` : '';
-    const data = await this.request<any>(`/students${query}`);
-    // Ensure we return an array
-    return Array.isArray(data) ? data : (data?.results || []);
+    // Walk the keyset pages; the server seeks by (created_at, id) instead of OFFSET.
+    // Keyset order would drop the search ranking, so searches use numbered pages.
+    const params = search
+      ? new URLSearchParams({ search, page_size: '1000' })
+      : new URLSearchParams({ cursor: '', page_size: '1000', count: 'false' });
+    const students: any[] = [];
+    let endpoint: string | null = `/students/?${params.toString()}`;
+    while (endpoint) {
+      const data: any = await this.request<any>(endpoint);
+      // Ensure we return an array
+      if (Array.isArray(data)) return data;
+      students.push(...(data?.results || []));
+      endpoint = data?.next ? data.next.slice(data.next.indexOf('/students/')) : null;
+    }
+    return students;
+  }
+
+  async syncStudents(): Promise<any[]> {
+    // Delta sync against the IndexedDB copy: only rows written since its token are downloaded
+    const local = await loadRoster();
+    const query = local ? `?since=${encodeURIComponent(local.token)}` : '';
+    const delta: any = await this.request<any>(`/students/changes/${query}`);
+    let students: any[] = delta.students;
+    if (local && !delta.reset) {
+      const changed = new Map<string, any>(delta.students.map((student: any) => [student.id, student]));
+      const deleted = new Set<string>(delta.deleted);
+      const kept = local.students
+        .filter(student => !deleted.has(student.id))
+        .map(student => {
+          const updated = changed.get(student.id);
+          changed.delete(student.id);
+          return updated || student;
+        });
+      // What is left is new; the server sends it newest first, like the roster
+      students = [...Array.from(changed.values()), ...kept];
+    }
+    await saveRoster({ token: delta.token, students });
+    return students;
   }
 
   async getStudent(id: string): Promise<any> {
@@ -157,18 +202,81 @@ class ApiService {
     fullyPaid: number;
     expiringRegistration: number;
     dormitoryResidents: number;
+    outstandingDebt: number;
   }> {
     return this.request('/students/stats/');
   }
 
+  subscribeToChanges(handlers: ChangeFeedHandlers): () => void {
+    let source: EventSource | null = null;
+    let retryTimer: ReturnType<typeof setTimeout> | undefined;
+    let lastEventId = '';
+
+    const connect = () => {
+      // EventSource cannot send the Authorization header, so the token goes in the URL
+      const params = new URLSearchParams({ token: this.getToken() || '' });
+      if (lastEventId) params.set('after', lastEventId);
+      const current = new EventSource(`${API_BASE_URL}/students/events/?${params.toString()}`);
+      const listen = (name: string, handler: (data: any) => void) => {
+        current.addEventListener(name, (event) => {
+          const message = event as MessageEvent;
+          lastEventId = message.lastEventId || lastEventId;
+          handler(JSON.parse(message.data));
+        });
+      };
+      listen('created', handlers.onCreated);
+      listen('updated', handlers.onUpdated);
+      listen('deleted', handlers.onDeleted);
+      listen('stats', handlers.onStats);
+      listen('reset', handlers.onReset);
+      current.onerror = () => {
+        // Dropped connections are retried by the browser; a rejected token closes the source
+        if (current.readyState === EventSource.CLOSED) {
+          retryTimer = setTimeout(connect, 5000);
+        }
+      };
+      source = current;
+    };
+
+    connect();
+    return () => {
+      clearTimeout(retryTimer);
+      source?.close();
+    };
+  }
+
+  async getExpiringRegistrations(options: { days?: number; limit?: number } = {}): Promise<any[]> {
+    return this.request<any[]>(`/students/alerts/expiring-registrations/${this.alertQuery(options)}`);
+  }
+
+  async getExpiringVisas(options: { days?: number; limit?: number } = {}): Promise<any[]> {
+    return this.request<any[]>(`/students/alerts/expiring-visas/${this.alertQuery(options)}`);
+  }
+
+  async getTopDebtors(limit?: number): Promise<any[]> {
+    return this.request<any[]>(`/students/alerts/top-debtors/${this.alertQuery({ limit })}`);
+  }
+
+  private alertQuery(options: { days?: number; limit?: number }): string {
+    const params = new URLSearchParams();
+    if (options.days !== undefined) params.set('days', String(options.days));
+    if (options.limit !== undefined) params.set('limit', String(options.limit));
+    const query = params.toString();
+    return query ? `?${query}` : '';
+  }
+
   async changePassword(currentPassword: string, newPassword: string): Promise<{ message: string }> {
-    return this.request<{ message: string }>('/auth/change-password/', {
+    const data = await this.request<{ message: string; access: string; refresh: string }>('/auth/change-password/', {
       method: 'POST',
       body: JSON.stringify({
         currentPassword,
         newPassword,
       }),
     });
+    // Tokens issued before the change are rejected from now on
+    this.setToken(data.access);
+    localStorage.setItem('refresh_token', data.refresh);
+    return data;
   }
 }
 
@@ -0,0 +1,58 @@
+// Local copy of the roster for delta sync (/students/changes/), kept in IndexedDB
+const DB_NAME = 'student-management';
+const STORE_NAME = 'roster';
+const ROSTER_KEY = 'students';
+
+export interface RosterSnapshot {
+  token: string;
+  students: any[];
+}
+
+const openDatabase = (): Promise<IDBDatabase> =>
+  new Promise((resolve, reject) => {
+    const request = indexedDB.open(DB_NAME, 1);
+    request.onupgradeneeded = () => {
+      request.result.createObjectStore(STORE_NAME);
+    };
+    request.onsuccess = () => resolve(request.result);
+    request.onerror = () => reject(request.error);
+  });
+
+const run = async <T>(mode: IDBTransactionMode, action: (store: IDBObjectStore) => IDBRequest<T>): Promise<T> => {
+  const db = await openDatabase();
+  try {
+    return await new Promise<T>((resolve, reject) => {
+      const request = action(db.transaction(STORE_NAME, mode).objectStore(STORE_NAME));
+      request.onsuccess = () => resolve(request.result);
+      request.onerror = () => reject(request.error);
+    });
+  } finally {
+    db.close();
+  }
+};
+
+export const loadRoster = async (): Promise<RosterSnapshot | null> => {
+  try {
+    return (await run<RosterSnapshot | undefined>('readonly', store => store.get(ROSTER_KEY))) || null;
+  } catch (error) {
+    // Private browsing or no IndexedDB: every load is a full sync
+    console.error('Error reading local roster:', error);
+    return null;
+  }
+};
+
+export const saveRoster = async (snapshot: RosterSnapshot): Promise<void> => {
+  try {
+    await run('readwrite', store => store.put(snapshot, ROSTER_KEY));
+  } catch (error) {
+    console.error('Error saving local roster:', error);
+  }
+};
+
+export const clearRoster = async (): Promise<void> => {
+  try {
+    await run('readwrite', store => store.delete(ROSTER_KEY));
+  } catch (error) {
+    console.error('Error clearing local roster:', error);
+  }
+};